@@ -8,6 +8,14 @@ cd "$(dirname "$0")"
 
 echo "📁 Working dir: $(pwd)"
 
+# ============================
+# --gateway：单进程网关（/api/*、/ws/asr、/ws/tts 都在 8000）
+# 前端需以 VITE_GATEWAY=127.0.0.1:8000 启动
+# ============================
+if [ "${1:-}" = "--gateway" ]; then
+  GATEWAY=1
+fi
+
 # ============================
 # 启动前清理占用端口
 # ============================
@@ -25,6 +33,12 @@ kill_port 9001
 kill_port 8765
 kill_port 8000
 
+if [ -n "${GATEWAY:-}" ]; then
+  echo "🔐 Using museguide/configs/secrets.yaml for credentials"
+  echo "🌐 Starting gateway (8000): /api/* + /ws/asr + /ws/tts ..."
+  exec uvicorn museguide.api.gateway:app --reload --port 8000
+fi
+
 # ============================
 # 退出时清理本次启动的进程
 # ============================
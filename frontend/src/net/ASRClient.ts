@@ -1,5 +1,6 @@
 // frontend/src/net/ASRClient.ts
 import { PCMRecorder } from './PCMRecorder'
+import { ASR_URL } from './endpoints'
 
 const CHUNK_SAMPLES = 1600   // 100ms @ 16kHz
 const SEND_INTERVAL = 100   // ms
@@ -26,7 +27,7 @@ export class ASRClient {
 
     this.finalText = ''
 
-    this.ws = new WebSocket('ws://localhost:9001')
+    this.ws = new WebSocket(ASR_URL)
     this.ws.binaryType = 'arraybuffer'
 
     this.ws.onmessage = (ev) => {
@@ -1,11 +1,12 @@
 // src/net/TTSClient.ts
 import type { TTSMeta } from './types'
+import { TTS_URL } from './endpoints'
 
 export class TTSClient {
   private url: string
 
   // 你遇到的 “erasableSyntaxOnly” 不允许 constructor(private url: string)
-  constructor(url = 'ws://127.0.0.1:8765') {
+  constructor(url = TTS_URL) {
     this.url = url
   }
 
@@ -0,0 +1,7 @@
+// src/net/endpoints.ts
+// 默认对应 dev.sh 的三进程：ASR 9001、TTS 8765；
+// 以 VITE_GATEWAY=127.0.0.1:8000 启动时，ASR / TTS 都走单进程网关（./dev.sh --gateway）
+const gateway = import.meta.env.VITE_GATEWAY as string | undefined
+
+export const ASR_URL = gateway ? `ws://${gateway}/ws/asr` : 'ws://localhost:9001'
+export const TTS_URL = gateway ? `ws://${gateway}/ws/tts` : 'ws://127.0.0.1:8765'
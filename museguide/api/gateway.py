@@ -0,0 +1,167 @@
+# museguide/api/gateway.py
+"""
+单进程网关：/api/*、/ws/asr、/ws/tts 挂在同一个 ASGI 应用、同一个事件循环上。
+
+    uvicorn museguide.api.gateway:app --port 8000      # 或 ./dev.sh --gateway
+
+- /api/*   ：museguide.api.server 的全部路由（同一个 app、同一个 orch）
+- /ws/asr  ：协议同 museguide.asr.ws_server（PCM 帧进，partial / final 出）
+- /ws/tts  ：协议同 museguide.tts.worker_v3（{"text", "voice_type"} 进，meta + PCM 出）
+- /ws/session：一条长连接走完整轮（见 museguide.api.session_socket）
+
+不换协议也能服务端串联：浏览器以 /ws/tts?session_id=X 保持一条播报连接，
+识别时连 /ws/asr?session_id=X&persona_id=Y&drive=1，final 之后 TurnDriver
+直接调编排器，result JSON 回到这条 ASR 连接，音频推到已登记的播报连接
+（此模式下浏览器不再 POST /api/llm）。
+
+三者共享进程内的配置快照、会话状态（orch.context_store）、LLM 后端连接池和
+一条 TTS v3 上游长连接，所以 ASR final → orch.run_turn → TTS 可以在进程内
+直接串起来，不再经过本机端口、也不再 JSON 往返一次。
+三进程的 dev.sh 默认模式保持不变。
+"""
+import asyncio
+import json
+from typing import AsyncIterator
+
+from fastapi import WebSocket
+
+from museguide.api.server import app, orch, turns
+from museguide.api.session_socket import SessionSocket
+from museguide.api.turn_driver import TTS_AUDIO_EVENTS, AudioStreams, TurnDriver
+from museguide.asr import ws_server as asr_server
+from museguide.tts.worker_v3 import TTSV3Session, ws_handler as tts_ws_handler
+
+_tts_session: TTSV3Session | None = None
+_tts_session_lock = asyncio.Lock()
+
+
+class BrowserSocket:
+    """
+    Starlette WebSocket behind the small `websockets` surface the ASR / TTS
+    handlers use (`await send(str | bytes)`, `async for message`), so those
+    handlers run unchanged inside the gateway.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # result JSON 与 PCM 可能由并行的任务写入同一连接，逐帧串行
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message: str | bytes) -> None:
+        async with self._send_lock:
+            if isinstance(message, (bytes, bytearray)):
+                await self.websocket.send_bytes(bytes(message))
+            else:
+                await self.websocket.send_text(message)
+
+    async def send_json(self, data: dict) -> None:
+        await self.send(json.dumps(data, ensure_ascii=False))
+
+    def __aiter__(self) -> AsyncIterator[str | bytes]:
+        return self._messages()
+
+    async def _messages(self) -> AsyncIterator[str | bytes]:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                yield message["bytes"]
+            elif message.get("text") is not None:
+                yield message["text"]
+
+
+async def tts_session() -> TTSV3Session:
+    """进程内共享的 TTS v3 上游会话（首次使用时建立；缺 TTS 凭据时只影响 TTS）。"""
+    global _tts_session
+    if _tts_session is None:
+        async with _tts_session_lock:
+            if _tts_session is None:
+                _tts_session = TTSV3Session()
+    return _tts_session
+
+
+turn_driver = TurnDriver(orch, turns, tts_session)
+audio_streams = AudioStreams()
+
+
+@app.websocket("/ws/asr")
+async def ws_asr(websocket: WebSocket, session_id: str = "", persona_id: str = "", drive: bool = False):
+    await websocket.accept()
+    client = BrowserSocket(websocket)
+    try:
+        final_text = await asr_server.handler(client)
+        if drive and final_text:
+            # 服务端接着跑整轮：result 回这条连接，音频推到该会话已登记的 /ws/tts；
+            # 这条连接先断开时整轮取消
+            await _until_disconnect(client, turn_driver.run(
+                final_text,
+                session_id,
+                persona_id or orch.default_persona_id,
+                result_to=client,
+                audio_to=audio_streams.get(session_id) if session_id else None,
+                audio_events=TTS_AUDIO_EVENTS,
+            ))
+    except Exception as e:
+        print("⚠️ [GATEWAY] /ws/asr closed:", e)
+    finally:
+        await _close_quietly(websocket)
+
+
+@app.websocket("/ws/tts")
+async def ws_tts(websocket: WebSocket, session_id: str = ""):
+    await websocket.accept()
+    client = BrowserSocket(websocket)
+    try:
+        session = await tts_session()
+    except RuntimeError as e:
+        await client.send_json({"type": "error", "error": str(e)})
+        await _close_quietly(websocket)
+        return
+    if session_id:
+        audio_streams.attach(session_id, client)
+    try:
+        await tts_ws_handler(client, session)
+    finally:
+        if session_id:
+            audio_streams.detach(session_id, client)
+        await _close_quietly(websocket)
+
+
+@app.websocket("/ws/session")
+async def ws_session(websocket: WebSocket, session_id: str = "", persona_id: str = ""):
+    await websocket.accept()
+    await SessionSocket(BrowserSocket(websocket), turn_driver, session_id, persona_id).serve()
+    await _close_quietly(websocket)
+
+
+@app.on_event("shutdown")
+async def _close_upstreams():
+    if _tts_session is not None:
+        await _tts_session.close()
+
+
+async def _until_disconnect(client: BrowserSocket, work) -> None:
+    """边跑 `work` 边读这条连接；浏览器先断开时取消 `work`。"""
+    task = asyncio.ensure_future(work)
+
+    async def watch():
+        async for _ in client:
+            pass
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            print("⚠️ [GATEWAY] client gone, turn cancelled")
+        await asyncio.gather(task, watcher, return_exceptions=True)
+
+
+async def _close_quietly(websocket: WebSocket) -> None:
+    try:
+        await websocket.close()
+    except Exception:
+        pass
@@ -1,10 +1,10 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from pathlib import Path
-import json
-import yaml
 
+from museguide.api.session_queue import SessionQueue
 from museguide.llm.orchestrator import LLMOrchestrator
 
 app = FastAPI()
@@ -20,11 +20,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 orch = LLMOrchestrator()
-DOMAIN_PRIOR_PATH = Path(__file__).parents[1] / "configs" / "domain_prior.json"
-PERSONAS_PATH = Path(__file__).parents[1] / "configs" / "personas.yaml"
+# 配置快照常驻内存；后台轮询文件变更并原子切换
+orch.config.start_watching()
+# 同一会话按序执行，重复请求共享结果；session_policy=latest 时新输入取消进行中的生成
+turns = SessionQueue(orch.run_turn, policy=str(orch.llm_cfg.get("session_policy", "queue")))
 
 
 class LLMRequest(BaseModel):
@@ -33,19 +36,66 @@ class LLMRequest(BaseModel):
     session_id: str | None = None
 
 
+# 等待 LLM 期间检查客户端是否已断开的间隔（秒）
+DISCONNECT_POLL_SECONDS = 0.25
+
+
 @app.post("/api/llm")
-def run_llm(req: LLMRequest):
-    return orch.run(req.text, req.persona_id, req.session_id)
+async def run_llm(req: LLMRequest, request: Request):
+    turn = asyncio.ensure_future(turns.submit(req.session_id or "", req.persona_id, req.text))
+    while True:
+        done, _ = await asyncio.wait({turn}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return turn.result().result.to_dict()
+        if await request.is_disconnected():
+            # 展台离开 / 页面刷新：撤回本轮，进行中的 LLM 调用随之取消
+            turn.cancel()
+            print(f"=== CLIENT GONE, TURN CANCELLED === session={req.session_id or '-'}")
+            return Response(status_code=499)
+
+
+@app.get("/api/route")
+def get_route(
+    session_id: str | None = None,
+    persona_id: str = "woman_demo",
+    to: str = "",
+    origin: str = "",
+):
+    # to 为空：未看展区 / 展品的完整参观顺序；否则：到该展区（名称 / id / 展品名）的最短路线
+    return orch.plan_route(session_id, persona_id, target=to, origin=origin)
+
+
+@app.get("/api/occupancy")
+def get_occupancy():
+    # 各展区 / 展品实时人数（增量维护，不扫描会话）
+    return orch.occupancy()
+
+
+@app.get("/api/metrics")
+def get_metrics():
+    # 准入队列深度 / 排队时长、会话队列、熔断与预计算的计数
+    return {
+        "admission": orch.admission.stats(),
+        "sessions": turns.stats(),
+        "breaker": orch.breaker.stats(),
+        "speculation": orch.speculation.stats(),
+    }
 
 
 @app.get("/api/domain_prior")
-def get_domain_prior():
-    with open(DOMAIN_PRIOR_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+def get_domain_prior(request: Request):
+    snapshot = orch.config.snapshot()
+    return _cached_json(request, snapshot.domain_json, snapshot.domain_etag)
 
 
 @app.get("/api/personas")
-def get_personas():
-    with open(PERSONAS_PATH, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
-    return data.get("personas", {})
+def get_personas(request: Request):
+    snapshot = orch.config.snapshot()
+    return _cached_json(request, snapshot.personas_json, snapshot.personas_etag)
+
+
+def _cached_json(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,195 @@
+# museguide/api/session_queue.py
+"""
+按会话串行执行导览轮次（事件循环内，一个会话一条队列）。
+
+- 同一 session_id 的轮次按到达顺序逐个执行，不再并发读同一份 prior_state、并发写进度；
+- 与进行中或排队中的请求相同（角色 + 文本）时直接共享那一次的结果（single-flight），
+  重复点按 / 展台重发不会多花一次模型调用；
+- policy=latest 时新输入一到：进行中的 LLM 调用立即取消（不写会话状态），排队中的旧输入丢弃，
+  被顶替的请求等到最新一轮的结果；policy=queue（缺省）只排队不取消。
+- 等待方全部离开（客户端断开、调用任务被取消）时：排队中的轮次直接移除，进行中的轮次
+  置位取消令牌，LLM 调用立即中止、不写会话状态。
+没有 session_id 的请求不排队，调用任务被取消时同样置位取消令牌。
+"""
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from museguide.llm.backend import LLMCancelled
+from museguide.llm.turn_result import TurnResult
+
+POLICY_QUEUE = "queue"
+POLICY_LATEST = "latest"
+
+RunTurn = Callable[[str, str, str, threading.Event], TurnResult]
+
+
+@dataclass(frozen=True)
+class TurnOutcome:
+    result: TurnResult
+    shared: bool  # True：结果属于另一个请求（重复合并 / 被新输入顶替），调用方不应再次播报
+
+
+class TurnSuperseded(Exception):
+    pass
+
+
+@dataclass(eq=False)
+class _Job:
+    key: tuple
+    session_id: str
+    text: str
+    persona_id: str
+    future: asyncio.Future
+    cancel: threading.Event = field(default_factory=threading.Event)
+    successor: "_Job | None" = None
+    waiters: int = 0
+
+
+@dataclass(eq=False)
+class _Lane:
+    pending: List[_Job] = field(default_factory=list)
+    running: _Job | None = None
+    worker: asyncio.Task | None = None
+
+
+class SessionQueue:
+    """
+    Per-session turn serialisation with single-flight and latest-wins
+    coalescing. `run_turn(text, persona_id, session_id, cancel)` is the
+    blocking orchestrator call and runs in a worker thread; setting
+    `cancel` makes it raise LLMCancelled without touching session state.
+    Jobs count their waiters, so a job is only withdrawn once nobody is
+    left to receive its result.
+    """
+
+    def __init__(self, run_turn: RunTurn, policy: str = POLICY_QUEUE):
+        if policy not in (POLICY_QUEUE, POLICY_LATEST):
+            raise ValueError(f"unknown session policy: {policy!r}")
+        self._run_turn = run_turn
+        self.policy = policy
+        self._lanes: Dict[str, _Lane] = {}
+        self.coalesced = 0
+        self.cancelled = 0
+        self.abandoned = 0
+
+    async def submit(self, session_id: str, persona_id: str, text: str) -> TurnOutcome:
+        if not session_id:
+            cancel = threading.Event()
+            try:
+                result = await asyncio.to_thread(self._run_turn, text, persona_id, "", cancel)
+            except asyncio.CancelledError:
+                cancel.set()
+                self.abandoned += 1
+                raise
+            return TurnOutcome(result, shared=False)
+
+        lane = self._lanes.setdefault(session_id, _Lane())
+        key = (persona_id, " ".join(str(text or "").split()))
+        for job in ([lane.running] if lane.running else []) + lane.pending:
+            if job.key == key and not job.cancel.is_set():
+                self.coalesced += 1
+                return TurnOutcome(await self._wait(job), shared=True)
+
+        job = _Job(
+            key=key,
+            session_id=session_id,
+            text=text,
+            persona_id=persona_id,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        if self.policy == POLICY_LATEST:
+            self._supersede(lane, job)
+        lane.pending.append(job)
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._drain(session_id, lane))
+        result = await self._wait(job)
+        return TurnOutcome(result, shared=job.future.exception() is not None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._lanes),
+            "pending": sum(len(lane.pending) for lane in self._lanes.values()),
+            "running": sum(1 for lane in self._lanes.values() if lane.running),
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "abandoned": self.abandoned,
+        }
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _supersede(self, lane: _Lane, job: _Job) -> None:
+        if lane.running is not None and not lane.running.cancel.is_set():
+            lane.running.cancel.set()
+            lane.running.successor = job
+            self.cancelled += 1
+        for old in lane.pending:
+            old.successor = job
+            old.future.set_exception(TurnSuperseded())
+        lane.pending.clear()
+
+    async def _wait(self, job: _Job) -> TurnResult:
+        """The job's result; a superseded job follows its successor chain to the newest turn."""
+        while True:
+            job.waiters += 1
+            try:
+                return await asyncio.shield(job.future)
+            except TurnSuperseded:
+                if job.successor is None:
+                    raise
+            except asyncio.CancelledError:
+                if job.waiters == 1:
+                    self._abandon(job)
+                raise
+            finally:
+                job.waiters -= 1
+            job = job.successor
+
+    def _abandon(self, job: _Job) -> None:
+        """Last waiter gone: drop the job if queued, cancel its LLM call if running."""
+        lane = self._lanes.get(job.session_id)
+        if lane is None or job.future.done():
+            return
+        if job in lane.pending:
+            lane.pending.remove(job)
+            job.future.cancel()
+            self.abandoned += 1
+        elif lane.running is job and not job.cancel.is_set():
+            job.cancel.set()
+            self.abandoned += 1
+
+    @staticmethod
+    def _fail(job: _Job, error: BaseException) -> None:
+        # 没人等的轮次直接取消 future，免得异常无人取回
+        if job.waiters:
+            job.future.set_exception(error)
+        else:
+            job.future.cancel()
+
+    async def _drain(self, session_id: str, lane: _Lane) -> None:
+        try:
+            while lane.pending:
+                job = lane.pending.pop(0)
+                lane.running = job
+                try:
+                    result = await asyncio.to_thread(
+                        self._run_turn, job.text, job.persona_id, session_id, job.cancel
+                    )
+                except LLMCancelled:
+                    self._fail(job, TurnSuperseded())
+                except Exception as error:
+                    self._fail(job, error)
+                else:
+                    if job.cancel.is_set() and job.successor is not None:
+                        # 取消时生成已结束：结果不再下发，调用方转等最新一轮
+                        self._fail(job, TurnSuperseded())
+                    else:
+                        job.future.set_result(result)
+                finally:
+                    lane.running = None
+        finally:
+            if not lane.pending and self._lanes.get(session_id) is lane:
+                del self._lanes[session_id]
@@ -0,0 +1,154 @@
+# museguide/api/session_socket.py
+"""
+/ws/session：一个展台会话一条长连接，ASR → LLM → TTS 在服务端背靠背串行。
+
+连接：/ws/session?session_id=...&persona_id=...（session_id 缺省时由服务端生成）
+
+浏览器 → 服务端
+- 二进制：麦克风 PCM（16 kHz / s16le / 单声道），≤2 字节的帧表示本句结束（同 /ws/asr）
+- 文本 JSON：
+    {"type": "text", "text": "..."}            键盘输入 / 推荐按钮，跳过 ASR
+    {"type": "persona", "persona_id": "..."}   切换角色
+
+服务端 → 浏览器
+- {"type": "ready", "session_id", "persona_id"}
+- {"type": "partial", "text"} / {"type": "final", "text"}
+- {"type": "result", "data": {...}}           同 POST /api/llm 的返回
+- {"type": "tts_start"} → {"type": "meta", ...} → 二进制 PCM … → {"type": "tts_end"}
+- {"type": "superseded", "text"}                 该输入与其他输入合并 / 被更新的输入顶替，不单独作答
+- {"type": "error", "stage": "asr" | "llm" | "tts", "error"}
+
+握手只有一次；识别结束到出声之间不再有浏览器往返（整轮由 TurnDriver 驱动，
+result 与播报并行下发，两者到达顺序不固定）。
+"""
+import asyncio
+import json
+import uuid
+from typing import Any
+
+from museguide.api.turn_driver import TurnDriver
+from museguide.asr.v3_bigmodel_client import BigModelASR
+
+
+class SessionSocket:
+    """
+    One kiosk session on one duplex socket. `client` is the gateway's
+    BrowserSocket (send / send_json / async iteration); `driver` runs each
+    turn from the final transcript to audio. An ASR stream is
+    opened per utterance; turns run as background tasks (ordered and
+    coalesced by the session queue) so the socket keeps reading audio while
+    the guide is speaking.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        driver: TurnDriver,
+        session_id: str = "",
+        persona_id: str = "",
+    ):
+        self.client = client
+        self.driver = driver
+        self.session_id = session_id or uuid.uuid4().hex
+        self.persona_id = persona_id or driver.orch.default_persona_id
+        self._asr: BigModelASR | None = None
+        self._partial = ""
+        self._turns: set[asyncio.Task] = set()
+
+    async def serve(self) -> None:
+        print(f"🔗 [SESSION] connected session={self.session_id} persona={self.persona_id}")
+        await self._send({"type": "ready", "session_id": self.session_id, "persona_id": self.persona_id})
+        try:
+            async for message in self.client:
+                if isinstance(message, (bytes, bytearray)):
+                    await self._on_audio(bytes(message))
+                else:
+                    await self._on_command(message)
+        finally:
+            # 浏览器已断开：上游识别立即断开，进行中的轮次（LLM / 播报）一并取消
+            if self._asr is not None:
+                await self._asr.close(abort=True)
+                self._asr = None
+            for task in list(self._turns):
+                task.cancel()
+            print(f"🧹 [SESSION] closed session={self.session_id}")
+
+    # -------------------------
+    # Client messages
+    # -------------------------
+
+    async def _on_audio(self, pcm: bytes) -> None:
+        try:
+            if len(pcm) <= 2:
+                await self._finish_utterance()
+                return
+            if self._asr is None:
+                self._asr = BigModelASR()
+                self._partial = ""
+            text = await self._asr.send_audio(pcm, is_last=False)
+        except Exception as e:
+            await self._drop_asr()
+            await self._send({"type": "error", "stage": "asr", "error": str(e)})
+            return
+        if text and text != self._partial:
+            self._partial = text
+            await self._send({"type": "partial", "text": text})
+
+    async def _finish_utterance(self) -> None:
+        if self._asr is None:
+            return
+        asr, self._asr = self._asr, None
+        try:
+            last = await asr.send_audio(b"", is_last=True)
+        finally:
+            await asr.close()
+        text = (last or self._partial).strip()
+        self._partial = ""
+        await self._send({"type": "final", "text": text})
+        if text:
+            self._start_turn(text)
+
+    async def _on_command(self, message: str) -> None:
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            print("⚠️ [SESSION] non-JSON text ignored:", message[:80])
+            return
+        kind = data.get("type")
+        if kind == "text":
+            text = str(data.get("text", "")).strip()
+            if text:
+                self._start_turn(text)
+        elif kind == "persona":
+            self.persona_id = str(data.get("persona_id", "")).strip() or self.persona_id
+        else:
+            print("⚠️ [SESSION] unknown message type:", kind)
+
+    # -------------------------
+    # Turn pipeline
+    # -------------------------
+
+    def _start_turn(self, text: str) -> None:
+        # 顺序、合并与取消由会话队列负责
+        task = asyncio.create_task(
+            self.driver.run(text, self.session_id, self.persona_id, result_to=self.client, audio_to=self.client)
+        )
+        self._turns.add(task)
+        task.add_done_callback(self._turns.discard)
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    async def _drop_asr(self) -> None:
+        if self._asr is not None:
+            asr, self._asr = self._asr, None
+            await asr.close()
+        self._partial = ""
+
+    async def _send(self, data: dict) -> None:
+        """浏览器已断开时静默丢弃。"""
+        try:
+            await self.client.send_json(data)
+        except Exception:
+            pass
@@ -0,0 +1,117 @@
+# museguide/api/turn_driver.py
+"""
+服务端整轮驱动：ASR final → LLMOrchestrator.run_turn（经会话队列）→ TTS。
+
+编排器一返回就开始用角色的 tts_voice_type 合成 tts_text，同时把结果 JSON
+发给浏览器，两者并行；音频推到浏览器已打开的连接上（/ws/session 本身，
+或 /ws/tts?session_id=... 登记的那条），中间不再经过浏览器。
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from museguide.api.session_queue import SessionQueue
+from museguide.llm.orchestrator import LLMOrchestrator
+from museguide.llm.turn_result import TurnResult
+from museguide.tts.worker_v3 import TTSV3Session
+
+# 音频前后的事件名：/ws/session 用 tts_start / tts_end，/ws/tts 沿用 worker 的 start / end
+SESSION_AUDIO_EVENTS = ("tts_start", "tts_end")
+TTS_AUDIO_EVENTS = ("start", "end")
+
+
+class AudioStreams:
+    """session_id → the browser's open TTS socket (/ws/tts?session_id=...)."""
+
+    def __init__(self) -> None:
+        self._streams: Dict[str, Any] = {}
+
+    def attach(self, session_id: str, client: Any) -> None:
+        self._streams[session_id] = client
+
+    def detach(self, session_id: str, client: Any) -> None:
+        if self._streams.get(session_id) is client:
+            del self._streams[session_id]
+
+    def get(self, session_id: str) -> Any:
+        return self._streams.get(session_id)
+
+
+class TurnDriver:
+    """
+    Runs one turn from recognised text to audio inside the gateway process.
+    The orchestrator is called through the per-session queue (off the event
+    loop); a turn whose result belongs to another request (duplicate or
+    superseded) only gets a `superseded` notice. As soon as it returns,
+    the result JSON (to `result_to`) and the TTS stream (to `audio_to`) go
+    out concurrently, so the first PCM frame does not wait for the result
+    to be serialised and sent. Errors are reported per stage on
+    `result_to` and never raised.
+    """
+
+    def __init__(
+        self,
+        orch: LLMOrchestrator,
+        turns: SessionQueue,
+        tts_session: Callable[[], Awaitable[TTSV3Session]],
+    ):
+        self.orch = orch
+        self.turns = turns
+        self._tts_session = tts_session
+
+    async def run(
+        self,
+        text: str,
+        session_id: str,
+        persona_id: str,
+        *,
+        result_to: Any,
+        audio_to: Any = None,
+        audio_events: Tuple[str, str] = SESSION_AUDIO_EVENTS,
+    ) -> TurnResult | None:
+        started = time.perf_counter()
+        try:
+            outcome = await self.turns.submit(session_id, persona_id, text)
+        except Exception as e:
+            await _send(result_to, {"type": "error", "stage": "llm", "error": str(e)})
+            return None
+        if outcome.shared:
+            await _send(result_to, {"type": "superseded", "text": text})
+            return None
+        result = outcome.result
+        llm_ms = (time.perf_counter() - started) * 1000
+
+        jobs = [_send(result_to, {"type": "result", "data": result.to_dict()})]
+        tts_text = str(result.tts_text or "").strip()
+        if audio_to is not None and tts_text:
+            jobs.append(self._speak(tts_text, result.tts_voice_type, audio_to, audio_events, result_to))
+        await asyncio.gather(*jobs)
+        if self.orch.llm_cfg.get("debug"):
+            total_ms = (time.perf_counter() - started) * 1000
+            print(f"=== TURN DRIVER session={session_id} llm={llm_ms:.0f}ms total={total_ms:.0f}ms ===")
+        return result
+
+    async def _speak(
+        self,
+        text: str,
+        voice_type: str | None,
+        audio_to: Any,
+        audio_events: Tuple[str, str],
+        error_to: Any,
+    ) -> None:
+        start_event, end_event = audio_events
+        try:
+            session = await self._tts_session()
+            await audio_to.send_json({"type": start_event})
+            await session.synthesize_stream(text, audio_to, voice_type=voice_type)
+            await audio_to.send_json({"type": end_event})
+        except Exception as e:
+            await _send(error_to, {"type": "error", "stage": "tts", "error": str(e)})
+
+
+async def _send(client: Any, data: dict) -> None:
+    """浏览器已断开时静默丢弃。"""
+    try:
+        await client.send_json(data)
+    except Exception:
+        pass
@@ -171,11 +171,19 @@ class BigModelASR:
 
         return final_text
 
-    async def close(self):
+    async def close(self, abort: bool = False):
+        """
+        abort=True：浏览器已断开，不再需要识别结果——直接断开传输层，
+        不等关闭握手，上游立即停止识别计费。
+        """
         if self.ws:
-            print("🧹 [ASR] closing session")
+            print("🧹 [ASR] closing session" + (" (abort)" if abort else ""))
             try:
-                await self.ws.close()
+                transport = getattr(self.ws, "transport", None)
+                if abort and transport is not None:
+                    transport.abort()
+                else:
+                    await self.ws.close()
             finally:
                 self.ws = None
                 self.connected = False
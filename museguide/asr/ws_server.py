@@ -15,11 +15,16 @@ def pcm_energy(b: bytes) -> int:
     return max(abs(x) for x in ints) if n else 0
 
 
-async def handler(ws):
+async def handler(ws) -> str:
+    """
+    一句话的识别。返回浏览器 STOP 后下发的 final 文本（连接中途断开返回空串），
+    网关据此在进程内接着跑整轮。
+    """
     print("✅ browser connected")
     asr = BigModelASR()
     final_text = ""
     last_sent = ""
+    stopped = False
 
     try:
         async for msg in ws:
@@ -40,6 +45,7 @@ async def handler(ws):
                 await ws.send(
                     json.dumps({"type": "final", "text": final_text}, ensure_ascii=False)
                 )
+                stopped = True
                 break
 
             # 正常音频
@@ -59,9 +65,12 @@ async def handler(ws):
         print("⚠️ [WS] browser connection closed:", e)
 
     finally:
-        await asr.close()
+        # 浏览器中途断开 / 任务被取消：上游不再有用，立即断开
+        await asr.close(abort=not stopped)
         print("🧹 ASR session closed")
 
+    return final_text if stopped else ""
+
 
 async def main():
     print("🚀 ASR WS server on :9001")
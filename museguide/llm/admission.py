@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List
+
+from museguide.llm.backend import LLMCancelled
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SPECULATIVE = 1
+PRIORITY_BATCH = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_SPECULATIVE: "speculative",
+    PRIORITY_BATCH: "batch",
+}
+
+# 等待期间轮询调用方取消令牌的间隔（秒）
+_CANCEL_POLL = 0.05
+
+
+class AdmissionRejected(RuntimeError):
+    """Queue wait exceeded the caller's budget; the call never reached the provider."""
+
+    def __init__(self, priority: int, waited: float):
+        super().__init__(f"{PRIORITY_NAMES.get(priority, priority)} call shed after {waited:.2f}s in queue")
+        self.priority = priority
+        self.waited = waited
+
+
+@dataclass(eq=False)
+class _Waiter:
+    priority: int
+    seq: int
+    kiosk: str
+    granted: threading.Event = field(default_factory=threading.Event)
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """
+    Bounds the LLM generations in flight, globally and per kiosk (session),
+    and hands free slots out by priority: interactive turns, then speculative
+    prefetch, then batch jobs (narration pre-generation); FIFO within a
+    priority. A waiter whose kiosk is at its limit is skipped, not blocking
+    the others. A caller that waits longer than its budget gets
+    AdmissionRejected and answers from a template instead; `budget=None`
+    waits as long as it takes. Calls without a kiosk (batch scripts) only
+    count toward the global limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int = 8,
+        per_kiosk: int = 2,
+        window: int = 200,
+    ):
+        if max_concurrent < 1 or per_kiosk < 1:
+            raise ValueError("admission limits must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.per_kiosk = per_kiosk
+        self._active = 0
+        self._active_by_kiosk: Dict[str, int] = {}
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._waits = {priority: deque(maxlen=window) for priority in PRIORITY_NAMES}
+        self._admitted = {priority: 0 for priority in PRIORITY_NAMES}
+        self._shed = {priority: 0 for priority in PRIORITY_NAMES}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(
+        self,
+        priority: int,
+        kiosk: str = "",
+        *,
+        budget: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> Iterator[float]:
+        """Hold one generation slot for the body; yields the seconds spent queued."""
+        waited = self.acquire(priority, kiosk, budget=budget, cancel=cancel)
+        try:
+            yield waited
+        finally:
+            self.release(kiosk)
+
+    def acquire(
+        self,
+        priority: int,
+        kiosk: str = "",
+        *,
+        budget: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> float:
+        started = time.monotonic()
+        waiter = _Waiter(priority, next(self._seq), kiosk)
+        with self._lock:
+            bisect.insort(self._waiting, waiter)
+            self._dispatch_locked()
+        expires = started + budget if budget is not None else None
+        while True:
+            timeout = _CANCEL_POLL if cancel is not None else None
+            if expires is not None:
+                remaining = max(0.0, expires - time.monotonic())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            if waiter.granted.wait(timeout):
+                break
+            cancelled = cancel is not None and cancel.is_set()
+            if not cancelled and (expires is None or time.monotonic() < expires):
+                continue
+            with self._lock:
+                if waiter.granted.is_set():
+                    # 超时与放行同时发生：按已放行处理
+                    break
+                self._waiting.remove(waiter)
+                waited = time.monotonic() - started
+                if cancelled:
+                    raise LLMCancelled("LLM call cancelled while queued for admission")
+                self._shed[priority] += 1
+                self._waits[priority].append(waited)
+            raise AdmissionRejected(priority, waited)
+        waited = time.monotonic() - started
+        with self._lock:
+            self._admitted[priority] += 1
+            self._waits[priority].append(waited)
+        return waited
+
+    def release(self, kiosk: str = "") -> None:
+        with self._lock:
+            self._active -= 1
+            if kiosk:
+                count = self._active_by_kiosk.get(kiosk, 0) - 1
+                if count > 0:
+                    self._active_by_kiosk[kiosk] = count
+                else:
+                    self._active_by_kiosk.pop(kiosk, None)
+            self._dispatch_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for waiter in self._waiting:
+                queued[PRIORITY_NAMES[waiter.priority]] += 1
+            return {
+                "active": self._active,
+                "max_concurrent": self.max_concurrent,
+                "per_kiosk": self.per_kiosk,
+                "queued": queued,
+                "priorities": {
+                    name: {
+                        "admitted": self._admitted[priority],
+                        "shed": self._shed[priority],
+                        **_wait_quantiles(self._waits[priority]),
+                    }
+                    for priority, name in PRIORITY_NAMES.items()
+                },
+            }
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _dispatch_locked(self) -> None:
+        """Grant free slots to waiters in priority order, skipping kiosks at their limit."""
+        index = 0
+        while self._active < self.max_concurrent and index < len(self._waiting):
+            waiter = self._waiting[index]
+            if waiter.kiosk and self._active_by_kiosk.get(waiter.kiosk, 0) >= self.per_kiosk:
+                index += 1
+                continue
+            del self._waiting[index]
+            self._active += 1
+            if waiter.kiosk:
+                self._active_by_kiosk[waiter.kiosk] = self._active_by_kiosk.get(waiter.kiosk, 0) + 1
+            waiter.granted.set()
+
+
+def _wait_quantiles(samples: deque) -> Dict[str, float]:
+    """Recent queue wait in ms (p50 / p90 / max over the sliding window)."""
+    if not samples:
+        return {"wait_p50_ms": 0.0, "wait_p90_ms": 0.0, "wait_max_ms": 0.0}
+    ordered = sorted(samples)
+    return {
+        "wait_p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "wait_p90_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000, 1),
+        "wait_max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def build_admission_controller(llm_cfg: Dict[str, Any]) -> AdmissionController:
+    cfg = llm_cfg.get("admission", {}) or {}
+    return AdmissionController(
+        max_concurrent=int(cfg.get("max_concurrent", 8)),
+        per_kiosk=int(cfg.get("per_kiosk", 2)),
+    )
@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class LLMBackendError(RuntimeError):
+    """Every provider / attempt failed; `errors` keeps (provider, error) pairs."""
+
+    def __init__(self, message: str, errors: List[Tuple[str, BaseException]] | None = None):
+        super().__init__(message)
+        self.errors = list(errors or [])
+        last = self.errors[-1][1] if self.errors else None
+        # surface the provider status (e.g. 400 for an unsupported text.format)
+        self.status_code = getattr(last, "status_code", None)
+
+
+class LLMDeadlineExceeded(LLMBackendError):
+    pass
+
+
+class LLMCancelled(RuntimeError):
+    """The caller withdrew the call (superseded turn, client gone); not a provider failure."""
+
+
+class ProviderHTTPError(RuntimeError):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+
+
+# =============================
+# Providers
+# =============================
+
+class ArkProvider:
+    """
+    Volcengine Ark Responses API. The request's model (the per-stage profile)
+    wins; the provider's `model` only fills in when the request has none.
+    """
+
+    def __init__(self, name: str, *, base_url: str, api_key: str, model: str = ""):
+        from volcenginesdkarkruntime import Ark
+
+        self.name = name
+        self.model = model
+        self.client = Ark(base_url=base_url, api_key=api_key)
+
+    def stream(self, request: Dict[str, Any], *, stream: bool, timeout: float, cancel: threading.Event) -> Iterator[str]:
+        payload = {**request, "timeout": timeout}
+        if self.model and not payload.get("model"):
+            payload["model"] = self.model
+        if not stream:
+            yield _extract_ark_text(self.client.responses.create(**payload))
+            return
+        events = self.client.responses.create(**payload, stream=True)
+        try:
+            for event in events:
+                if cancel.is_set():
+                    return
+                if getattr(event, "type", "") == "response.output_text.delta":
+                    yield getattr(event, "delta", "") or ""
+        finally:
+            close = getattr(events, "close", None)
+            if callable(close):
+                close()
+
+
+class OpenAICompatibleProvider:
+    """
+    Any OpenAI-compatible /chat/completions endpoint (vLLM, llama.cpp server,
+    Ollama, ...). Doubles as the local stand-in for tests. As with Ark, the
+    provider's `model` is only a fallback for requests without one.
+    """
+
+    def __init__(self, name: str, *, base_url: str, api_key: str = "", model: str = ""):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+
+    def stream(self, request: Dict[str, Any], *, stream: bool, timeout: float, cancel: threading.Event) -> Iterator[str]:
+        body = json.dumps(self._to_chat_request(request, stream), ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        req = urllib.request.Request(f"{self.base_url}/chat/completions", data=body, headers=headers)
+        try:
+            resp = urllib.request.urlopen(req, timeout=timeout)
+        except urllib.error.HTTPError as error:
+            raise ProviderHTTPError(error.code, error.read().decode("utf-8", "ignore")[:300]) from error
+        with resp:
+            if not stream:
+                data = json.loads(resp.read().decode("utf-8"))
+                yield str(data["choices"][0]["message"].get("content") or "").strip()
+                return
+            for raw_line in resp:
+                if cancel.is_set():
+                    return
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    return
+                choices = json.loads(payload).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    def _to_chat_request(self, request: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        chat: Dict[str, Any] = {
+            "model": request.get("model") or self.model,
+            "messages": request.get("input", []),
+            "max_tokens": request.get("max_output_tokens"),
+            "temperature": request.get("temperature"),
+            "stream": stream,
+        }
+        text_format = (request.get("text") or {}).get("format") or {}
+        if text_format.get("type") == "json_schema":
+            chat["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": text_format.get("name", "response"),
+                    "schema": text_format.get("schema", {}),
+                    "strict": bool(text_format.get("strict", True)),
+                },
+            }
+        elif text_format.get("type") == "json_object":
+            chat["response_format"] = {"type": "json_object"}
+        return {key: value for key, value in chat.items() if value is not None}
+
+
+PROVIDER_TYPES = {
+    "ark": ArkProvider,
+    "openai": OpenAICompatibleProvider,
+}
+
+
+# =============================
+# Backend
+# =============================
+
+class RetryBudget:
+    """
+    Retries and hedges draw from a token bucket refilled by a fraction of each
+    request, so extra load during an incident stays a bounded ratio of traffic.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0, max_tokens: float = 10.0):
+        self._ratio = ratio
+        self._max = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._max, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+@dataclass
+class _Attempt:
+    provider: Any
+    events: "queue.Queue[Tuple[_Attempt, str, Any]]"
+    cancel: threading.Event = field(default_factory=threading.Event)
+    started: float = field(default_factory=time.monotonic)
+
+
+_DELTA = "delta"
+_DONE = "done"
+_ERROR = "error"
+# 调用方取消令牌的轮询间隔（秒）
+_CANCEL_POLL = 0.05
+
+
+class LLMBackend:
+    """
+    Deadline-aware LLM calls over a prioritized provider list.
+
+    Each call gets a deadline. If the first attempt has produced nothing after
+    the provider's recent p90 latency (time to first token when streaming),
+    one duplicate request is fired; the first attempt to produce output wins
+    and the other is cancelled. Failed providers fall through to the next one.
+    Hedges and failovers draw from a shared RetryBudget. A caller-side
+    `cancel` event aborts every attempt and raises LLMCancelled.
+    """
+
+    def __init__(
+        self,
+        providers: List[Any],
+        *,
+        deadline: float = 10.0,
+        hedge: bool = True,
+        hedge_delay: float = 2.0,
+        hedge_quantile: float = 0.9,
+        min_samples: int = 20,
+        retry_budget: RetryBudget | None = None,
+        debug: bool = False,
+    ):
+        if not providers:
+            raise ValueError("LLMBackend needs at least one provider")
+        self.providers = list(providers)
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.retry_budget = retry_budget or RetryBudget()
+        self.debug = debug
+        self._latencies: Dict[Tuple[str, bool], deque] = {}
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def complete(self, request: Dict[str, Any], *, deadline: float | None = None) -> str:
+        return "".join(self.stream(request, deadline=deadline, stream=False)).strip()
+
+    def stream(
+        self,
+        request: Dict[str, Any],
+        *,
+        deadline: float | None = None,
+        stream: bool = True,
+        cancel: threading.Event | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield text deltas (a single chunk when stream=False). Closing the
+        generator or setting `cancel` cancels the attempts in flight.
+        """
+        expires = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        self.retry_budget.deposit()
+        errors: List[Tuple[str, BaseException]] = []
+        for index, provider in enumerate(self.providers):
+            if time.monotonic() >= expires:
+                break
+            if index > 0 and not self.retry_budget.withdraw():
+                break
+            winner, first = self._race(provider, request, stream, expires, errors, cancel)
+            if winner is None:
+                continue
+            yield from self._drain(winner, first, expires, cancel)
+            return
+        if time.monotonic() >= expires:
+            raise LLMDeadlineExceeded("LLM deadline exceeded", errors)
+        raise LLMBackendError("all LLM providers failed", errors)
+
+    def p90(self, provider_name: str, stream: bool) -> float | None:
+        with self._lock:
+            samples = sorted(self._latencies.get((provider_name, stream), ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_quantile))]
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _race(
+        self,
+        provider: Any,
+        request: Dict[str, Any],
+        stream: bool,
+        expires: float,
+        errors: List[Tuple[str, BaseException]],
+        cancel: threading.Event | None = None,
+    ) -> Tuple[_Attempt | None, str]:
+        """Run one attempt (plus at most one hedge) until one produces output."""
+        events: "queue.Queue[Tuple[_Attempt, str, Any]]" = queue.Queue()
+        attempts = [self._start(provider, request, stream, expires, events)]
+        hedge_at = attempts[0].started + (self.p90(provider.name, stream) or self.hedge_delay)
+        failed = 0
+        while failed < len(attempts):
+            if cancel is not None and cancel.is_set():
+                for attempt in attempts:
+                    attempt.cancel.set()
+                raise LLMCancelled(f"LLM call cancelled by caller ({provider.name})")
+            now = time.monotonic()
+            if now >= expires:
+                break
+            can_hedge = self.hedge and len(attempts) == 1
+            wait = min(expires, hedge_at) - now if can_hedge else expires - now
+            if cancel is not None:
+                wait = min(wait, _CANCEL_POLL)
+            try:
+                attempt, kind, payload = events.get(timeout=max(0.0, wait))
+            except queue.Empty:
+                if can_hedge and time.monotonic() >= hedge_at and self.retry_budget.withdraw():
+                    if self.debug:
+                        print(f"=== LLM HEDGE === {provider.name}: no output after {hedge_at - attempts[0].started:.2f}s")
+                    attempts.append(self._start(provider, request, stream, expires, events))
+                elif can_hedge:
+                    hedge_at = expires
+                continue
+            if kind == _ERROR:
+                failed += 1
+                errors.append((provider.name, payload))
+                if self.debug:
+                    print(f"=== LLM ATTEMPT FAILED === {provider.name}: {payload}")
+                continue
+            self._record(provider.name, stream, time.monotonic() - attempt.started)
+            for other in attempts:
+                if other is not attempt:
+                    other.cancel.set()
+            if kind == _DONE:
+                # 空输出：把结束事件放回队列，_drain 读到即结束，不再等到截止时间
+                events.put((attempt, _DONE, None))
+            return attempt, (payload if kind == _DELTA else "")
+        for attempt in attempts:
+            attempt.cancel.set()
+        if time.monotonic() >= expires:
+            errors.append((provider.name, TimeoutError("deadline exceeded")))
+        return None, ""
+
+    def _drain(
+        self,
+        attempt: _Attempt,
+        first: str,
+        expires: float,
+        cancel: threading.Event | None = None,
+    ) -> Iterator[str]:
+        try:
+            if first:
+                yield first
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise LLMCancelled(f"LLM call cancelled by caller mid-stream ({attempt.provider.name})")
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise LLMDeadlineExceeded(f"LLM deadline exceeded mid-stream ({attempt.provider.name})")
+                try:
+                    owner, kind, payload = attempt.events.get(
+                        timeout=min(remaining, _CANCEL_POLL) if cancel is not None else remaining
+                    )
+                except queue.Empty:
+                    continue
+                if owner is not attempt:
+                    continue
+                if kind == _DONE:
+                    return
+                if kind == _ERROR:
+                    raise LLMBackendError(
+                        f"LLM stream failed mid-way ({attempt.provider.name})",
+                        [(attempt.provider.name, payload)],
+                    )
+                yield payload
+        finally:
+            attempt.cancel.set()
+
+    def _start(
+        self,
+        provider: Any,
+        request: Dict[str, Any],
+        stream: bool,
+        expires: float,
+        events: "queue.Queue[Tuple[_Attempt, str, Any]]",
+    ) -> _Attempt:
+        attempt = _Attempt(provider=provider, events=events)
+
+        def run() -> None:
+            try:
+                timeout = max(0.1, expires - time.monotonic())
+                for delta in provider.stream(request, stream=stream, timeout=timeout, cancel=attempt.cancel):
+                    if attempt.cancel.is_set():
+                        return
+                    events.put((attempt, _DELTA, delta))
+                events.put((attempt, _DONE, None))
+            except Exception as error:
+                events.put((attempt, _ERROR, error))
+
+        threading.Thread(target=run, name=f"llm-{provider.name}", daemon=True).start()
+        return attempt
+
+    def _record(self, provider_name: str, stream: bool, latency: float) -> None:
+        with self._lock:
+            window = self._latencies.setdefault((provider_name, stream), deque(maxlen=200))
+            window.append(latency)
+
+
+def build_llm_backend(llm_cfg: Dict[str, Any], secrets: Dict[str, Any]) -> LLMBackend:
+    """
+    Providers come from llm.yaml `providers` (in priority order); without it
+    the single Ark endpoint from `base_url` is used.
+    """
+    provider_cfgs = llm_cfg.get("providers") or [{
+        "name": "ark",
+        "type": "ark",
+        "base_url": llm_cfg["base_url"],
+        "secret": "doubao",
+    }]
+    providers = []
+    for cfg in provider_cfgs:
+        provider_type = str(cfg.get("type", "ark"))
+        if provider_type not in PROVIDER_TYPES:
+            raise ValueError(f"Unknown LLM provider type: {provider_type}")
+        api_key = cfg.get("api_key") or (secrets.get(cfg.get("secret", ""), {}) or {}).get("api_key", "")
+        providers.append(PROVIDER_TYPES[provider_type](
+            str(cfg.get("name", provider_type)),
+            base_url=str(cfg["base_url"]),
+            api_key=api_key,
+            model=str(cfg.get("model", "")),
+        ))
+    return LLMBackend(
+        providers,
+        deadline=float(llm_cfg.get("deadline", llm_cfg.get("timeout", 10))),
+        hedge=bool(llm_cfg.get("hedge", True)),
+        hedge_delay=float(llm_cfg.get("hedge_delay", 2.0)),
+        retry_budget=RetryBudget(ratio=float(llm_cfg.get("retry_budget", 0.2))),
+        debug=bool(llm_cfg.get("debug", False)),
+    )
+
+
+def _extract_ark_text(resp) -> str:
+    for item in resp.output:
+        if item.type == "message":
+            for c in item.content:
+                if c.type == "output_text":
+                    return c.text.strip()
+    return ""
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from museguide.llm.domain_retrieval import DomainPriorIndex
+from museguide.llm.guide_stage import (
+    GUIDE_STAGE_ORDER,
+    STAGE_EXHIBIT_DETAIL,
+    STAGE_EXHIBIT_OVERVIEW,
+    STAGE_ROUTE_GUIDANCE,
+    STAGE_ZONE_OVERVIEW,
+)
+from museguide.llm.tour_state_manager import normalize_text
+
+INTENT_CONFIRM = "确认"
+PROFILE_DEFAULT = "default"
+
+_ROUTE_KEYWORDS = ("在哪", "怎么走", "怎么去", "带我去", "带路", "前往", "where", "how do i get", "take me to")
+_CONFIRM_TEXTS = {
+    "好", "好的", "好啊", "嗯", "嗯嗯", "行", "可以", "知道了", "明白了", "谢谢", "谢谢你", "收到",
+    "ok", "okay", "yes", "sure", "thanks", "thankyou", "gotit",
+}
+
+# 回复 JSON 的固定开销（tts_text / guide_zone / guide_stage / user_intent 等键与枚举值，约 110 估算 token）
+# 加上最短一句播报的余量；任何阶段的 max_output_tokens 都不低于它，否则对象会在中途截断
+JSON_ENVELOPE_TOKENS = 110
+MIN_REPLY_TOKENS = 90
+MIN_OUTPUT_TOKENS = JSON_ENVELOPE_TOKENS + MIN_REPLY_TOKENS
+
+# 各阶段缺省生成配置；llm.yaml `stage_profiles` 按键覆盖
+_DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    INTENT_CONFIRM: {
+        # 确认的多是“带我去 X 展区”一类推荐动作，仍需展区先验
+        "max_output_tokens": MIN_OUTPUT_TOKENS, "recent_turns": 1, "domain_prior": True, "knowledge": False,
+    },
+    STAGE_ROUTE_GUIDANCE: {"max_output_tokens": 240, "recent_turns": 1, "domain_prior": True, "knowledge": False},
+    STAGE_ZONE_OVERVIEW: {"recent_turns": 3, "domain_prior": True, "knowledge": False},
+    STAGE_EXHIBIT_OVERVIEW: {"recent_turns": 3, "domain_prior": True, "knowledge": False},
+    STAGE_EXHIBIT_DETAIL: {"recent_turns": 3, "domain_prior": True, "knowledge": True},
+}
+
+
+@dataclass(frozen=True)
+class TurnRoute:
+    """First-pass prediction for a turn; the LLM still decides the final fields."""
+
+    guide_stage: str
+    user_intent: str
+    target: str = ""
+    target_kind: str = ""
+
+    @property
+    def profile(self) -> str:
+        if self.user_intent == INTENT_CONFIRM:
+            return INTENT_CONFIRM
+        return self.guide_stage or PROFILE_DEFAULT
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    name: str
+    model: str
+    max_output_tokens: int
+    temperature: float
+    # prompt slice
+    recent_turns: int
+    domain_prior: bool
+    knowledge: bool
+
+
+def classify_turn(
+    user_text: str,
+    prior_state: Dict[str, Any],
+    index: DomainPriorIndex,
+    is_detail_request: Callable[[str], bool],
+) -> TurnRoute:
+    """
+    Cheap local first pass (keywords + domain name matching, no model call)
+    predicting the stage, intent and target of a turn. Only used to pick the
+    generation profile, so a miss costs prompt/token budget, not correctness.
+    `user_text` is the visitor's raw utterance, not the resolved affirmation.
+    """
+    text = str(user_text or "").strip()
+    normalized = normalize_text(text)
+    if normalized in _CONFIRM_TEXTS:
+        return TurnRoute(str(prior_state.get("guide_stage", "")), INTENT_CONFIRM)
+
+    mentioned = index.mentioned(text)
+    exhibit_name = next((doc.name for doc in mentioned if doc.kind == "exhibit"), "")
+    zone_name = next((doc.name for doc in mentioned if doc.kind == "zone"), "")
+    current_zone = str(prior_state.get("current_zone", "")).strip()
+    current_exhibit = str(prior_state.get("current_exhibit", "")).strip()
+
+    lowered = text.lower()
+    if any(keyword in lowered for keyword in _ROUTE_KEYWORDS):
+        target_zone = zone_name or index.zone_of_exhibit.get(exhibit_name, "")
+        if target_zone and target_zone != current_zone:
+            return TurnRoute(STAGE_ROUTE_GUIDANCE, "询问路线", target_zone, "zone")
+
+    focus = exhibit_name or current_exhibit
+    if focus and is_detail_request(text):
+        return TurnRoute(STAGE_EXHIBIT_DETAIL, "深入了解", focus, "exhibit")
+    if exhibit_name:
+        return TurnRoute(STAGE_EXHIBIT_OVERVIEW, "了解展品", exhibit_name, "exhibit")
+    if zone_name:
+        return TurnRoute(STAGE_ZONE_OVERVIEW, "了解展厅", zone_name, "zone")
+    return TurnRoute("", "了解信息")
+
+
+def build_generation_profiles(llm_cfg: Dict[str, Any]) -> Dict[str, GenerationProfile]:
+    """
+    One profile per stage (plus 确认 and default). Unset keys fall back to
+    the built-in stage defaults, then to the top-level llm.yaml values.
+    Output budgets below MIN_OUTPUT_TOKENS are raised to it at load time.
+    """
+    overrides = llm_cfg.get("stage_profiles", {}) or {}
+    base = {
+        "model": str(llm_cfg["model"]),
+        "max_output_tokens": int(llm_cfg.get("max_output_tokens", 300)),
+        "temperature": float(llm_cfg.get("temperature", 0.2)),
+        "recent_turns": 3,
+        "domain_prior": True,
+        "knowledge": True,
+    }
+    profiles: Dict[str, GenerationProfile] = {}
+    for name in [PROFILE_DEFAULT, INTENT_CONFIRM, *GUIDE_STAGE_ORDER]:
+        values = {**base, **_DEFAULT_PROFILES.get(name, {}), **(overrides.get(name, {}) or {})}
+        if int(values["max_output_tokens"]) < MIN_OUTPUT_TOKENS:
+            print(
+                f"=== STAGE PROFILE {name}: max_output_tokens={values['max_output_tokens']} "
+                f"cannot fit the JSON reply, raised to {MIN_OUTPUT_TOKENS} ==="
+            )
+            values["max_output_tokens"] = MIN_OUTPUT_TOKENS
+        profiles[name] = GenerationProfile(
+            name=name,
+            model=str(values["model"]),
+            max_output_tokens=int(values["max_output_tokens"]),
+            temperature=float(values["temperature"]),
+            recent_turns=int(values["recent_turns"]),
+            domain_prior=bool(values["domain_prior"]),
+            knowledge=bool(values["knowledge"]),
+        )
+    return profiles
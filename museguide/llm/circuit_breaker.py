@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Error-rate / latency circuit breaker around the LLM backend.
+
+    Closed: every call goes through and its outcome lands in a sliding window.
+    The breaker opens when, over at least `min_calls` outcomes, the failure
+    rate or the slow-call rate crosses its threshold. Open: callers are turned
+    away (they answer from the degraded engine) for `open_seconds`, after
+    which a single background probe runs in half-open state; success closes
+    the breaker, failure re-opens it. Live traffic never doubles as the probe.
+    """
+
+    def __init__(
+        self,
+        *,
+        probe: Callable[[], Any] | None = None,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 6.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 15.0,
+    ):
+        self._probe = probe
+        self._outcomes: deque = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_seconds = slow_call_seconds
+        self._slow_call_rate = slow_call_rate
+        self._open_seconds = open_seconds
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+                self._state = HALF_OPEN
+                self._start_probe()
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                return
+            self._outcomes.append((True, latency >= self._slow_call_seconds))
+            self._maybe_open()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                return
+            self._outcomes.append((False, False))
+            self._maybe_open()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = len(self._outcomes)
+            return {
+                "state": self._state,
+                "calls": total,
+                "failure_rate": round(sum(1 for ok, _ in self._outcomes if not ok) / total, 3) if total else 0.0,
+                "slow_rate": round(sum(1 for _, slow in self._outcomes if slow) / total, 3) if total else 0.0,
+                "opens": self.opens,
+                "rejected": self.rejected,
+            }
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _maybe_open(self) -> None:
+        total = len(self._outcomes)
+        if total < self._min_calls:
+            return
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        if failures / total >= self._failure_rate or slow / total >= self._slow_call_rate:
+            self._open("failure rate %.2f, slow rate %.2f" % (failures / total, slow / total))
+
+    def _open(self, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opens += 1
+        print(f"=== CIRCUIT OPEN === {reason}")
+
+    def _start_probe(self) -> None:
+        if self._probe is None:
+            # nothing to probe with: let live traffic back in
+            self._state = CLOSED
+            return
+        threading.Thread(target=self._run_probe, name="llm-breaker-probe", daemon=True).start()
+
+    def _run_probe(self) -> None:
+        started = time.monotonic()
+        try:
+            self._probe()
+        except Exception as error:
+            with self._lock:
+                self._open(f"half-open probe failed: {error}")
+            return
+        latency = time.monotonic() - started
+        with self._lock:
+            if latency >= self._slow_call_seconds:
+                self._open(f"half-open probe slow: {latency:.2f}s")
+                return
+            self._state = CLOSED
+        print(f"=== CIRCUIT CLOSED === probe ok in {latency:.2f}s")
+
+
+def build_circuit_breaker(llm_cfg: Dict[str, Any], probe: Callable[[], Any] | None) -> CircuitBreaker:
+    cfg = llm_cfg.get("circuit_breaker", {}) or {}
+    return CircuitBreaker(
+        probe=probe,
+        window=int(cfg.get("window", 20)),
+        min_calls=int(cfg.get("min_calls", 5)),
+        failure_rate=float(cfg.get("failure_rate", 0.5)),
+        slow_call_seconds=float(cfg.get("slow_call_seconds", 6.0)),
+        slow_call_rate=float(cfg.get("slow_call_rate", 0.8)),
+        open_seconds=float(cfg.get("open_seconds", 15.0)),
+    )
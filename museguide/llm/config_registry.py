@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping
+
+import yaml
+
+from museguide.llm.config_watcher import ConfigWatcher
+from museguide.llm.domain_retrieval import DomainPriorIndex
+from museguide.llm.progress import ProgressIndex
+from museguide.llm.recommender import ExhibitRecommender
+from museguide.llm.prompt_builder import build_base_system_prompt, build_base_system_prompt_en
+from museguide.llm.response_schema import build_guide_response_schema
+from museguide.llm.venue_graph import VenueGraph
+
+CONFIG_DIR = Path(__file__).parents[1] / "configs"
+DOMAIN_PRIOR_PATH = CONFIG_DIR / "domain_prior.json"
+PERSONAS_PATH = CONFIG_DIR / "personas.yaml"
+GUIDE_STATES_PATH = CONFIG_DIR / "guide_states.yaml"
+VENUE_GRAPH_PATH = CONFIG_DIR / "venue_graph.yaml"
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    One consistent, versioned view of the curated configs plus everything
+    derived from them. Never mutated; a reload builds a new snapshot.
+    """
+
+    version: int
+    domain_cfg: Dict[str, Any]
+    personas: Dict[str, Any]
+    guide_states: Dict[str, Any]
+    base_system_prompt: str
+    base_system_prompt_en: str
+    scoped_base_system_prompt: str
+    scoped_base_system_prompt_en: str
+    domain_index: DomainPriorIndex
+    progress_index: ProgressIndex
+    venue_graph: VenueGraph
+    recommender: ExhibitRecommender
+    response_schema: Dict[str, Any]
+    response_schema_en: Dict[str, Any]
+    zone_by_name: Mapping[str, Dict[str, Any]]
+    zone_by_id: Mapping[str, Dict[str, Any]]
+    exhibit_by_name: Mapping[str, Dict[str, Any]]
+    domain_json: bytes
+    domain_etag: str
+    personas_json: bytes
+    personas_etag: str
+
+
+def build_config_snapshot(
+    version: int,
+    domain_cfg: Dict[str, Any],
+    personas: Dict[str, Any],
+    guide_states: Dict[str, Any],
+    venue_cfg: Dict[str, Any] | None = None,
+) -> ConfigSnapshot:
+    zones = domain_cfg.get("zones", []) or []
+    zone_by_name = {str(zone.get("name", "")).strip(): zone for zone in zones}
+    zone_by_id = {str(zone.get("id", "")).strip(): zone for zone in zones}
+    exhibit_by_name = {
+        str(exhibit.get("name", "")).strip(): exhibit
+        for zone in zones
+        for exhibit in zone.get("exhibits", []) or []
+    }
+    progress_index = ProgressIndex(domain_cfg)
+    domain_json = json.dumps(domain_cfg, ensure_ascii=False).encode("utf-8")
+    personas_json = json.dumps(personas, ensure_ascii=False).encode("utf-8")
+    return ConfigSnapshot(
+        version=version,
+        domain_cfg=domain_cfg,
+        personas=personas,
+        guide_states=guide_states,
+        base_system_prompt=build_base_system_prompt(domain_cfg, guide_states),
+        base_system_prompt_en=build_base_system_prompt_en(domain_cfg, guide_states),
+        scoped_base_system_prompt=build_base_system_prompt(domain_cfg, guide_states, include_domain_prior=False),
+        scoped_base_system_prompt_en=build_base_system_prompt_en(domain_cfg, guide_states, include_domain_prior=False),
+        domain_index=DomainPriorIndex(domain_cfg),
+        progress_index=progress_index,
+        venue_graph=VenueGraph(domain_cfg, venue_cfg),
+        recommender=ExhibitRecommender(domain_cfg, progress_index),
+        response_schema=build_guide_response_schema(domain_cfg, guide_states),
+        response_schema_en=build_guide_response_schema(domain_cfg, guide_states, english_only=True),
+        zone_by_name=MappingProxyType(zone_by_name),
+        zone_by_id=MappingProxyType(zone_by_id),
+        exhibit_by_name=MappingProxyType(exhibit_by_name),
+        domain_json=domain_json,
+        domain_etag=_etag(domain_json),
+        personas_json=personas_json,
+        personas_etag=_etag(personas_json),
+    )
+
+
+class ConfigRegistry:
+    """
+    Loads domain_prior.json / personas.yaml / guide_states.yaml (and the
+    optional venue_graph.yaml) once into an in-memory ConfigSnapshot and
+    hot-swaps it atomically when a file changes.
+
+    Changes are picked up by polling file mtimes: lazily on `snapshot()`
+    (throttled by the watcher interval), or eagerly from a background thread
+    after `start_watching()`. A reload that fails to parse keeps the previous
+    snapshot, so a half-saved file never takes the API down.
+    """
+
+    def __init__(self, config_dir: Path = CONFIG_DIR, poll_interval: float = 2.0):
+        config_dir = Path(config_dir)
+        self._domain_path = config_dir / DOMAIN_PRIOR_PATH.name
+        self._personas_path = config_dir / PERSONAS_PATH.name
+        self._guide_states_path = config_dir / GUIDE_STATES_PATH.name
+        self._venue_graph_path = config_dir / VENUE_GRAPH_PATH.name
+        self._poll_interval = poll_interval
+        self._watcher = ConfigWatcher(
+            [self._domain_path, self._personas_path, self._guide_states_path, self._venue_graph_path],
+            interval=poll_interval,
+        )
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[ConfigSnapshot], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._snapshot = self._load(version=1)
+
+    def snapshot(self) -> ConfigSnapshot:
+        if self._thread is None and self._watcher.changed():
+            self.reload()
+        return self._snapshot
+
+    def subscribe(self, listener: Callable[[ConfigSnapshot], None]) -> None:
+        """Register a callback invoked with every newly swapped-in snapshot."""
+        self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        with self._reload_lock:
+            try:
+                snapshot = self._load(version=self._snapshot.version + 1)
+            except Exception as error:
+                print(f"=== CONFIG RELOAD FAILED, keeping v{self._snapshot.version}: {error} ===")
+                return False
+            self._snapshot = snapshot
+        print(f"=== CONFIG RELOADED: v{snapshot.version} ===")
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as error:
+                print(f"=== CONFIG LISTENER FAILED: {error} ===")
+        return True
+
+    def start_watching(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="config-registry", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self._poll_interval + 1)
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self._poll_interval):
+            if self._watcher.changed():
+                self.reload()
+
+    def _load(self, version: int) -> ConfigSnapshot:
+        with open(self._domain_path, "r", encoding="utf-8") as f:
+            domain_cfg = json.load(f)
+        with open(self._personas_path, "r", encoding="utf-8") as f:
+            personas = (yaml.safe_load(f) or {}).get("personas", {}) or {}
+        with open(self._guide_states_path, "r", encoding="utf-8") as f:
+            guide_states = yaml.safe_load(f) or {}
+        venue_cfg: Dict[str, Any] = {}
+        if self._venue_graph_path.exists():
+            with open(self._venue_graph_path, "r", encoding="utf-8") as f:
+                venue_cfg = (yaml.safe_load(f) or {}).get("venue_graph", {}) or {}
+        return build_config_snapshot(version, domain_cfg, personas, guide_states, venue_cfg)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable
+
+
+class ConfigWatcher:
+    """
+    mtime-based change detection for config files.
+    Files are stat'ed at most once per `interval` seconds, so calling
+    `changed()` on every turn costs nothing measurable.
+    """
+
+    def __init__(self, paths: Iterable[Path], interval: float = 2.0):
+        self._paths = [Path(path) for path in paths]
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._mtimes: Dict[Path, float] = self._stat_all()
+
+    def _stat_all(self) -> Dict[Path, float]:
+        mtimes: Dict[Path, float] = {}
+        for path in self._paths:
+            try:
+                mtimes[path] = path.stat().st_mtime
+            except OSError:
+                mtimes[path] = 0.0
+        return mtimes
+
+    def changed(self) -> bool:
+        """True once after any watched file was modified, created or removed."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self._interval:
+                return False
+            self._checked_at = now
+            mtimes = self._stat_all()
+            if mtimes == self._mtimes:
+                return False
+            self._mtimes = mtimes
+            return True
@@ -1,35 +1,73 @@
+import re
 import threading
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List
 
+from museguide.llm.occupancy import OccupancyIndex
+from museguide.llm.progress import ProgressIndex, TourProgress
+
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;])|(?<=\. )")
+
 
 class ContextStore:
     """
     In-memory session store keyed by (session_id, persona_id).
     Keeps a compact tour state plus a short rolling dialogue history.
+
+    Once more than `max_turns` raw turns pile up, the oldest `compact_every`
+    are folded into `tour_memory`: one extractive line per turn (topic, the
+    question, the first sentence of the answer), kept under
+    `memory_max_chars` by shortening and then dropping the oldest lines. The
+    prompt cost of the dialogue history therefore stays bounded however long
+    the tour runs; visited zones / progress / interests already carry the
+    structured long-range facts.
+
+    Progress (zone / exhibit status and visited sets) is a TourProgress
+    bitset over the current catalogue; `set_progress_index` swaps the
+    catalogue on config reload and sessions are re-bound lazily by name.
+
+    Sessions are kept in last-touched order, so expiry pops from the front
+    instead of scanning; the OccupancyIndex (live head count per zone /
+    exhibit) is moved on every update and released on expiry. Occupancy is
+    keyed by visitor session, not by session + persona: the persona state
+    updated last places the visitor, so a persona switch moves the same
+    head instead of counting a second one.
     """
 
-    def __init__(self, ttl_seconds: int = 1200, max_chars: int = 280, max_turns: int = 6):
+    def __init__(
+        self,
+        ttl_seconds: int = 1200,
+        max_chars: int = 280,
+        max_turns: int = 6,
+        compact_every: int = 3,
+        memory_max_chars: int = 360,
+        progress_index: ProgressIndex | None = None,
+    ):
         self._ttl = ttl_seconds
         self._max_chars = max_chars
         self._max_turns = max_turns
+        self._compact_every = max(1, compact_every)
+        self._memory_max_chars = memory_max_chars
         self._lock = threading.Lock()
         self._data: Dict[str, Dict[str, Any]] = {}
-        self._zone_status_order = {
-            "unseen": 0,
-            "entered": 1,
-            "overview": 2,
-            "detailed": 3,
-        }
-        self._exhibit_status_order = {
-            "unseen": 0,
-            "brief": 1,
-            "detailed": 2,
-        }
+        # 按最近更新时间排序的会话键：过期清理只看队首
+        self._touched: OrderedDict[str, None] = OrderedDict()
+        self._occupancy = OccupancyIndex()
+        # 会话 -> 当前占位的状态键：换角色后由新角色的状态接管，旧状态过期不影响人数
+        self._placed_by: Dict[str, str] = {}
+        self._progress_index = progress_index or ProgressIndex({})
+
+    def set_progress_index(self, index: ProgressIndex) -> None:
+        self._progress_index = index
 
     def _key(self, session_id: str, persona_id: str) -> str:
         return f"{session_id}::{persona_id}"
 
+    @staticmethod
+    def _session_of(key: str) -> str:
+        return key.rsplit("::", 1)[0]
+
     def _trim(self, text: str) -> str:
         if not text:
             return ""
@@ -42,6 +80,8 @@ class ContextStore:
         return {
             "updated_at": time.time(),
             "turns": [],
+            "tour_memory": [],
+            "folded_turns": 0,
             "current_zone": "",
             "current_exhibit": "",
             "current_focus_status": "",
@@ -52,26 +92,106 @@ class ContextStore:
             "pending_action_text": "",
             "pending_action_type": "",
             "pending_action_target": "",
-            "visited_zones": [],
-            "visited_exhibits": [],
-            "zone_progress": {},
-            "exhibit_progress": {},
+            "progress": self._progress_index.empty(),
             "user_interests": [],
             "tour_event": "",
         }
 
     def _get_state_locked(self, key: str) -> Dict[str, Any]:
         now = time.time()
+        self._expire_locked(now)
         state = self._data.get(key)
+        if state and now - float(state.get("updated_at", 0)) > self._ttl:
+            self._leave_locked(key)
+            state = None
         if not state:
             state = self._empty_state()
             self._data[key] = state
+            self._touch_locked(key, state)
             return state
-        if now - float(state.get("updated_at", 0)) > self._ttl:
-            state = self._empty_state()
-            self._data[key] = state
+        state["progress"] = state["progress"].rebind(self._progress_index)
         return state
 
+    def _touch_locked(self, key: str, state: Dict[str, Any]) -> None:
+        state["updated_at"] = time.time()
+        self._touched[key] = None
+        self._touched.move_to_end(key)
+
+    def _expire_locked(self, now: float) -> None:
+        while self._touched:
+            key = next(iter(self._touched))
+            state = self._data.get(key)
+            if state is not None and now - float(state.get("updated_at", 0)) <= self._ttl:
+                break
+            self._touched.popitem(last=False)
+            self._data.pop(key, None)
+            self._leave_locked(key)
+
+    def _place_locked(self, key: str, state: Dict[str, Any]) -> None:
+        """Move the visitor in the occupancy index; names outside the catalogue are not counted."""
+        session_id = self._session_of(key)
+        zone = state.get("current_zone", "")
+        exhibit = state.get("current_exhibit", "")
+        self._placed_by[session_id] = key
+        self._occupancy.move(
+            session_id,
+            zone if zone in self._progress_index.zone_ids else "",
+            exhibit if exhibit in self._progress_index.exhibit_ids else "",
+        )
+
+    def _leave_locked(self, key: str) -> None:
+        """Release the visitor only if this state is the one currently placing them."""
+        session_id = self._session_of(key)
+        if self._placed_by.get(session_id) == key:
+            del self._placed_by[session_id]
+            self._occupancy.leave(session_id)
+
+    @staticmethod
+    def _public_state(state: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of the session state without the raw turns (caller holds the lock)."""
+        return {
+            "current_zone": state.get("current_zone", ""),
+            "current_exhibit": state.get("current_exhibit", ""),
+            "current_focus_status": state.get("current_focus_status", ""),
+            "guide_stage": state.get("guide_stage", ""),
+            "reply_text": state.get("reply_text", ""),
+            "follow_up_text": state.get("follow_up_text", ""),
+            "pending_action_label": state.get("pending_action_label", ""),
+            "pending_action_text": state.get("pending_action_text", ""),
+            "pending_action_type": state.get("pending_action_type", ""),
+            "pending_action_target": state.get("pending_action_target", ""),
+            "progress": state["progress"].copy(),
+            "user_interests": list(state.get("user_interests", [])),
+            "tour_event": state.get("tour_event", ""),
+            "tour_memory": list(state.get("tour_memory", [])),
+        }
+
+    def _fold_turns(self, memory: List[str], turns: List[Dict[str, Any]]) -> List[str]:
+        lines = list(memory)
+        for turn in turns:
+            user_text = " ".join(str(turn.get("user", "")).split())
+            guide_text = " ".join(str(turn.get("guide", "")).split())
+            if not user_text and not guide_text:
+                continue
+            first_sentence = next((part for part in _SENTENCE_END.split(guide_text) if part.strip()), "")
+            topic = str(turn.get("topic", "")).strip()
+            line = (f"[{topic}] " if topic else "") + f"问：{_clip(user_text, 30)}"
+            if first_sentence:
+                line += f"；答：{_clip(first_sentence.strip(), 48)}"
+            lines.append(line)
+        return self._bound_memory(lines)
+
+    def _bound_memory(self, lines: List[str]) -> List[str]:
+        """Shorten the oldest lines to their question first, then drop them."""
+        lines = list(lines)
+        index = 0
+        while sum(len(line) for line in lines) > self._memory_max_chars and index < len(lines):
+            lines[index] = lines[index].split("；答：", 1)[0]
+            index += 1
+        while sum(len(line) for line in lines) > self._memory_max_chars and len(lines) > 1:
+            lines.pop(0)
+        return lines
+
     @staticmethod
     def _dedupe(items: List[str]) -> List[str]:
         result: List[str] = []
@@ -84,23 +204,6 @@ class ContextStore:
             result.append(value)
         return result
 
-    @staticmethod
-    def _merge_status_maps(
-        existing: Dict[str, str],
-        updates: Dict[str, str],
-        order: Dict[str, int],
-    ) -> Dict[str, str]:
-        merged = dict(existing or {})
-        for key, status in (updates or {}).items():
-            name = str(key or "").strip()
-            value = str(status or "").strip()
-            if not name or not value:
-                continue
-            old_value = str(merged.get(name, "")).strip()
-            if order.get(value, -1) >= order.get(old_value, -1):
-                merged[name] = value
-        return merged
-
     def get(self, session_id: str, persona_id: str) -> str:
         if not session_id:
             return ""
@@ -118,11 +221,12 @@ class ContextStore:
         pending_action_text = self._trim(state.get("pending_action_text", ""))
         pending_action_type = self._trim(state.get("pending_action_type", ""))
         pending_action_target = self._trim(state.get("pending_action_target", ""))
-        visited_zones = [self._trim(v) for v in state.get("visited_zones", [])[:4]]
-        visited_exhibits = [self._trim(v) for v in state.get("visited_exhibits", [])[:4]]
+        progress: TourProgress = state["progress"]
+        visited_zones = [self._trim(v) for v in progress.visited_zone_names()[:4]]
+        visited_exhibits = [self._trim(v) for v in progress.visited_exhibit_names()[:4]]
         user_interests = [self._trim(v) for v in state.get("user_interests", [])[:4]]
-        zone_progress = state.get("zone_progress", {}) or {}
-        exhibit_progress = state.get("exhibit_progress", {}) or {}
+        zone_progress = progress.zone_progress()
+        exhibit_progress = progress.exhibit_progress()
 
         if current_zone or current_exhibit or guide_stage:
             lines.append("Current tour state:")
@@ -167,6 +271,11 @@ class ContextStore:
             if compact_exhibit_progress:
                 lines.append("Exhibit progress: " + " / ".join(compact_exhibit_progress))
 
+        tour_memory = list(state.get("tour_memory", []))
+        if tour_memory:
+            lines.append("Earlier in the tour:")
+            lines.extend(f"- {line}" for line in tour_memory)
+
         if turns:
             lines.append("Recent dialogue:")
             for turn in turns[-self._max_turns:]:
@@ -180,17 +289,25 @@ class ContextStore:
         return "\n".join(lines)
 
     def get_recent_dialogue(self, session_id: str, persona_id: str, max_turns: int = 3) -> str:
+        """
+        导览记忆（已折叠的早期对话摘要）+ 最近 max_turns 轮原文。
+        """
         if not session_id:
             return ""
         key = self._key(session_id, persona_id)
         with self._lock:
             state = dict(self._get_state_locked(key))
             turns = list(state.get("turns", []))
+            tour_memory = list(state.get("tour_memory", []))
 
+        lines: List[str] = []
+        if tour_memory:
+            lines.append("导览记忆（较早的对话）：")
+            lines.extend(f"- {line}" for line in tour_memory)
         if not turns:
-            return ""
+            return "\n".join(lines)
 
-        lines: List[str] = ["最近对话："]
+        lines.append("最近对话：")
         for turn in turns[-max(1, max_turns):]:
             user_text = self._trim(str(turn.get("user", "")))
             guide_text = self._trim(str(turn.get("guide", "")))
@@ -205,25 +322,18 @@ class ContextStore:
             return self._empty_state()
         key = self._key(session_id, persona_id)
         with self._lock:
-            state = self._get_state_locked(key)
-            return {
-                "current_zone": state.get("current_zone", ""),
-                "current_exhibit": state.get("current_exhibit", ""),
-                "current_focus_status": state.get("current_focus_status", ""),
-                "guide_stage": state.get("guide_stage", ""),
-                "reply_text": state.get("reply_text", ""),
-                "follow_up_text": state.get("follow_up_text", ""),
-                "pending_action_label": state.get("pending_action_label", ""),
-                "pending_action_text": state.get("pending_action_text", ""),
-                "pending_action_type": state.get("pending_action_type", ""),
-                "pending_action_target": state.get("pending_action_target", ""),
-                "visited_zones": list(state.get("visited_zones", [])),
-                "visited_exhibits": list(state.get("visited_exhibits", [])),
-                "zone_progress": dict(state.get("zone_progress", {})),
-                "exhibit_progress": dict(state.get("exhibit_progress", {})),
-                "user_interests": list(state.get("user_interests", [])),
-                "tour_event": state.get("tour_event", ""),
-            }
+            return self._public_state(self._get_state_locked(key))
+
+    def occupancy(self) -> Dict[str, Any]:
+        """Live head count: {"visitors", "zones": {name: n}, "exhibits": {name: n}}."""
+        with self._lock:
+            self._expire_locked(time.time())
+            return self._occupancy.snapshot()
+
+    def zone_occupancy(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire_locked(time.time())
+            return self._occupancy.zone_counts()
 
     def update(
         self,
@@ -242,10 +352,7 @@ class ContextStore:
         pending_action_text: str = "",
         pending_action_type: str = "",
         pending_action_target: str = "",
-        visited_zones: List[str] | None = None,
-        visited_exhibits: List[str] | None = None,
-        zone_progress: Dict[str, str] | None = None,
-        exhibit_progress: Dict[str, str] | None = None,
+        progress: TourProgress | None = None,
         user_interests: List[str] | None = None,
         tour_event: str = "",
     ) -> Dict[str, Any]:
@@ -261,10 +368,7 @@ class ContextStore:
                 "pending_action_text": pending_action_text or "",
                 "pending_action_type": pending_action_type or "",
                 "pending_action_target": pending_action_target or "",
-                "visited_zones": self._dedupe(visited_zones or []),
-                "visited_exhibits": self._dedupe(visited_exhibits or []),
-                "zone_progress": dict(zone_progress or {}),
-                "exhibit_progress": dict(exhibit_progress or {}),
+                "progress": progress or self._progress_index.empty(),
                 "user_interests": self._dedupe(user_interests or []),
                 "tour_event": tour_event or "",
             }
@@ -276,8 +380,14 @@ class ContextStore:
             turns.append({
                 "user": user_text or "",
                 "guide": guide_text or "",
+                "topic": (current_exhibit if current_exhibit and current_exhibit != "未确定" else current_zone) or "",
             })
-            state["turns"] = turns[-self._max_turns:]
+            if len(turns) > self._max_turns:
+                folded = turns[: max(self._compact_every, len(turns) - self._max_turns)]
+                turns = turns[len(folded):]
+                state["tour_memory"] = self._fold_turns(list(state.get("tour_memory", [])), folded)
+                state["folded_turns"] = int(state.get("folded_turns", 0)) + len(folded)
+            state["turns"] = turns
             state["current_zone"] = current_zone or state.get("current_zone", "")
             state["current_exhibit"] = current_exhibit or ""
             state["current_focus_status"] = current_focus_status or state.get("current_focus_status", "")
@@ -288,45 +398,15 @@ class ContextStore:
             state["pending_action_text"] = pending_action_text or ""
             state["pending_action_type"] = pending_action_type or ""
             state["pending_action_target"] = pending_action_target or ""
-            state["visited_zones"] = self._dedupe(
-                list(state.get("visited_zones", [])) + list(visited_zones or [])
-            )
-            state["visited_exhibits"] = self._dedupe(
-                list(state.get("visited_exhibits", [])) + list(visited_exhibits or [])
-            )
-            state["zone_progress"] = self._merge_status_maps(
-                state.get("zone_progress", {}),
-                zone_progress or {},
-                self._zone_status_order,
-            )
-            state["exhibit_progress"] = self._merge_status_maps(
-                state.get("exhibit_progress", {}),
-                exhibit_progress or {},
-                self._exhibit_status_order,
-            )
+            if progress is not None:
+                state["progress"].merge(progress.rebind(state["progress"].index))
             state["user_interests"] = self._dedupe(
                 list(state.get("user_interests", [])) + list(user_interests or [])
             )
             state["tour_event"] = tour_event or state.get("tour_event", "")
-            state["updated_at"] = time.time()
-            return {
-                "current_zone": state["current_zone"],
-                "current_exhibit": state["current_exhibit"],
-                "current_focus_status": state["current_focus_status"],
-                "guide_stage": state["guide_stage"],
-                "reply_text": state["reply_text"],
-                "follow_up_text": state["follow_up_text"],
-                "pending_action_label": state["pending_action_label"],
-                "pending_action_text": state["pending_action_text"],
-                "pending_action_type": state["pending_action_type"],
-                "pending_action_target": state["pending_action_target"],
-                "visited_zones": list(state["visited_zones"]),
-                "visited_exhibits": list(state["visited_exhibits"]),
-                "zone_progress": dict(state["zone_progress"]),
-                "exhibit_progress": dict(state["exhibit_progress"]),
-                "user_interests": list(state["user_interests"]),
-                "tour_event": state["tour_event"],
-            }
+            self._touch_locked(key, state)
+            self._place_locked(key, state)
+            return self._public_state(state)
 
     def set_pending_recommendation(
         self,
@@ -359,7 +439,7 @@ class ContextStore:
             state["pending_action_text"] = pending_action_text or ""
             state["pending_action_type"] = pending_action_type or ""
             state["pending_action_target"] = pending_action_target or ""
-            state["updated_at"] = time.time()
+            self._touch_locked(key, state)
             return {
                 "reply_text": state["reply_text"],
                 "follow_up_text": state["follow_up_text"],
@@ -368,3 +448,7 @@ class ContextStore:
                 "pending_action_type": state["pending_action_type"],
                 "pending_action_target": state["pending_action_target"],
             }
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from museguide.llm.domain_retrieval import DomainPriorIndex
+from museguide.llm.guide_stage import (
+    STAGE_EXHIBIT_OVERVIEW,
+    STAGE_ROUTE_GUIDANCE,
+    STAGE_ZONE_OVERVIEW,
+)
+from museguide.llm.language_guard import contains_cjk
+from museguide.llm.narration_bank import NarrationBank
+from museguide.llm.response_parser import fill_llm_json_defaults
+from museguide.llm.tour_state_manager import normalize_text
+
+_ROUTE_KEYWORDS = ("在哪", "怎么走", "怎么去", "带我去", "带路", "where", "how do i get", "take me to")
+
+_GENERIC_TTS = "讲解服务暂时有些繁忙，您可以先看看身边的展品，也可以问我展厅和设施的位置。"
+_GENERIC_TTS_EN = (
+    "The guide service is busy for a moment. Feel free to look around, "
+    "or ask me where a gallery or facility is."
+)
+_BUSY_TTS = "请稍等，现在来咨询的观众比较多，过一会儿请再问我一次。"
+_BUSY_TTS_EN = "Just a moment please, lots of visitors are asking right now. Please ask me again shortly."
+
+
+class DegradedResponder:
+    """
+    Template answers for when the LLM is unavailable (circuit open or the
+    backend failed): narration bank entries, domain-prior intros and
+    locations. Output has the same shape as parse_llm_json, so the caller
+    still runs it through tour state, video mapping and the initiative plan.
+    """
+
+    def __init__(self, narrations: NarrationBank):
+        self.narrations = narrations
+
+    def respond(
+        self,
+        user_text: str,
+        persona_id: str,
+        prior_state: Dict[str, Any],
+        index: DomainPriorIndex,
+        *,
+        english: bool = False,
+    ) -> Dict[str, Any]:
+        text = str(user_text or "").strip()
+        mentioned = index.mentioned(text)
+        exhibit_name = next((doc.name for doc in mentioned if doc.kind == "exhibit"), "")
+        zone_name = next((doc.name for doc in mentioned if doc.kind == "zone"), "")
+        if exhibit_name and not zone_name:
+            zone_name = index.zone_of_exhibit.get(exhibit_name, "")
+
+        lowered = text.lower()
+        if zone_name and any(keyword in lowered for keyword in _ROUTE_KEYWORDS):
+            return self._route(zone_name, index, english)
+        if exhibit_name:
+            return self._overview(persona_id, STAGE_EXHIBIT_OVERVIEW, exhibit_name, index, english)
+        if zone_name:
+            return self._overview(persona_id, STAGE_ZONE_OVERVIEW, zone_name, index, english)
+
+        # 没有提及对象：围绕当前展品 / 展厅继续，否则给通用兜底
+        current_exhibit = normalize_text(prior_state.get("current_exhibit", ""))
+        current_exhibit = next(
+            (name for name in index.exhibit_by_name if normalize_text(name) == current_exhibit), ""
+        )
+        if current_exhibit:
+            return self._overview(persona_id, STAGE_EXHIBIT_OVERVIEW, current_exhibit, index, english)
+        current_zone = str(prior_state.get("current_zone", "")).strip()
+        if current_zone in index.zone_by_name:
+            return self._overview(persona_id, STAGE_ZONE_OVERVIEW, current_zone, index, english)
+        return self._build(
+            _GENERIC_TTS_EN if english else _GENERIC_TTS,
+            zone_name=current_zone,
+            index=index,
+            stage=STAGE_ZONE_OVERVIEW,
+            intent="了解信息",
+        )
+
+    def busy(self, prior_state: Dict[str, Any], index: DomainPriorIndex, *, english: bool = False) -> Dict[str, Any]:
+        """排队超时的“请稍等”：停在当前展厅 / 展品和阶段，不引入新对象。"""
+        current_zone = str(prior_state.get("current_zone", "")).strip()
+        current_exhibit = str(prior_state.get("current_exhibit", "")).strip()
+        return self._build(
+            _BUSY_TTS_EN if english else _BUSY_TTS,
+            zone_name=current_zone,
+            index=index,
+            stage=str(prior_state.get("guide_stage", "")).strip() or STAGE_ZONE_OVERVIEW,
+            intent="了解信息",
+            exhibit=current_exhibit if current_exhibit in index.exhibit_by_name else "",
+        )
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _overview(
+        self,
+        persona_id: str,
+        kind: str,
+        target: str,
+        index: DomainPriorIndex,
+        english: bool,
+    ) -> Dict[str, Any]:
+        banked = self.narrations.pick(persona_id, kind, target, rotate=False)
+        if banked is not None:
+            return fill_llm_json_defaults(banked)
+
+        if kind == STAGE_EXHIBIT_OVERVIEW:
+            zone_name = index.zone_of_exhibit.get(target, "")
+            if english:
+                gallery = _english_name(index.zone_by_name.get(zone_name, {}))
+                tts_text = (
+                    f"This piece is one of the highlights of the {gallery}. " if gallery
+                    else "This piece is one of the highlights of this gallery. "
+                ) + "Take a close look at the label beside it."
+            else:
+                exhibit = index.exhibit_by_name.get(target, {})
+                tts_text = "".join(filter(None, [
+                    str(exhibit.get("description", "")).strip(),
+                    str(exhibit.get("summary", "")).strip(),
+                ])) or f"{target}是{zone_name}的代表展品。"
+            return self._build(
+                tts_text, zone_name=zone_name, index=index, stage=kind, intent="了解展品", exhibit=target
+            )
+
+        zone = index.zone_by_name.get(target, {})
+        if english:
+            gallery = _english_name(zone)
+            tts_text = (
+                f"Welcome to the {gallery}. " if gallery else "Welcome to this gallery. "
+            ) + "Take your time to look around the galleries here."
+        else:
+            tts_text = str(zone.get("intro", "")).strip() or f"这里是{target}。"
+        return self._build(tts_text, zone_name=target, index=index, stage=kind, intent="了解展厅")
+
+    def _route(self, zone_name: str, index: DomainPriorIndex, english: bool) -> Dict[str, Any]:
+        location = index.zone_by_name.get(zone_name, {}).get("location", {}) or {}
+        floor = str(location.get("floor", "")).strip()
+        area = str(location.get("area", "")).strip()
+        if english:
+            gallery = _english_name(index.zone_by_name.get(zone_name, {}))
+            tts_text = (
+                f"The {gallery} is on the marked route. " if gallery else "That gallery is on the marked route. "
+            ) + "Please follow the signs, and I'll meet you there."
+        else:
+            tts_text = f"{zone_name}在{floor}{area}。" if floor or area else f"请沿导览标识前往{zone_name}。"
+            description = str(location.get("description", "")).strip()
+            if description:
+                tts_text += f"{description}。"
+        return self._build(
+            tts_text, zone_name=zone_name, index=index, stage=STAGE_ROUTE_GUIDANCE, intent="询问路线"
+        )
+
+    @staticmethod
+    def _build(
+        tts_text: str,
+        *,
+        zone_name: str,
+        index: DomainPriorIndex,
+        stage: str,
+        intent: str,
+        exhibit: str = "",
+    ) -> Dict[str, Any]:
+        location = index.zone_by_name.get(zone_name, {}).get("location", {}) or {}
+        return fill_llm_json_defaults({
+            "tts_text": tts_text,
+            "confidence": 0.6,
+            "guide_zone": zone_name,
+            "guide_floor": location.get("floor", ""),
+            "guide_area": location.get("area", ""),
+            "focus_exhibit": exhibit,
+            "guide_stage": stage,
+            "user_intent": intent,
+        })
+
+
+def _english_name(entry: Dict[str, Any]) -> str:
+    """
+    Optional `name_en` of a catalogue entry. Catalogue names are Chinese, so
+    without one the English templates fall back to name-free phrasing.
+    """
+    name = str(entry.get("name_en", "") or "").strip()
+    return "" if contains_cjk(name) else name
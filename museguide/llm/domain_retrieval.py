@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+_CJK_RUN = re.compile("[\u4e00-\u9fff]+")
+_ASCII_WORD = re.compile("[a-z0-9]+")
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+# names are repeated so that a name hit outranks an incidental intro hit
+_NAME_WEIGHT = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """CJK runs become character bigrams (single chars stay unigrams); ASCII becomes lowercase words."""
+    value = str(text or "").lower()
+    tokens: List[str] = _ASCII_WORD.findall(value)
+    for run in _CJK_RUN.findall(value):
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    Minimal inverted index with BM25 scoring over pre-tokenized documents.
+    `search()` only touches the postings of the query tokens, so cost grows
+    with the query, not with the corpus.
+    """
+
+    def __init__(self, documents: List[List[str]]):
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: List[int] = []
+        for doc_id, tokens in enumerate(documents):
+            counts = Counter(tokens)
+            self._doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self._postings[token].append((doc_id, tf))
+        total = len(self._doc_lengths)
+        self._avg_length = (sum(self._doc_lengths) / total) if total else 0.0
+        self._idf = {
+            token: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def search(self, tokens: List[str], top_k: int = 5) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokens):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for doc_id, tf in self._postings[token]:
+                norm = _K1 * (1 - _B + _B * self._doc_lengths[doc_id] / self._avg_length)
+                scores[doc_id] += idf * tf * (_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+@dataclass(frozen=True)
+class DomainDoc:
+    kind: str  # "zone" / "exhibit"
+    name: str
+    zone_name: str
+    names: Tuple[str, ...]
+
+
+class DomainPriorIndex:
+    """
+    In-process BM25 index over zone / exhibit names, aliases and intros.
+    Built once per config snapshot.
+    """
+
+    def __init__(self, domain_cfg: Dict[str, Any]):
+        self.zones: List[Dict[str, Any]] = list(domain_cfg.get("zones", []) or [])
+        self.zone_by_name: Dict[str, Dict[str, Any]] = {}
+        self.exhibit_by_name: Dict[str, Dict[str, Any]] = {}
+        self.zone_of_exhibit: Dict[str, str] = {}
+        # lowercased exhibit name / alias -> canonical exhibit name
+        self.exhibit_aliases: Dict[str, str] = {}
+        self.docs: List[DomainDoc] = []
+        doc_tokens: List[List[str]] = []
+
+        for zone in self.zones:
+            zone_name = str(zone.get("name", "")).strip()
+            if not zone_name:
+                continue
+            self.zone_by_name[zone_name] = zone
+            self.docs.append(DomainDoc("zone", zone_name, zone_name, (zone_name,)))
+            doc_tokens.append(_doc_tokens(
+                (zone_name,),
+                [zone.get("intro", ""), (zone.get("location") or {}).get("area", "")],
+            ))
+            for exhibit in zone.get("exhibits", []) or []:
+                exhibit_name = str(exhibit.get("name", "")).strip()
+                if not exhibit_name:
+                    continue
+                self.exhibit_by_name[exhibit_name] = exhibit
+                self.zone_of_exhibit[exhibit_name] = zone_name
+                aliases = tuple(str(alias).strip() for alias in exhibit.get("aliases", []) or [] if alias)
+                for name in (exhibit_name,) + aliases:
+                    self.exhibit_aliases.setdefault(name.lower(), exhibit_name)
+                self.docs.append(DomainDoc("exhibit", exhibit_name, zone_name, (exhibit_name,) + aliases))
+                doc_tokens.append(_doc_tokens((exhibit_name,) + aliases, [exhibit.get("description", "")]))
+
+        self._bm25 = BM25Index(doc_tokens)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def search(self, text: str, top_k: int = 5) -> List[Tuple[DomainDoc, float]]:
+        return [(self.docs[doc_id], score) for doc_id, score in self._bm25.search(tokenize(text), top_k)]
+
+    def mentioned(self, text: str) -> List[DomainDoc]:
+        """Docs whose name or alias appears verbatim in the text."""
+        value = str(text or "").lower()
+        if not value:
+            return []
+        return [doc for doc in self.docs if any(name.lower() in value for name in doc.names if name)]
+
+    def adjacent_zones(self, zone_name: str, limit: int = 3) -> List[str]:
+        """Exhibition zones on the same floor as the given zone."""
+        zone = self.zone_by_name.get(zone_name)
+        if not zone:
+            return []
+        floor = (zone.get("location") or {}).get("floor", "")
+        result: List[str] = []
+        for other in self.zones:
+            other_name = str(other.get("name", "")).strip()
+            if other_name == zone_name or other.get("category") == "facility":
+                continue
+            if floor and (other.get("location") or {}).get("floor", "") == floor:
+                result.append(other_name)
+        return result[:limit]
+
+    def select(
+        self,
+        *,
+        user_text: str,
+        current_zone: str = "",
+        current_exhibit: str = "",
+        top_k: int = 4,
+    ) -> Dict[str, List[str]]:
+        """
+        Pick the slice of the domain prior relevant to this turn.
+        Returns {zone_name: [exhibit names to spell out]}; an empty list means
+        the zone line alone is enough.
+        """
+        selection: Dict[str, List[str]] = {}
+
+        def add_zone(zone_name: str, exhibits: List[str] | None = None) -> None:
+            if zone_name not in self.zone_by_name:
+                return
+            listed = selection.setdefault(zone_name, [])
+            for exhibit_name in exhibits or []:
+                if exhibit_name not in listed:
+                    listed.append(exhibit_name)
+
+        if current_exhibit in self.zone_of_exhibit and not current_zone:
+            current_zone = self.zone_of_exhibit[current_exhibit]
+        if current_zone in self.zone_by_name:
+            add_zone(current_zone, [
+                str(exhibit.get("name", "")).strip()
+                for exhibit in self.zone_by_name[current_zone].get("exhibits", []) or []
+            ])
+            for zone_name in self.adjacent_zones(current_zone):
+                add_zone(zone_name)
+
+        hits = self.mentioned(user_text) + [doc for doc, _ in self.search(user_text, top_k=top_k)]
+        for doc in hits:
+            add_zone(doc.zone_name, [doc.name] if doc.kind == "exhibit" else [])
+        return selection
+
+
+def _doc_tokens(names: Tuple[str, ...], extra_texts: List[Any]) -> List[str]:
+    tokens: List[str] = []
+    for name in names:
+        tokens.extend(tokenize(name) * _NAME_WEIGHT)
+    for text in extra_texts:
+        tokens.extend(tokenize(str(text or "")))
+    return tokens
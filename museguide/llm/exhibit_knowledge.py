@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from museguide.llm.domain_retrieval import BM25Index, tokenize
+
+KNOWLEDGE_DIR = Path(__file__).parents[1] / "configs" / "exhibit_knowledge"
+
+# domain_prior.json exhibit fields that already read as curated passages
+DOMAIN_PRIOR_FIELDS = (
+    ("description", "简介"),
+    ("summary", "看点"),
+    ("key_points", "要点"),
+    ("historical_context", "历史背景"),
+    ("craft", "工艺"),
+    ("story", "故事"),
+    ("observation", "观察"),
+    ("compare_to", "比较"),
+)
+MAX_PASSAGE_CHARS = 160
+
+_SENTENCE_END = re.compile("(?<=[。！？!?；;])")
+_HEADING = re.compile(r"^#+\s*")
+
+
+@dataclass(frozen=True)
+class Passage:
+    exhibit_id: str
+    source: str
+    text: str
+
+
+@dataclass(frozen=True)
+class KnowledgeHits:
+    exhibit_name: str
+    passages: Tuple[Passage, ...]
+    latency_ms: float
+    reindexed: bool
+
+
+@dataclass(frozen=True)
+class _ExhibitEntry:
+    signature: Tuple[Any, ...]
+    passages: Tuple[Passage, ...]
+    index: BM25Index
+
+
+class ExhibitKnowledgeStore:
+    """
+    Per-exhibit knowledge corpus for grounded deep explanations.
+
+    Passages come from the exhibit's curated fields in domain_prior.json plus
+    an optional `configs/exhibit_knowledge/<exhibit_id>.md` or `.json` file.
+    Each exhibit is chunked and indexed on first use; on later lookups only
+    that exhibit's files are stat'ed and it alone is re-indexed when a curator
+    has edited it.
+    """
+
+    def __init__(self, knowledge_dir: Path = KNOWLEDGE_DIR):
+        self.knowledge_dir = Path(knowledge_dir)
+        self._exhibits: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._entries: Dict[str, _ExhibitEntry] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.reindexes = 0
+        self.total_latency_ms = 0.0
+        self.last_latency_ms = 0.0
+
+    def set_domain(self, domain_cfg: Dict[str, Any]) -> None:
+        """Point the store at a new domain prior; entries re-index lazily if their fields changed."""
+        exhibits = {
+            str(exhibit.get("name", "")).strip(): exhibit
+            for zone in domain_cfg.get("zones", []) or []
+            for exhibit in zone.get("exhibits", []) or []
+        }
+        fingerprints = {
+            name: json.dumps(exhibit, ensure_ascii=False, sort_keys=True)
+            for name, exhibit in exhibits.items()
+        }
+        with self._lock:
+            self._exhibits = exhibits
+            self._fingerprints = fingerprints
+
+    def retrieve(self, exhibit_name: str, query: str, top_k: int = 3) -> KnowledgeHits:
+        started = time.perf_counter()
+        name = str(exhibit_name or "").strip()
+        exhibit = self._exhibits.get(name)
+        if not exhibit:
+            return KnowledgeHits(name, (), 0.0, False)
+
+        entry, reindexed = self._entry(name, exhibit)
+        ranked = entry.index.search(tokenize(query), top_k=top_k)
+        if ranked:
+            passages = tuple(entry.passages[doc_id] for doc_id, _ in ranked)
+        else:
+            # no lexical overlap with the question: fall back to curated order
+            passages = entry.passages[:top_k]
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.lookups += 1
+            self.total_latency_ms += latency_ms
+            self.last_latency_ms = latency_ms
+        return KnowledgeHits(name, passages, latency_ms, reindexed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "indexed_exhibits": len(self._entries),
+                "lookups": self.lookups,
+                "reindexes": self.reindexes,
+                "last_latency_ms": round(self.last_latency_ms, 3),
+                "avg_latency_ms": round(self.total_latency_ms / self.lookups, 3) if self.lookups else 0.0,
+            }
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _entry(self, name: str, exhibit: Dict[str, Any]) -> Tuple[_ExhibitEntry, bool]:
+        exhibit_id = str(exhibit.get("id", "")).strip()
+        paths = [self.knowledge_dir / f"{exhibit_id}.md", self.knowledge_dir / f"{exhibit_id}.json"]
+        signature = (self._fingerprints.get(name, ""),) + tuple(_mtime(path) for path in paths)
+        entry = self._entries.get(name)
+        if entry is not None and entry.signature == signature:
+            return entry, False
+
+        passages = _domain_prior_passages(exhibit_id, exhibit)
+        for path in paths:
+            if _mtime(path) is not None:
+                passages.extend(_file_passages(exhibit_id, path))
+        entry = _ExhibitEntry(
+            signature=signature,
+            passages=tuple(passages),
+            index=BM25Index([tokenize(passage.text) for passage in passages]),
+        )
+        with self._lock:
+            self._entries[name] = entry
+            self.reindexes += 1
+        return entry, True
+
+
+def build_knowledge_prompt(hits: KnowledgeHits) -> str:
+    if not hits.passages:
+        return ""
+    lines = [f"展品资料（{hits.exhibit_name}，深入讲解时只依据以下资料补充细节，资料未提及的不要编造）："]
+    for number, passage in enumerate(hits.passages, start=1):
+        lines.append(f"[{number}] {passage.text}")
+    return "\n".join(lines)
+
+
+def chunk_text(text: str, max_chars: int = MAX_PASSAGE_CHARS) -> List[str]:
+    """
+    Split on blank lines, then pack sentences up to max_chars. A markdown
+    heading is kept as a label on the chunks of the section below it.
+    """
+    chunks: List[str] = []
+    heading = ""
+    for block in re.split(r"\n\s*\n", str(text or "")):
+        lines: List[str] = []
+        for line in block.splitlines():
+            line = line.strip()
+            if _HEADING.match(line):
+                heading = _HEADING.sub("", line)
+            elif line:
+                lines.append(line)
+        if not lines:
+            continue
+        label = f"{heading}：" if heading else ""
+        current = ""
+        for sentence in filter(None, (part.strip() for part in _SENTENCE_END.split(" ".join(lines)))):
+            if current and len(current) + len(sentence) > max_chars:
+                chunks.append(label + current)
+                current = ""
+            current += sentence
+        if current:
+            chunks.append(label + current)
+    return chunks
+
+
+def _domain_prior_passages(exhibit_id: str, exhibit: Dict[str, Any]) -> List[Passage]:
+    passages: List[Passage] = []
+    for field, label in DOMAIN_PRIOR_FIELDS:
+        value = exhibit.get(field)
+        if isinstance(value, list):
+            value = "；".join(str(item) for item in value if item)
+        for chunk in chunk_text(str(value or "")):
+            passages.append(Passage(exhibit_id, f"domain_prior.{field}", f"{label}：{chunk}"))
+    return passages
+
+
+def _file_passages(exhibit_id: str, path: Path) -> List[Passage]:
+    try:
+        raw = path.read_text(encoding="utf-8")
+        if path.suffix == ".json":
+            data = json.loads(raw)
+            items = data.get("passages", []) if isinstance(data, dict) else data
+            text = "\n\n".join(str(item) for item in items or [] if item)
+        else:
+            text = raw
+    except (OSError, ValueError) as error:
+        print(f"=== EXHIBIT KNOWLEDGE LOAD FAILED: {path.name}: {error} ===")
+        return []
+    return [Passage(exhibit_id, path.name, chunk) for chunk in chunk_text(text)]
+
+
+def _mtime(path: Path) -> float | None:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import re
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from functools import partial
+from typing import Any, Dict, Hashable, List, Mapping, Sequence, Tuple
 
 from museguide.llm.guide_stage import (
     STAGE_EXHIBIT_DETAIL,
@@ -10,602 +15,551 @@ from museguide.llm.guide_stage import (
     STAGE_ROUTE_GUIDANCE,
     STAGE_ZONE_OVERVIEW,
 )
+from museguide.llm.progress import TourProgress
+from museguide.llm.recommender import ExhibitRecommender
+from museguide.llm.venue_graph import VenueGraph
+
+PERSONA_REGULAR = "regular"
+PERSONA_CHILD = "child"
+PERSONA_CLASSIC = "classic"
+PERSONA_ENGLISH = "english"
+
+INTENT_START = "start"
+INTENT_ROUTE = "route"
+
+Action = Tuple[str, str]
+
+_CHILD_PERSONAS = {"boy_demo", "girl_demo"}
+_CLASSIC_PERSONAS = {"gu_man_demo", "gu_woman_demo"}
+_SERVICE_ZONES = {"前台服务区", "卫生间"}
+_EXHIBIT_STAGES = {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS, STAGE_EXHIBIT_DETAIL}
+_SHALLOW_EXHIBIT_STAGES = {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS}
+_ROUTE_INTENT_KEYWORDS = ("路线", "前往", "带路", "怎么走", "在哪")
+_ROUTE_INTENT_KEYWORDS_EN = ("路线", "前往", "带路", "移动")
+_OPENING_ZONE_IDS = (
+    "zone_chinese_origins",
+    "zone_calligraphy_painting",
+    "zone_world_classics",
+    "zone_children_exploration",
+)
+
+# 中文各角色话术：{zone} 按展区名、{exhibit} / {next} 按展品名在加载时逐一渲染，规划时只查表
+_CN_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    PERSONA_REGULAR: {
+        "ask_zone": "您想先听我带您看哪个展区？",
+        "open_zone": "带我去{zone}。",
+        "open_recommend": ("你来推荐", "请推荐一个最适合先看的展区。"),
+        "route_prompt": "到那里后，您要不要我先讲这个展厅最值得先看的展品？",
+        "route_prompt_empty": "要不要我直接接着带您过去？",
+        "route_go": ("直接带我去", "直接带我去下一个推荐展区。"),
+        "route_first_exhibit": ("先讲重点展品", "到了{zone}先给我讲重点展品。"),
+        "route_on_the_way": ("路上顺便看什么", "从这里过去路上有什么值得顺便看的？"),
+        "route_shorter": ("换条近一点的路线", "给我一条更近一些的路线。"),
+        "exhibit_prompt": "您想先看这件展品的关键细节，还是听它背后的来历？",
+        "exhibit_prompt_next": "您想继续深挖，还是看{next}？",
+        "exhibit_prompt_done": "这个展厅已经看完了，您要不要去下一个展厅？",
+        "focus_detail": ("讲解细节", "请继续讲讲{exhibit}的细节。"),
+        "goto_exhibit": "带我看看{next}。",
+        "goto_zone": "带我去{zone}。",
+        "exhibit_more": (
+            ("继续讲细节", "请继续讲讲{exhibit}的细节。"),
+            ("讲历史背景", "请介绍一下{exhibit}的历史背景。"),
+        ),
+        "exhibit_next": ("下一件：{next}", "带我看看{next}。"),
+        "exhibit_next_zone": ("去下一站", "带我去{zone}。"),
+        "exhibit_no_next": ("推荐下一件", "再推荐一件值得接着看的展品。"),
+        "zone_exhibit": "请介绍一下{exhibit}。",
+        "zone_recommend": ("你来推荐", "请推荐{zone}里还没看过、最值得先看的展品。"),
+        "zone_next_zone": ("去下一站", "带我去{zone}。"),
+        "zone_prompt_next": "您想先听这个展厅的整体看点，还是我直接带您看还没讲过的{next}？",
+        "zone_prompt_done": "这个展厅已经看完了，您要不要去下一个展厅？",
+        "start_prompt": "您想让我先推荐一个起点吗？",
+    },
+    PERSONA_CHILD: {
+        "ask_zone": "你想先去哪个展区？",
+        "open_zone": "带我去看看{zone}。",
+        "open_recommend": ("你来推荐", "你推荐我先看哪里？"),
+        "route_prompt": "到了那里以后，要不要我先讲这个展厅最好玩的展品？",
+        "route_prompt_empty": "要不要我直接带你去？",
+        "route_go": ("直接带我去", "直接带我去下一个推荐点。"),
+        "route_first_exhibit": ("到了先讲什么", "到了{zone}先给我讲最好玩的展品。"),
+        "route_on_the_way": ("路上看什么", "路上有什么值得顺便看的？"),
+        "route_shorter": ("走简单一点", "给我一条更简单的路线。"),
+        "exhibit_prompt": "你想先看这件展品最特别的细节，还是听它的小故事？",
+        "exhibit_prompt_next": "你还想继续深挖，还是去看{next}？",
+        "exhibit_prompt_done": "这个展厅已经看完了，你要不要去下一个展厅？",
+        "focus_detail": ("讲解细节", "讲讲{exhibit}最特别的细节。"),
+        "goto_exhibit": "带我看看{next}。",
+        "goto_zone": "带我去{zone}。",
+        "exhibit_more": (
+            ("讲个小故事", "给我讲讲{exhibit}背后的小故事。"),
+            ("看细节", "{exhibit}最值得看的细节是什么？"),
+        ),
+        "exhibit_next": ("看{next}", "带我看看{next}。"),
+        "exhibit_next_zone": ("去下一站", "带我去{zone}。"),
+        "exhibit_no_next": ("下一个看什么", "接下来我还可以看什么？"),
+        "zone_exhibit": "带我看看{exhibit}。",
+        "zone_recommend": ("你来推荐", "你推荐我先看{zone}里还没看过的哪件展品？"),
+        "zone_next_zone": ("去下一站", "带我去{zone}。"),
+        "zone_prompt_next": "你想先听这个展厅有什么好看，还是我带你去看还没讲过的{next}？",
+        "zone_prompt_done": "这个展厅已经看完了，你要不要去下一个展厅？",
+        "start_prompt": "要不要我先帮你选个起点？",
+    },
+    PERSONA_CLASSIC: {
+        "ask_zone": "诸位想先往哪一处？",
+        "open_zone": "请先带我看看{zone}。",
+        "open_recommend": ("烦请推荐", "请推荐一个最适合先看的展区。"),
+        "route_prompt": "抵达之后，可要我先讲彼处最值得先看的一件器物？",
+        "route_prompt_empty": "可要在下继续引路？",
+        "route_go": ("直接带我去", "请直接引我前往该展区。"),
+        "route_first_exhibit": ("先讲代表展品", "到了{zone}请先讲最值得一看的展品。"),
+        "route_on_the_way": ("路上顺便看什么", "途中还有何处值得顺便一观？"),
+        "route_shorter": ("换条近一点的路线", "请换一条更近一些的路线。"),
+        "exhibit_prompt": "诸位是想先细看此物一处精妙，还是追溯它的来历？",
+        "exhibit_prompt_next": "诸位还想细究此物，还是移步去看{next}？",
+        "exhibit_prompt_done": "此厅诸物已尽览，可要移步下一展厅？",
+        "focus_detail": ("讲解细节", "请细讲{exhibit}最精妙之处。"),
+        "goto_exhibit": "请带我去看看{next}。",
+        "goto_zone": "请引我前往{zone}。",
+        "exhibit_more": (
+            ("细看此物", "请再细讲{exhibit}的精妙之处。"),
+            ("追溯背景", "请讲讲{exhibit}所处的时代背景。"),
+        ),
+        "exhibit_next": ("移步{next}", "请带我去看看{next}。"),
+        "exhibit_next_zone": ("继续前行", "请引我前往{zone}。"),
+        "exhibit_no_next": ("继续前行", "接下来可引我去看何物？"),
+        "zone_exhibit": "请重点介绍{exhibit}。",
+        "zone_recommend": ("你来推荐", "请为我推荐{zone}里还没看过、最值得先看的一件。"),
+        "zone_next_zone": ("移步下一厅", "请引我前往{zone}。"),
+        "zone_prompt_next": "诸位愿先听此厅整体看点，还是移步去看尚未讲过的{next}？",
+        "zone_prompt_done": "此厅已尽览，可要移步下一展厅？",
+        "start_prompt": "可要我先为诸位择一处起点？",
+    },
+}
+
 
 @dataclass(frozen=True)
 class InitiativePlan:
     next_step_type: str
     next_step_target: str
     follow_up_prompt: str
-    suggested_actions: List[Dict[str, str]]
-
-
-def build_initiative_plan(
-    result: Dict[str, Any],
-    persona_id: str,
-    domain_cfg: Dict[str, Any],
-) -> InitiativePlan:
-    if _persona_requires_english(persona_id):
-        return _build_english_plan(result, domain_cfg)
-    return _build_chinese_plan(result, persona_id, domain_cfg)
-
-
-def merge_follow_up_prompt(tts_text: str, follow_up_prompt: str) -> str:
-    text = str(tts_text or "").strip()
-    prompt = str(follow_up_prompt or "").strip()
-    if not text or not prompt:
-        return text
-    if _has_question(text) or prompt in text:
-        return text
-    sep = " " if _is_english_text(text) else ""
-    return f"{text}{sep}{prompt}".strip()
-
-
-def dedupe_actions(actions: List[Dict[str, str]], limit: int = 3) -> List[Dict[str, str]]:
-    seen: set[tuple[str, str]] = set()
-    result: List[Dict[str, str]] = []
-    for action in actions:
-        label = str(action.get("label", "")).strip()
-        text = str(action.get("text", "")).strip()
-        if not label or not text:
-            continue
-        key = (label, text)
-        if key in seen:
-            continue
-        seen.add(key)
-        result.append({"label": label, "text": text})
-        if len(result) >= limit:
-            break
-    return result
-
-
-def _build_english_plan(result: Dict[str, Any], domain_cfg: Dict[str, Any]) -> InitiativePlan:
-    zone_name = _field(result, "guide_zone")
-    exhibit_name = _field(result, "focus_exhibit")
-    guide_stage = _field(result, "guide_stage")
-    user_intent = _field(result, "user_intent")
-
-    if user_intent == "开始导览" or guide_stage == STAGE_ZONE_OVERVIEW:
-        return InitiativePlan(
+    # (label, text)；计划会被缓存复用，对外只给不可变元组
+    suggested_actions: Tuple[Action, ...]
+
+    def action_dicts(self) -> List[Dict[str, str]]:
+        return [{"label": label, "text": text} for label, text in self.suggested_actions]
+
+
+class InitiativePlanner:
+    """
+    Memoised follow-up planner keyed on (persona class, stage, zone,
+    exhibit, intent bucket, zone progress signature); plans live in a
+    bounded LRU. Only the key is computed per call: ranking the unseen
+    exhibits by the session's interests and picking the nearest unseen zone
+    on the venue graph (walking time plus the live crowd penalty) run on a
+    miss. A cached plan therefore carries the interests and crowd of the
+    turn that built it; entries expire after `ttl` seconds so crowd changes
+    still reach new plans. Built per config snapshot: zone lookups, the
+    opening route, the fixed plans (fallback / English opening) and every
+    Chinese template filled with each catalogue name are rendered here,
+    once.
+    """
+
+    def __init__(
+        self,
+        domain_cfg: Dict[str, Any],
+        venue: VenueGraph,
+        recommender: ExhibitRecommender,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+    ):
+        self._venue = venue
+        self._recommender = recommender
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._plans: OrderedDict[Hashable, Tuple[InitiativePlan, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._zone_has_exhibits: Dict[str, bool] = {}
+        self._zone_exhibits: Dict[str, List[str]] = {}
+        for zone in domain_cfg.get("zones", []) or []:
+            if zone.get("name") in self._zone_has_exhibits:
+                continue
+            exhibits = zone.get("exhibits", []) or []
+            self._zone_has_exhibits[zone.get("name")] = bool(exhibits)
+            self._zone_exhibits[zone.get("name")] = [
+                name for name in (str(exhibit.get("name", "")).strip() for exhibit in exhibits) if name
+            ]
+        zone_by_id = {str(zone.get("id", "")): zone for zone in domain_cfg.get("zones", []) or []}
+        self._opening_zones = [
+            name
+            for name in (str(zone_by_id.get(zone_id, {}).get("name", "")).strip() for zone_id in _OPENING_ZONE_IDS)
+            if name
+        ]
+        first_zone = _first_primary_zone_name(domain_cfg)
+
+        self._templates = _CN_TEMPLATES
+        self._rendered = {
+            persona: _prerender(templates, list(self._zone_exhibits), [
+                name for names in self._zone_exhibits.values() for name in names
+            ])
+            for persona, templates in self._templates.items()
+        }
+        self._start_plans = {
+            persona: InitiativePlan(
+                next_step_type="ask_zone",
+                next_step_target=first_zone,
+                follow_up_prompt=templates["start_prompt"],
+                suggested_actions=dedupe_actions([
+                    ("推荐起点", f"请推荐一个适合开始了解的展区，比如{first_zone}。"),
+                    ("轻松逛一圈", "请给我安排一条轻松一点的参观路线。"),
+                    ("看代表展品", "请推荐一件最能代表这个馆的展品。"),
+                ]),
+            )
+            for persona, templates in self._templates.items()
+        }
+        self._opening_plan_en = InitiativePlan(
             next_step_type="ask_zone",
             next_step_target="major_zones",
             follow_up_prompt="Which area would you like to start with?",
-            suggested_actions=_opening_actions_en(domain_cfg),
-        )
-
-    if guide_stage == STAGE_ROUTE_GUIDANCE or any(keyword in user_intent for keyword in ["路线", "前往", "带路", "移动"]):
-        zone = _get_zone_by_name(domain_cfg, zone_name) if zone_name else {}
-        exhibits = zone.get("exhibits", [])
-        return InitiativePlan(
-            next_step_type="recommend_exhibit" if exhibits else "offer_route",
-            next_step_target=zone_name or "next_stop",
-            follow_up_prompt=(
-                "After we arrive, would you like me to introduce the key exhibit there?"
-                if exhibits else
-                "Would you like me to guide you there now?"
+            suggested_actions=dedupe_actions(
+                [(_short_zone_label(name), f"Take me to the {name}.") for name in self._opening_zones]
+                + [("Recommend one", "Recommend the best area to start with.")],
+                limit=5,
             ),
-            suggested_actions=_route_actions_en(zone_name, exhibits),
         )
-
-    if exhibit_name and exhibit_name != "未确定" and guide_stage in {
-        STAGE_EXHIBIT_OVERVIEW,
-        STAGE_EXHIBIT_FOCUS,
-        STAGE_EXHIBIT_DETAIL,
-    }:
-        return InitiativePlan(
-            next_step_type="deepen_exhibit" if guide_stage in {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS} else "recommend_exhibit",
-            next_step_target=exhibit_name,
-            follow_up_prompt=(
-                "Would you like me to focus on one detail, explain the background, or move to the next exhibit?"
-                if guide_stage in {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS}
-                else "Would you like one more detail, or should we move to the next unseen exhibit?"
-            ),
+        self._start_plan_en = InitiativePlan(
+            next_step_type="ask_zone",
+            next_step_target="major_zones",
+            follow_up_prompt="Would you like a starting point or a short route?",
             suggested_actions=dedupe_actions([
-                _action("Explain details", f"Tell me more details about {exhibit_name}."),
-                _action("Background story", f"What is the historical background of {exhibit_name}?"),
-                _action("Next recommendation", "Recommend the next exhibit I should see."),
+                ("Start with a classic", "Recommend a classic exhibit to begin with."),
+                ("Family-friendly", "Which area is best for a relaxed visit?"),
+                ("Route suggestion", "Plan a simple route for me."),
             ]),
         )
 
-    if zone_name and zone_name not in {"前台服务区", "卫生间"}:
-        zone = _get_zone_by_name(domain_cfg, zone_name)
-        exhibits = zone.get("exhibits", [])
-        actions = [
-            _action("Zone highlight", f"What is the highlight of the {zone_name}?"),
-            _action("Go deeper", f"Take me deeper into the {zone_name}."),
-        ]
-        next_target = zone_name
-        next_type = "recommend_exhibit"
-        if exhibits:
-            actions.append(
-                _action(
-                    "Representative exhibit",
-                    f"Recommend a representative exhibit in the {zone_name}.",
-                )
-            )
+    def plan(self, result: Any, persona_id: str, crowd: Mapping[str, float] | None = None) -> InitiativePlan:
+        persona = persona_class(persona_id)
+        guide_stage = _field(result, "guide_stage")
+        zone_name = _field(result, "guide_zone")
+        exhibit_name = _field(result, "focus_exhibit")
+        intent = intent_bucket(_field(result, "user_intent"), persona)
+        progress: TourProgress | None = None
+        if persona != PERSONA_ENGLISH:
+            progress = result.get("progress")
+        signature = progress.signature(zone_name) if progress is not None else None
+        key = (persona, guide_stage, zone_name, exhibit_name, intent, signature)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is not None and now - entry[1] < self._ttl:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        if persona == PERSONA_ENGLISH:
+            plan = self._build_english(guide_stage, zone_name, exhibit_name, intent)
         else:
-            next_type = "transition_zone"
-            actions.append(_action("Next stop", "Recommend the next place I should visit."))
-        return InitiativePlan(
-            next_step_type=next_type,
-            next_step_target=next_target,
-            follow_up_prompt="Would you like to stay here or move to the next highlight?",
-            suggested_actions=dedupe_actions(actions),
-        )
-
-    return InitiativePlan(
-        next_step_type="ask_zone",
-        next_step_target="major_zones",
-        follow_up_prompt="Would you like a starting point or a short route?",
-        suggested_actions=dedupe_actions([
-            _action("Start with a classic", "Recommend a classic exhibit to begin with."),
-            _action("Family-friendly", "Which area is best for a relaxed visit?"),
-            _action("Route suggestion", "Plan a simple route for me."),
-        ]),
-    )
-
-
-def _build_chinese_plan(
-    result: Dict[str, Any],
-    persona_id: str,
-    domain_cfg: Dict[str, Any],
-) -> InitiativePlan:
-    zone_name = _field(result, "guide_zone")
-    exhibit_name = _field(result, "focus_exhibit")
-    guide_stage = _field(result, "guide_stage")
-    user_intent = _field(result, "user_intent")
-    is_child = persona_id in {"boy_demo", "girl_demo"}
-    is_classic = persona_id in {"gu_man_demo", "gu_woman_demo"}
-    next_unseen_exhibit = _next_unseen_exhibit(result, domain_cfg, zone_name, exhibit_name)
-    next_unseen_zone = _next_unseen_zone(result, domain_cfg, zone_name)
-
-    if user_intent == "开始导览" or guide_stage == STAGE_ZONE_OVERVIEW:
-        return InitiativePlan(
-            next_step_type="ask_zone",
-            next_step_target="主要展区",
-            follow_up_prompt=_cn_prompt(
-                is_child,
-                is_classic,
-                regular="您想先听我带您看哪个展区？",
-                child="你想先去哪个展区？",
-                classic="诸位想先往哪一处？",
-            ),
-            suggested_actions=_opening_actions(result, domain_cfg, is_child, is_classic),
-        )
+            next_exhibit = ""
+            next_zone = ""
+            unseen: Tuple[str, ...] = ()
+            if progress is not None:
+                # 未命中时才排序：本展厅未看展品按兴趣排序，下一展区取步行时间 + 拥挤折算最近的
+                interests = result.get("user_interests", [])
+                if zone_name:
+                    next_exhibit = self._recommender.best(
+                        progress.next_exhibit_candidates(zone_name, exclude=exhibit_name), interests
+                    )
+                unseen = tuple(self._recommender.rank(progress.unseen_exhibits(zone_name), interests))
+                next_zone = self._venue.nearest(zone_name, progress.next_zone_candidates(exclude=zone_name), crowd)
+            plan = self._build_chinese(
+                persona, guide_stage, zone_name, exhibit_name, intent, progress, next_exhibit, next_zone, unseen
+            )
 
-    if guide_stage == STAGE_ROUTE_GUIDANCE or any(keyword in user_intent for keyword in ["路线", "前往", "带路", "怎么走", "在哪"]):
-        zone = _get_zone_by_name(domain_cfg, zone_name) if zone_name else {}
-        exhibits = zone.get("exhibits", [])
-        return InitiativePlan(
-            next_step_type="recommend_exhibit" if exhibits else "offer_route",
-            next_step_target=zone_name or "下一站",
-            follow_up_prompt=_cn_prompt(
-                is_child,
-                is_classic,
-                regular=(
-                    "到那里后，您要不要我先讲这个展厅最值得先看的展品？"
-                    if exhibits else
-                    "要不要我直接接着带您过去？"
-                ),
-                child=(
-                    "到了那里以后，要不要我先讲这个展厅最好玩的展品？"
-                    if exhibits else
-                    "要不要我直接带你去？"
+        with self._lock:
+            self._plans[key] = (plan, now)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self._max_entries:
+                self._plans.popitem(last=False)
+                self.evictions += 1
+        return plan
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._plans),
+            }
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _build_english(self, guide_stage: str, zone_name: str, exhibit_name: str, intent: str) -> InitiativePlan:
+        if intent == INTENT_START or guide_stage == STAGE_ZONE_OVERVIEW:
+            return self._opening_plan_en
+
+        if guide_stage == STAGE_ROUTE_GUIDANCE or intent == INTENT_ROUTE:
+            has_exhibits = self._zone_has_exhibits.get(zone_name, False) if zone_name else False
+            actions = [("Guide me there", "Guide me to the next recommended stop.")]
+            if has_exhibits:
+                actions.append((
+                    "Introduce the key exhibit",
+                    f"When we arrive at the {zone_name}, introduce the key exhibit first.",
+                ))
+            else:
+                actions.append(("Nearby highlight", "What should I notice on the way?"))
+            actions.append(("Short route", "Give me a shorter route from here."))
+            return InitiativePlan(
+                next_step_type="recommend_exhibit" if has_exhibits else "offer_route",
+                next_step_target=zone_name or "next_stop",
+                follow_up_prompt=(
+                    "After we arrive, would you like me to introduce the key exhibit there?"
+                    if has_exhibits else
+                    "Would you like me to guide you there now?"
                 ),
-                classic=(
-                    "抵达之后，可要我先讲彼处最值得先看的一件器物？"
-                    if exhibits else
-                    "可要在下继续引路？"
-                ),
-            ),
-            suggested_actions=_route_actions(zone_name, exhibits, is_child, is_classic),
-        )
+                suggested_actions=dedupe_actions(actions),
+            )
 
-    if exhibit_name and exhibit_name != "未确定" and guide_stage in {
-        STAGE_EXHIBIT_OVERVIEW,
-        STAGE_EXHIBIT_FOCUS,
-        STAGE_EXHIBIT_DETAIL,
-    }:
-        return InitiativePlan(
-            next_step_type=(
-                "deepen_exhibit"
-                if guide_stage in {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS}
-                else ("recommend_exhibit" if next_unseen_exhibit else "deepen_exhibit")
-            ),
-            next_step_target=next_unseen_exhibit or exhibit_name,
-            follow_up_prompt=_cn_prompt(
-                is_child,
-                is_classic,
-                regular=(
-                    "您想先看这件展品的关键细节，还是听它背后的来历？"
-                    if guide_stage in {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS}
-                    else (
-                        f"您想继续深挖，还是看{next_unseen_exhibit}？"
-                        if next_unseen_exhibit else
-                        "这个展厅已经看完了，您要不要去下一个展厅？"
-                    )
+        if exhibit_name and exhibit_name != "未确定" and guide_stage in _EXHIBIT_STAGES:
+            shallow = guide_stage in _SHALLOW_EXHIBIT_STAGES
+            return InitiativePlan(
+                next_step_type="deepen_exhibit" if shallow else "recommend_exhibit",
+                next_step_target=exhibit_name,
+                follow_up_prompt=(
+                    "Would you like me to focus on one detail, explain the background, or move to the next exhibit?"
+                    if shallow
+                    else "Would you like one more detail, or should we move to the next unseen exhibit?"
                 ),
-                child=(
-                    "你想先看这件展品最特别的细节，还是听它的小故事？"
-                    if guide_stage in {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS}
-                    else (
-                        f"你还想继续深挖，还是去看{next_unseen_exhibit}？"
-                        if next_unseen_exhibit else
-                        "这个展厅已经看完了，你要不要去下一个展厅？"
-                    )
-                ),
-                classic=(
-                    "诸位是想先细看此物一处精妙，还是追溯它的来历？"
-                    if guide_stage in {STAGE_EXHIBIT_OVERVIEW, STAGE_EXHIBIT_FOCUS}
-                    else (
-                        f"诸位还想细究此物，还是移步去看{next_unseen_exhibit}？"
-                        if next_unseen_exhibit else
-                        "此厅诸物已尽览，可要移步下一展厅？"
-                    )
-                ),
-            ),
-            suggested_actions=_exhibit_actions(
-                exhibit_name,
-                next_unseen_exhibit,
-                next_unseen_zone,
-                guide_stage,
-                is_child,
-                is_classic,
-            ),
-        )
+                suggested_actions=dedupe_actions([
+                    ("Explain details", f"Tell me more details about {exhibit_name}."),
+                    ("Background story", f"What is the historical background of {exhibit_name}?"),
+                    ("Next recommendation", "Recommend the next exhibit I should see."),
+                ]),
+            )
 
-    if zone_name and zone_name not in {"前台服务区", "卫生间"}:
-        zone = _get_zone_by_name(domain_cfg, zone_name)
-        exhibits = zone.get("exhibits", [])
-        actions = _zone_actions(
-            result,
-            zone_name,
-            exhibits,
-            next_unseen_exhibit,
-            next_unseen_zone,
-            domain_cfg,
-            is_child,
-            is_classic,
-        )
-        next_type = "recommend_exhibit" if next_unseen_exhibit else "transition_zone"
-        next_target = next_unseen_exhibit or next_unseen_zone or zone_name
-        return InitiativePlan(
-            next_step_type=next_type,
-            next_step_target=next_target,
-            follow_up_prompt=_cn_prompt(
-                is_child,
-                is_classic,
-                regular=(
-                    f"您想先听这个展厅的整体看点，还是我直接带您看还没讲过的{next_unseen_exhibit}？"
-                    if next_unseen_exhibit else
-                    "这个展厅已经看完了，您要不要去下一个展厅？"
-                ),
-                child=(
-                    f"你想先听这个展厅有什么好看，还是我带你去看还没讲过的{next_unseen_exhibit}？"
+        if zone_name and zone_name not in _SERVICE_ZONES:
+            actions = [
+                ("Zone highlight", f"What is the highlight of the {zone_name}?"),
+                ("Go deeper", f"Take me deeper into the {zone_name}."),
+            ]
+            if self._zone_has_exhibits.get(zone_name, False):
+                next_type = "recommend_exhibit"
+                actions.append(("Representative exhibit", f"Recommend a representative exhibit in the {zone_name}."))
+            else:
+                next_type = "transition_zone"
+                actions.append(("Next stop", "Recommend the next place I should visit."))
+            return InitiativePlan(
+                next_step_type=next_type,
+                next_step_target=zone_name,
+                follow_up_prompt="Would you like to stay here or move to the next highlight?",
+                suggested_actions=dedupe_actions(actions),
+            )
+
+        return self._start_plan_en
+
+    def _build_chinese(
+        self,
+        persona: str,
+        guide_stage: str,
+        zone_name: str,
+        exhibit_name: str,
+        intent: str,
+        progress: TourProgress | None,
+        next_unseen_exhibit: str,
+        next_unseen_zone: str,
+        unseen_exhibits: Tuple[str, ...],
+    ) -> InitiativePlan:
+        t = self._templates[persona]
+        fill = partial(self._filled, persona)
+
+        if intent == INTENT_START or guide_stage == STAGE_ZONE_OVERVIEW:
+            opening = [name for name in self._opening_zones if progress is None or not progress.zone_touched(name)]
+            actions = [
+                (_short_zone_label(name), fill("open_zone", name))
+                for name in opening or self._opening_zones
+            ]
+            actions.append(t["open_recommend"])
+            return InitiativePlan(
+                next_step_type="ask_zone",
+                next_step_target="主要展区",
+                follow_up_prompt=t["ask_zone"],
+                suggested_actions=dedupe_actions(actions, limit=5),
+            )
+
+        if guide_stage == STAGE_ROUTE_GUIDANCE or intent == INTENT_ROUTE:
+            has_exhibits = self._zone_has_exhibits.get(zone_name, False) if zone_name else False
+            middle = fill("route_first_exhibit", zone_name) if has_exhibits else t["route_on_the_way"]
+            return InitiativePlan(
+                next_step_type="recommend_exhibit" if has_exhibits else "offer_route",
+                next_step_target=zone_name or "下一站",
+                follow_up_prompt=t["route_prompt"] if has_exhibits else t["route_prompt_empty"],
+                suggested_actions=dedupe_actions([t["route_go"], middle, t["route_shorter"]]),
+            )
+
+        if exhibit_name and exhibit_name != "未确定" and guide_stage in _EXHIBIT_STAGES:
+            if guide_stage in _SHALLOW_EXHIBIT_STAGES:
+                next_type = "deepen_exhibit"
+                follow_up = t["exhibit_prompt"]
+            else:
+                next_type = "recommend_exhibit" if next_unseen_exhibit else "deepen_exhibit"
+                follow_up = (
+                    fill("exhibit_prompt_next", next_unseen_exhibit)
                     if next_unseen_exhibit else
-                    "这个展厅已经看完了，你要不要去下一个展厅？"
+                    t["exhibit_prompt_done"]
+                )
+            return InitiativePlan(
+                next_step_type=next_type,
+                next_step_target=next_unseen_exhibit or exhibit_name,
+                follow_up_prompt=follow_up,
+                suggested_actions=self._exhibit_actions(
+                    persona, guide_stage, exhibit_name, next_unseen_exhibit, next_unseen_zone
                 ),
-                classic=(
-                    f"诸位愿先听此厅整体看点，还是移步去看尚未讲过的{next_unseen_exhibit}？"
+            )
+
+        if zone_name and zone_name not in _SERVICE_ZONES:
+            unseen = unseen_exhibits if progress is not None else self._zone_exhibits.get(zone_name, [])
+            actions = [(_short_exhibit_label(name), fill("zone_exhibit", name)) for name in unseen]
+            actions.append(fill("zone_recommend", zone_name))
+            if not unseen and next_unseen_zone:
+                actions.insert(0, fill("zone_next_zone", next_unseen_zone))
+            return InitiativePlan(
+                next_step_type="recommend_exhibit" if next_unseen_exhibit else "transition_zone",
+                next_step_target=next_unseen_exhibit or next_unseen_zone or zone_name,
+                follow_up_prompt=(
+                    fill("zone_prompt_next", next_unseen_exhibit)
                     if next_unseen_exhibit else
-                    "此厅已尽览，可要移步下一展厅？"
+                    t["zone_prompt_done"]
                 ),
-            ),
-            suggested_actions=actions,
-        )
-
-    first_zone = _get_first_primary_zone_name(domain_cfg)
-    return InitiativePlan(
-        next_step_type="ask_zone",
-        next_step_target=first_zone,
-        follow_up_prompt=_cn_prompt(
-            is_child,
-            is_classic,
-            regular="您想让我先推荐一个起点吗？",
-            child="要不要我先帮你选个起点？",
-            classic="可要我先为诸位择一处起点？",
-        ),
-        suggested_actions=dedupe_actions([
-            _action("推荐起点", f"请推荐一个适合开始了解的展区，比如{first_zone}。"),
-            _action("轻松逛一圈", "请给我安排一条轻松一点的参观路线。"),
-            _action("看代表展品", "请推荐一件最能代表这个馆的展品。"),
-        ]),
-    )
-
-
-def _opening_actions(
-    result: Dict[str, Any],
-    domain_cfg: Dict[str, Any],
-    is_child: bool,
-    is_classic: bool,
-) -> List[Dict[str, str]]:
-    actions: List[Dict[str, str]] = []
-    for zone in _unseen_primary_opening_zones(result, domain_cfg):
-        zone_name = str(zone.get("name", "")).strip()
-        if not zone_name:
-            continue
-        if is_child:
-            actions.append(_action(_short_zone_label(zone_name), f"带我去看看{zone_name}。"))
-        elif is_classic:
-            actions.append(_action(_short_zone_label(zone_name), f"请先带我看看{zone_name}。"))
-        else:
-            actions.append(_action(_short_zone_label(zone_name), f"带我去{zone_name}。"))
-    actions.append(
-        _action(
-            "你来推荐" if not is_classic else "烦请推荐",
-            "你推荐我先看哪里？" if is_child else "请推荐一个最适合先看的展区。",
-        )
-    )
-    return dedupe_actions(actions, limit=5)
-
-
-def _opening_actions_en(domain_cfg: Dict[str, Any]) -> List[Dict[str, str]]:
-    actions: List[Dict[str, str]] = []
-    for zone in _primary_opening_zones(domain_cfg):
-        zone_name = str(zone.get("name", "")).strip()
-        if not zone_name:
-            continue
-        actions.append(_action(_short_zone_label(zone_name), f"Take me to the {zone_name}." ))
-    actions.append(_action("Recommend one", "Recommend the best area to start with."))
-    return dedupe_actions(actions, limit=5)
-
-
-def _route_actions(
-    zone_name: str,
-    exhibits: List[Dict[str, Any]],
-    is_child: bool,
-    is_classic: bool,
-) -> List[Dict[str, str]]:
-    actions: List[Dict[str, str]] = []
-    if is_child:
-        actions.append(_action("直接带我去", "直接带我去下一个推荐点。"))
-        if exhibits:
-            actions.append(_action("到了先讲什么", f"到了{zone_name}先给我讲最好玩的展品。"))
-        else:
-            actions.append(_action("路上看什么", "路上有什么值得顺便看的？"))
-        actions.append(_action("走简单一点", "给我一条更简单的路线。"))
-        return dedupe_actions(actions)
-
-    if is_classic:
-        actions.append(_action("直接带我去", "请直接引我前往该展区。"))
-        if exhibits:
-            actions.append(_action("先讲代表展品", f"到了{zone_name}请先讲最值得一看的展品。"))
-        else:
-            actions.append(_action("路上顺便看什么", "途中还有何处值得顺便一观？"))
-        actions.append(_action("换条近一点的路线", "请换一条更近一些的路线。"))
-        return dedupe_actions(actions)
-
-    actions.append(_action("直接带我去", "直接带我去下一个推荐展区。"))
-    if exhibits:
-        actions.append(_action("先讲重点展品", f"到了{zone_name}先给我讲重点展品。"))
-    else:
-        actions.append(_action("路上顺便看什么", "从这里过去路上有什么值得顺便看的？"))
-    actions.append(_action("换条近一点的路线", "给我一条更近一些的路线。"))
-    return dedupe_actions(actions)
-
-
-def _route_actions_en(zone_name: str, exhibits: List[Dict[str, Any]]) -> List[Dict[str, str]]:
-    actions: List[Dict[str, str]] = [
-        _action("Guide me there", "Guide me to the next recommended stop."),
-    ]
-    if exhibits:
-        actions.append(
-            _action(
-                "Introduce the key exhibit",
-                f"When we arrive at the {zone_name}, introduce the key exhibit first.",
+                suggested_actions=dedupe_actions(actions, limit=max(1, len(unseen)) + 1),
             )
-        )
-    else:
-        actions.append(_action("Nearby highlight", "What should I notice on the way?"))
-    actions.append(_action("Short route", "Give me a shorter route from here."))
-    return dedupe_actions(actions)
-
-
-def _exhibit_actions(
-    exhibit_name: str,
-    next_unseen_exhibit: str,
-    next_unseen_zone: str,
-    guide_stage: str,
-    is_child: bool,
-    is_classic: bool,
-) -> List[Dict[str, str]]:
-    if guide_stage == STAGE_EXHIBIT_FOCUS:
-        if is_child:
-            return dedupe_actions([
-                _action("讲解细节", f"讲讲{exhibit_name}最特别的细节。"),
-                _action("下一个", _next_target_text(next_unseen_exhibit, next_unseen_zone)),
-            ], limit=2)
-        if is_classic:
+
+        return self._start_plans[persona]
+
+    def _filled(self, persona: str, key: str, name: str) -> Any:
+        """Pre-rendered template; names outside the catalogue are filled on the spot."""
+        rendered = self._rendered[persona].get((key, name))
+        if rendered is None:
+            template = self._templates[persona][key]
+            rendered = _fill(template, _SLOT.search(repr(template)).group(1), name)
+        return rendered
+
+    def _exhibit_actions(
+        self,
+        persona: str,
+        guide_stage: str,
+        exhibit_name: str,
+        next_unseen_exhibit: str,
+        next_unseen_zone: str,
+    ) -> Tuple[Action, ...]:
+        t = self._templates[persona]
+        fill = partial(self._filled, persona)
+        if guide_stage == STAGE_EXHIBIT_FOCUS:
+            if next_unseen_exhibit:
+                next_text = fill("goto_exhibit", next_unseen_exhibit)
+            elif next_unseen_zone:
+                next_text = fill("goto_zone", next_unseen_zone)
+            else:
+                next_text = "推荐下一件值得接着看的展品。"
             return dedupe_actions([
-                _action("讲解细节", f"请细讲{exhibit_name}最精妙之处。"),
-                _action("下一个", _next_target_text(next_unseen_exhibit, next_unseen_zone, classic=True)),
+                fill("focus_detail", exhibit_name),
+                ("下一个", next_text),
             ], limit=2)
-        return dedupe_actions([
-            _action("讲解细节", f"请继续讲讲{exhibit_name}的细节。"),
-            _action("下一个", _next_target_text(next_unseen_exhibit, next_unseen_zone)),
-        ], limit=2)
-
-    if is_child:
-        actions = [
-            _action("讲个小故事", f"给我讲讲{exhibit_name}背后的小故事。"),
-            _action("看细节", f"{exhibit_name}最值得看的细节是什么？"),
-        ]
-        if next_unseen_exhibit:
-            actions.append(_action(f"看{next_unseen_exhibit}", f"带我看看{next_unseen_exhibit}。"))
-        elif next_unseen_zone:
-            actions.append(_action("去下一站", f"带我去{next_unseen_zone}。"))
-        else:
-            actions.append(_action("下一个看什么", "接下来我还可以看什么？"))
-        return dedupe_actions(actions, limit=2 if guide_stage == STAGE_EXHIBIT_DETAIL else 3)
-    if is_classic:
-        actions = [
-            _action("细看此物", f"请再细讲{exhibit_name}的精妙之处。"),
-            _action("追溯背景", f"请讲讲{exhibit_name}所处的时代背景。"),
-        ]
+
+        actions = list(fill("exhibit_more", exhibit_name))
         if next_unseen_exhibit:
-            actions.append(_action(f"移步{next_unseen_exhibit}", f"请带我去看看{next_unseen_exhibit}。"))
+            actions.append(fill("exhibit_next", next_unseen_exhibit))
         elif next_unseen_zone:
-            actions.append(_action("继续前行", f"请引我前往{next_unseen_zone}。"))
+            actions.append(fill("exhibit_next_zone", next_unseen_zone))
         else:
-            actions.append(_action("继续前行", "接下来可引我去看何物？"))
+            actions.append(t["exhibit_no_next"])
         return dedupe_actions(actions, limit=2 if guide_stage == STAGE_EXHIBIT_DETAIL else 3)
-    actions = [
-        _action("继续讲细节", f"请继续讲讲{exhibit_name}的细节。"),
-        _action("讲历史背景", f"请介绍一下{exhibit_name}的历史背景。"),
-    ]
-    if next_unseen_exhibit:
-        actions.append(_action(f"下一件：{next_unseen_exhibit}", f"带我看看{next_unseen_exhibit}。"))
-    elif next_unseen_zone:
-        actions.append(_action("去下一站", f"带我去{next_unseen_zone}。"))
-    else:
-        actions.append(_action("推荐下一件", "再推荐一件值得接着看的展品。"))
-    return dedupe_actions(actions, limit=2 if guide_stage == STAGE_EXHIBIT_DETAIL else 3)
-
-
-def _zone_actions(
-    result: Dict[str, Any],
-    zone_name: str,
-    exhibits: List[Dict[str, Any]],
-    next_unseen_exhibit: str,
-    next_unseen_zone: str,
-    domain_cfg: Dict[str, Any],
-    is_child: bool,
-    is_classic: bool,
-) -> List[Dict[str, str]]:
-    actions: List[Dict[str, str]] = []
-    zone = _get_zone_by_name(domain_cfg, zone_name) if zone_name else {}
-    unseen_zone_exhibits = _unseen_zone_exhibits(result, domain_cfg, zone_name)
-    for exhibit in unseen_zone_exhibits:
-        target_name = str(exhibit.get("name", "")).strip()
-        if not target_name:
-            continue
-        if is_child:
-            actions.append(_action(_short_exhibit_label(target_name), f"带我看看{target_name}。"))
-        elif is_classic:
-            actions.append(_action(_short_exhibit_label(target_name), f"请重点介绍{target_name}。"))
-        else:
-            actions.append(_action(_short_exhibit_label(target_name), f"请介绍一下{target_name}。"))
-    if is_child:
-        actions.append(_action("你来推荐", f"你推荐我先看{zone_name}里还没看过的哪件展品？"))
-    elif is_classic:
-        actions.append(_action("你来推荐", f"请为我推荐{zone_name}里还没看过、最值得先看的一件。"))
-    else:
-        actions.append(_action("你来推荐", f"请推荐{zone_name}里还没看过、最值得先看的展品。"))
-    if not unseen_zone_exhibits and next_unseen_zone:
-        if is_child:
-            actions.insert(0, _action("去下一站", f"带我去{next_unseen_zone}。"))
-        elif is_classic:
-            actions.insert(0, _action("移步下一厅", f"请引我前往{next_unseen_zone}。"))
-        else:
-            actions.insert(0, _action("去下一站", f"带我去{next_unseen_zone}。"))
-    return dedupe_actions(actions, limit=max(1, len(unseen_zone_exhibits)) + 1)
-
-
-def _next_unseen_exhibit(
-    result: Dict[str, Any],
-    domain_cfg: Dict[str, Any],
-    zone_name: str,
-    current_exhibit: str,
-) -> str:
-    if not zone_name:
-        return ""
-    zone = _get_zone_by_name(domain_cfg, zone_name)
-    if not zone:
-        return ""
-    exhibit_progress = result.get("exhibit_progress", {}) or {}
-    visited_exhibits = set(result.get("visited_exhibits", []) or [])
-    for exhibit in zone.get("exhibits", []) or []:
-        exhibit_name = str(exhibit.get("name", "")).strip()
-        if not exhibit_name or exhibit_name == current_exhibit:
-            continue
-        status = str(exhibit_progress.get(exhibit_name, "unseen")).strip()
-        if exhibit_name not in visited_exhibits and status in {"", "unseen"}:
-            return exhibit_name
-    for exhibit in zone.get("exhibits", []) or []:
-        exhibit_name = str(exhibit.get("name", "")).strip()
-        if not exhibit_name or exhibit_name == current_exhibit:
-            continue
-        status = str(exhibit_progress.get(exhibit_name, "unseen")).strip()
-        if status in {"", "unseen"}:
-            return exhibit_name
-    return ""
 
 
-def _next_unseen_zone(result: Dict[str, Any], domain_cfg: Dict[str, Any], current_zone: str) -> str:
-    zone_progress = result.get("zone_progress", {}) or {}
-    visited_zones = set(result.get("visited_zones", []) or [])
-    for zone in domain_cfg.get("zones", []):
-        zone_name = str(zone.get("name", "")).strip()
-        if not zone_name or zone_name == current_zone or zone.get("category") == "facility":
-            continue
-        status = str(zone_progress.get(zone_name, "unseen")).strip()
-        if zone_name not in visited_zones and status in {"", "unseen"}:
-            return zone_name
-    for zone in domain_cfg.get("zones", []):
-        zone_name = str(zone.get("name", "")).strip()
-        if not zone_name or zone_name == current_zone or zone.get("category") == "facility":
-            continue
-        status = str(zone_progress.get(zone_name, "unseen")).strip()
-        if status in {"", "unseen"}:
-            return zone_name
+def persona_class(persona_id: str) -> str:
+    if persona_id.startswith("eu_"):
+        return PERSONA_ENGLISH
+    if persona_id in _CHILD_PERSONAS:
+        return PERSONA_CHILD
+    if persona_id in _CLASSIC_PERSONAS:
+        return PERSONA_CLASSIC
+    return PERSONA_REGULAR
+
+
+def intent_bucket(user_intent: str, persona: str) -> str:
+    """The only distinctions the planner draws on user_intent."""
+    if user_intent == "开始导览":
+        return INTENT_START
+    keywords = _ROUTE_INTENT_KEYWORDS_EN if persona == PERSONA_ENGLISH else _ROUTE_INTENT_KEYWORDS
+    if any(keyword in user_intent for keyword in keywords):
+        return INTENT_ROUTE
     return ""
 
 
-def _primary_opening_zones(domain_cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
-    preferred_ids = [
-        "zone_chinese_origins",
-        "zone_calligraphy_painting",
-        "zone_world_classics",
-        "zone_children_exploration",
-    ]
-    zone_map = {str(zone.get("id", "")): zone for zone in domain_cfg.get("zones", [])}
-    result: List[Dict[str, Any]] = []
-    for zone_id in preferred_ids:
-        zone = zone_map.get(zone_id)
-        if zone:
-            result.append(zone)
-    return result
-
-
-def _unseen_primary_opening_zones(result: Dict[str, Any], domain_cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
-    unseen_names = {
-        str(zone.get("name", "")).strip()
-        for zone in _primary_opening_zones(domain_cfg)
-        if str(zone.get("name", "")).strip()
-    }
-    visited_zones = set(result.get("visited_zones", []) or [])
-    zone_progress = result.get("zone_progress", {}) or {}
-    unseen: List[Dict[str, Any]] = []
-    fallback: List[Dict[str, Any]] = []
-    for zone in _primary_opening_zones(domain_cfg):
-        zone_name = str(zone.get("name", "")).strip()
-        if not zone_name:
+def merge_follow_up_prompt(tts_text: str, follow_up_prompt: str) -> str:
+    text = str(tts_text or "").strip()
+    prompt = str(follow_up_prompt or "").strip()
+    if not text or not prompt:
+        return text
+    if _has_question(text) or prompt in text:
+        return text
+    sep = " " if _is_english_text(text) else ""
+    return f"{text}{sep}{prompt}".strip()
+
+
+def dedupe_actions(actions: Sequence[Action], limit: int = 3) -> Tuple[Action, ...]:
+    seen: set[Action] = set()
+    result: List[Action] = []
+    for label, text in actions:
+        label = str(label).strip()
+        text = str(text).strip()
+        if not label or not text:
             continue
-        fallback.append(zone)
-        status = str(zone_progress.get(zone_name, "unseen")).strip()
-        if zone_name not in visited_zones and status in {"", "unseen"}:
-            unseen.append(zone)
-    return unseen or fallback
-
-
-def _unseen_zone_exhibits(
-    result: Dict[str, Any],
-    domain_cfg: Dict[str, Any],
-    zone_name: str,
-) -> List[Dict[str, Any]]:
-    zone = _get_zone_by_name(domain_cfg, zone_name)
-    if not zone:
-        return []
-    exhibit_progress = result.get("exhibit_progress", {}) or {}
-    visited_exhibits = set(result.get("visited_exhibits", []) or [])
-    unseen: List[Dict[str, Any]] = []
-    for exhibit in zone.get("exhibits", []) or []:
-        exhibit_name = str(exhibit.get("name", "")).strip()
-        if not exhibit_name:
+        if (label, text) in seen:
             continue
-        status = str(exhibit_progress.get(exhibit_name, "unseen")).strip()
-        if exhibit_name not in visited_exhibits and status in {"", "unseen"}:
-            unseen.append(exhibit)
-    return unseen
+        seen.add((label, text))
+        result.append((label, text))
+        if len(result) >= limit:
+            break
+    return tuple(result)
+
+
+_SLOT = re.compile(r"\{(zone|exhibit|next)\}")
+
+
+def _prerender(
+    templates: Dict[str, Any],
+    zone_names: Sequence[str],
+    exhibit_names: Sequence[str],
+) -> Dict[Tuple[str, str], Any]:
+    """
+    Every slotted template filled with every catalogue name it can take:
+    (template key, name) → str / Action / tuple of Actions. {zone} takes
+    zone names, {exhibit} / {next} take exhibit names.
+    """
+    rendered: Dict[Tuple[str, str], Any] = {}
+    for key, template in templates.items():
+        slot = _SLOT.search(repr(template))
+        if slot is None:
+            continue
+        names = zone_names if slot.group(1) == "zone" else exhibit_names
+        for name in names:
+            rendered[(key, name)] = _fill(template, slot.group(1), name)
+    return rendered
+
+
+def _fill(template: Any, slot: str, name: str) -> Any:
+    if isinstance(template, str):
+        return template.format(**{slot: name})
+    return tuple(_fill(part, slot, name) for part in template)
 
 
 def _short_zone_label(zone_name: str) -> str:
@@ -624,58 +578,20 @@ def _short_exhibit_label(exhibit_name: str) -> str:
     return exhibit_name
 
 
-def _next_target_text(next_unseen_exhibit: str, next_unseen_zone: str, classic: bool = False) -> str:
-    if next_unseen_exhibit:
-        return f"带我看看{next_unseen_exhibit}。" if not classic else f"请带我去看看{next_unseen_exhibit}。"
-    if next_unseen_zone:
-        return f"带我去{next_unseen_zone}。" if not classic else f"请引我前往{next_unseen_zone}。"
-    return "推荐下一件值得接着看的展品。"
-
-
-def _field(result: Dict[str, Any], key: str) -> str:
+def _field(result: Any, key: str) -> str:
     return str(result.get(key, "")).strip()
 
 
-def _get_zone_by_name(domain_cfg: Dict[str, Any], zone_name: str) -> Dict[str, Any]:
-    for zone in domain_cfg.get("zones", []):
-        if zone.get("name") == zone_name:
-            return zone
-    return {}
-
-
-def _get_first_primary_zone_name(domain_cfg: Dict[str, Any]) -> str:
+def _first_primary_zone_name(domain_cfg: Dict[str, Any]) -> str:
     for zone in domain_cfg.get("zones", []):
         if zone.get("category") != "facility":
             return str(zone.get("name", "")).strip() or "中华文明源流展区"
     return "中华文明源流展区"
 
 
-def _action(label: str, text: str) -> Dict[str, str]:
-    return {"label": label, "text": text}
-
-
-def _persona_requires_english(persona_id: str) -> bool:
-    return persona_id.startswith("eu_")
-
-
 def _has_question(text: str) -> bool:
     return any(mark in text for mark in ["?", "？"])
 
 
 def _is_english_text(text: str) -> bool:
     return not any("\u4e00" <= ch <= "\u9fff" for ch in text)
-
-
-def _cn_prompt(
-    is_child: bool,
-    is_classic: bool,
-    *,
-    regular: str,
-    child: str,
-    classic: str,
-) -> str:
-    if is_child:
-        return child
-    if is_classic:
-        return classic
-    return regular
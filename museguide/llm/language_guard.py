@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict
+
+from museguide.llm.stream_parser import GuideJSONStreamParser
+
+CJK_PATTERN = re.compile("[\u4e00-\u9fff]")
+
+
+class LanguageGuardTripped(RuntimeError):
+    """Raised when an English-persona reply (streamed or complete) has CJK in tts_text."""
+
+    def __init__(self, fields: Dict[str, Any]):
+        super().__init__("CJK detected in tts_text of an English-only reply")
+        self.fields = fields
+
+
+def contains_cjk(text: str) -> bool:
+    return bool(CJK_PATTERN.search(text or ""))
+
+
+def cjk_in_tts_text(parser: GuideJSONStreamParser) -> bool:
+    """Stream guard: trips on the first CJK character of tts_text, finished or not."""
+    if parser.partial_key == "tts_text":
+        return contains_cjk(parser.partial_value)
+    return contains_cjk(str(parser.fields.get("tts_text", "") or ""))
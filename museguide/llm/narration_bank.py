@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from museguide.llm.guide_stage import STAGE_EXHIBIT_OVERVIEW, STAGE_ZONE_OVERVIEW
+
+NARRATION_BANK_PATH = Path(__file__).parents[1] / "data" / "narration_bank.sqlite3"
+
+NARRATION_KINDS = (STAGE_ZONE_OVERVIEW, STAGE_EXHIBIT_OVERVIEW)
+
+# user text used when pre-generating each kind
+NARRATION_PROMPTS = {
+    STAGE_ZONE_OVERVIEW: "请介绍一下{target}的整体看点。",
+    STAGE_EXHIBIT_OVERVIEW: "请介绍一下{target}。",
+}
+NARRATION_PROMPTS_EN = {
+    STAGE_ZONE_OVERVIEW: "What is the highlight of the {target}?",
+    STAGE_EXHIBIT_OVERVIEW: "Tell me about the {target}.",
+}
+
+# utterances that ask for a first overview: "<prefix><target><suffix>"
+_ZONE_PREFIXES = (
+    "请介绍一下", "介绍一下", "请讲讲", "给我讲讲", "讲讲", "带我看看", "带我去看看", "请先带我看看",
+    "what is the highlight of the ", "tell me about the ",
+)
+_ZONE_SUFFIXES = ("", "的整体看点", "有什么好看", "有什么看点", "有什么")
+_EXHIBIT_PREFIXES = (
+    "请介绍一下", "介绍一下", "请重点介绍", "请讲讲", "给我讲讲", "讲讲", "带我看看", "请带我去看看",
+    "tell me about the ", "introduce the ",
+)
+_EXHIBIT_SUFFIXES = ("", "吧")
+_TRAILING_PUNCT = re.compile(r"[\s。！？!?.，,~～]+$")
+
+
+class NarrationBank:
+    """
+    On-disk key-value store of pre-generated overview narrations.
+
+    Key: (persona_id, kind, target, variant), kind being 展厅介绍 / 展品介绍 and
+    target a zone or exhibit name. Value: the guide JSON as returned by
+    parse_llm_json. The server opens it read-only and never creates it; the
+    batch script `museguide/scripts/build_narration_bank.py` fills it.
+    """
+
+    def __init__(self, path: Path = NARRATION_BANK_PATH, *, readonly: bool = True):
+        self.path = Path(path)
+        self._readonly = readonly
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._rotation: Dict[Tuple[str, str, str], int] = {}
+
+    @property
+    def available(self) -> bool:
+        return self._connect() is not None
+
+    def variants(self, persona_id: str, kind: str, target: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        if conn is None:
+            return []
+        with self._lock:
+            rows = conn.execute(
+                "SELECT data FROM narrations WHERE persona_id = ? AND kind = ? AND target = ? ORDER BY variant",
+                (persona_id, kind, target),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def pick(self, persona_id: str, kind: str, target: str, rotate: bool = True) -> Dict[str, Any] | None:
+        """Return one stored variant; with rotate, successive visitors hear them in turn."""
+        variants = self.variants(persona_id, kind, target)
+        if not variants:
+            return None
+        index = 0
+        if rotate:
+            key = (persona_id, kind, target)
+            with self._lock:
+                index = self._rotation.get(key, 0)
+                self._rotation[key] = index + 1
+        return dict(variants[index % len(variants)])
+
+    def has(self, persona_id: str, kind: str, target: str, variant: int) -> bool:
+        conn = self._connect()
+        if conn is None:
+            return False
+        with self._lock:
+            row = conn.execute(
+                "SELECT 1 FROM narrations WHERE persona_id = ? AND kind = ? AND target = ? AND variant = ?",
+                (persona_id, kind, target, variant),
+            ).fetchone()
+        return row is not None
+
+    def put(self, persona_id: str, kind: str, target: str, variant: int, data: Dict[str, Any]) -> None:
+        conn = self._connect()
+        if conn is None:
+            raise RuntimeError(f"narration bank not writable: {self.path}")
+        with self._lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO narrations (persona_id, kind, target, variant, data, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (persona_id, kind, target, variant, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._conn is not None:
+            return self._conn
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+            if self._readonly:
+                if not self.path.exists():
+                    return None
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS narrations ("
+                    "persona_id TEXT NOT NULL, kind TEXT NOT NULL, target TEXT NOT NULL, "
+                    "variant INTEGER NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL, "
+                    "PRIMARY KEY (persona_id, kind, target, variant))"
+                )
+                conn.commit()
+            self._conn = conn
+            return conn
+
+
+def match_overview_request(
+    text: str,
+    zone_names: List[str],
+    exhibit_names: Dict[str, str],
+) -> Tuple[str, str]:
+    """
+    Recognise a plain first-overview request such as "请介绍一下{展品}" or
+    "带我看看{展区}". exhibit_names maps names and aliases to the canonical
+    exhibit name. Returns (kind, target) or ("", "").
+    """
+    value = _TRAILING_PUNCT.sub("", str(text or "").strip().lower())
+    if not value:
+        return "", ""
+    for prefix in _EXHIBIT_PREFIXES:
+        if not value.startswith(prefix):
+            continue
+        rest = value[len(prefix):]
+        for suffix in _EXHIBIT_SUFFIXES:
+            if suffix and not rest.endswith(suffix):
+                continue
+            name = rest[: len(rest) - len(suffix)] if suffix else rest
+            if name in exhibit_names:
+                return STAGE_EXHIBIT_OVERVIEW, exhibit_names[name]
+    for prefix in _ZONE_PREFIXES:
+        if not value.startswith(prefix):
+            continue
+        rest = value[len(prefix):]
+        for zone_name in zone_names:
+            lowered = zone_name.lower()
+            if rest.startswith(lowered) and rest[len(lowered):] in _ZONE_SUFFIXES:
+                return STAGE_ZONE_OVERVIEW, zone_name
+    return "", ""
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+
+class OccupancyIndex:
+    """
+    Live head count per zone / exhibit, maintained incrementally by
+    ContextStore: every session update moves the session's single position
+    (one decrement, one increment) and TTL expiry removes it, so reads never
+    scan the sessions. Only catalogue names are counted; a session without
+    a current zone is not placed anywhere. Not locked itself — ContextStore
+    calls it under its own lock.
+    """
+
+    def __init__(self) -> None:
+        self._zones: Dict[str, int] = {}
+        self._exhibits: Dict[str, int] = {}
+        self._where: Dict[str, Tuple[str, str]] = {}
+
+    def move(self, key: str, zone: str, exhibit: str) -> None:
+        position = (zone, exhibit if zone else "")
+        previous = self._where.get(key)
+        if previous == position:
+            return
+        if previous is not None:
+            self._remove(previous)
+        if not zone:
+            self._where.pop(key, None)
+            return
+        self._where[key] = position
+        self._zones[zone] = self._zones.get(zone, 0) + 1
+        if exhibit:
+            self._exhibits[exhibit] = self._exhibits.get(exhibit, 0) + 1
+
+    def leave(self, key: str) -> None:
+        previous = self._where.pop(key, None)
+        if previous is not None:
+            self._remove(previous)
+
+    def zone_counts(self) -> Dict[str, int]:
+        return dict(self._zones)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "visitors": len(self._where),
+            "zones": dict(self._zones),
+            "exhibits": dict(self._exhibits),
+        }
+
+    def _remove(self, position: Tuple[str, str]) -> None:
+        zone, exhibit = position
+        _decrement(self._zones, zone)
+        if exhibit:
+            _decrement(self._exhibits, exhibit)
+
+
+def _decrement(counts: Dict[str, int], name: str) -> None:
+    value = counts.get(name, 0) - 1
+    if value > 0:
+        counts[name] = value
+    else:
+        counts.pop(name, None)
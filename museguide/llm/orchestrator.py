@@ -1,22 +1,45 @@
 import json
 import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Iterator
 
 import yaml
-from volcenginesdkarkruntime import Ark
 
-from museguide.llm.initiative import build_initiative_plan, merge_follow_up_prompt
+from museguide.llm.admission import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_SPECULATIVE,
+    AdmissionRejected,
+    build_admission_controller,
+)
+from museguide.llm.backend import LLMBackendError, LLMCancelled, build_llm_backend
+from museguide.llm.cascade import GenerationProfile, build_generation_profiles, classify_turn
+from museguide.llm.circuit_breaker import CLOSED, build_circuit_breaker
+from museguide.llm.initiative import InitiativePlanner, merge_follow_up_prompt
 from museguide.llm.context_store import ContextStore
-from museguide.llm.prompt_builder import (
-    build_base_system_prompt,
-    build_system_prompt,
-    build_tour_progress_context,
+from museguide.llm.degraded import DegradedResponder
+from museguide.llm.exhibit_knowledge import ExhibitKnowledgeStore, build_knowledge_prompt
+from museguide.llm.language_guard import LanguageGuardTripped, cjk_in_tts_text, contains_cjk
+from museguide.llm.config_registry import ConfigRegistry, ConfigSnapshot
+from museguide.llm.progress import TourProgress
+from museguide.llm.prompt_builder import build_scoped_domain_prior_prompt, build_tour_progress_context
+from museguide.llm.prompt_bundle import PromptBundle, build_prompt_bundle
+from museguide.llm.narration_bank import (
+    NARRATION_PROMPTS,
+    NARRATION_PROMPTS_EN,
+    NarrationBank,
+    match_overview_request,
 )
-from museguide.llm.response_parser import parse_llm_json
+from museguide.llm.response_parser import fill_llm_json_defaults, parse_llm_json
+from museguide.llm.response_schema import build_text_format
+from museguide.llm.speculation import SpeculativeCache, request_fingerprint
+from museguide.llm.stream_parser import GuideJSONStreamParser
+from museguide.llm.turn_result import TurnContext, TurnPipeline, TurnResult, TurnStage
 from museguide.llm.tour_state_manager import (
-    advance_exhibit_status,
-    advance_zone_status,
     collect_user_interests,
     infer_exhibit_progress_status,
     infer_tour_event,
@@ -66,6 +89,23 @@ def load_personas() -> dict:
     return data.get("personas", {})
 
 
+AFFIRMATION_PROBE = "好的"
+BREAKER_PROBE_TEXT = "ping"
+ENGLISH_FALLBACK_TTS = "Hello, I am your museum guide. What would you like to explore today?"
+# 当前轮的取消令牌：run_turn 设置，_run_llm 转交给 backend（预计算线程不受影响）
+_TURN_CANCEL: ContextVar[threading.Event | None] = ContextVar("turn_cancel", default=None)
+# 只有明确点名结构化输出参数的 400 才触发回退（其余 400 多为 prompt / 参数问题，照常上抛）
+_RESPONSE_FORMAT_MARKERS = ("response_format", "json_schema")
+
+
+def _rejects_response_format(error: LLMBackendError) -> bool:
+    return any(
+        marker in str(cause).lower()
+        for _, cause in error.errors
+        for marker in _RESPONSE_FORMAT_MARKERS
+    )
+
+
 # =============================
 # Orchestrator
 # =============================
@@ -77,30 +117,126 @@ class LLMOrchestrator:
         → 翻译为前端 / 视频可用的结构
     """
 
-    def __init__(self):
+    def __init__(self, config: ConfigRegistry | None = None):
         # configs
         self.llm_cfg = load_llm_config()
-        self.domain_cfg = load_domain_prior()
-        self.guide_states = load_guide_states()
+        self.config = config or ConfigRegistry()
         self.secrets = load_secrets()
-        self.personas = load_personas()
         self.default_persona_id = "woman_demo"
-        self.context_store = ContextStore()
+        self.context_store = ContextStore(
+            compact_every=int(self.llm_cfg.get("tour_memory_every", 3)),
+            memory_max_chars=int(self.llm_cfg.get("tour_memory_max_chars", 360)),
+        )
 
-        # LLM client
-        self.client = Ark(
-            base_url=self.llm_cfg["base_url"],
-            api_key=self.secrets["doubao"]["api_key"],
-            timeout=self.llm_cfg.get("timeout", 10),
+        # LLM backend：按优先级的 provider 列表 + 截止时间 + 对冲请求
+        self.backend = build_llm_backend(self.llm_cfg, self.secrets)
+        # 结构化输出回退按模型记录、到期恢复（模型 -> 恢复时刻），单个接入点拒绝不影响其他模型
+        self._response_format_disabled: Dict[str, float] = {}
+        self._response_format_retry_after = float(self.llm_cfg.get("response_format_retry_after", 600.0))
+        # 模型级联：本地首轮分类预测阶段，按阶段选模型 / 输出上限 / prompt 切片
+        self.generation_profiles = build_generation_profiles(self.llm_cfg)
+        # 熔断：错误率 / 慢调用率超阈值时打开，期间走降级模板；半开时后台探活
+        self.breaker = build_circuit_breaker(self.llm_cfg, self._probe_llm)
+        # 准入：全局 / 单展台并发上限，实时轮次 > 预计算 > 离线批量；实时轮次排队超时回“请稍等”
+        self.admission = build_admission_controller(self.llm_cfg)
+
+        # ===== 配置快照：base prompt / schema / 索引随快照一次构建，文件变更时原子切换 =====
+        self._snapshot: ConfigSnapshot = self.config.snapshot()
+        self._config_lock = threading.Lock()
+        self.context_store.set_progress_index(self._snapshot.progress_index)
+        # 主动推荐：按（角色类、阶段、展厅、展品、意图、当前展厅进度签名）缓存计划
+        self.initiative_planner = InitiativePlanner(
+            self._snapshot.domain_cfg,
+            self._snapshot.venue_graph,
+            self._snapshot.recommender,
+            max_entries=int(self.llm_cfg.get("initiative_cache_size", 1024)),
+            ttl=float(self.llm_cfg.get("initiative_cache_ttl", 60.0)),
         )
 
-        # ===== system prompt（一次性构建）=====
-        self.base_system_prompt = build_base_system_prompt(self.domain_cfg, self.guide_states)
+        # ===== 展品资料库：深入讲解时按 focus_exhibit 检索 top-k 段落 =====
+        self.knowledge = ExhibitKnowledgeStore()
+        self.knowledge.set_domain(self._snapshot.domain_cfg)
+
+        # ===== 离线讲解库：首次展厅/展品介绍直接取预生成结果 =====
+        self.narrations = NarrationBank()
+        self.degraded_responder = DegradedResponder(self.narrations)
+
+        # ===== 推荐动作预计算（用户确认时直接提交）=====
+        self.speculation = SpeculativeCache()
+
+        # ===== 生成之后的各阶段：原地修改 TurnResult，逐段计时（pipeline.hooks 可挂性能采集）=====
+        self.pipeline = TurnPipeline([
+            TurnStage("tour_state", self._apply_tour_state),
+            TurnStage("video_mapping", self._apply_video_mapping),
+            TurnStage("initiative_plan", self._apply_initiative_plan),
+            TurnStage("persist", self._persist_recommendation_state),
+        ])
+
+        # ===== 按角色预渲染 prompt bundle；快照切换时重建 =====
+        self.prompt_bundles: Dict[str, PromptBundle] = {}
+        self._rebuild_prompt_bundles()
 
         if self.llm_cfg.get("debug"):
             print("=== SYSTEM PROMPT ===")
             print(self.base_system_prompt)
             print("=" * 60)
+            print("=== PROMPT BUNDLES (estimated tokens) ===")
+            for persona_id, bundle in self.prompt_bundles.items():
+                print(f"{persona_id}: prefix={bundle.prefix_tokens} base={bundle.base_tokens}")
+            print("=" * 60)
+
+    # -------------------------
+    # Config snapshot
+    # -------------------------
+
+    @property
+    def domain_cfg(self) -> Dict[str, Any]:
+        return self._snapshot.domain_cfg
+
+    @property
+    def guide_states(self) -> Dict[str, Any]:
+        return self._snapshot.guide_states
+
+    @property
+    def personas(self) -> Dict[str, Any]:
+        return self._snapshot.personas
+
+    @property
+    def base_system_prompt(self) -> str:
+        return self._snapshot.base_system_prompt
+
+    @property
+    def base_system_prompt_en(self) -> str:
+        return self._snapshot.base_system_prompt_en
+
+    @property
+    def response_schema(self) -> Dict[str, Any]:
+        return self._snapshot.response_schema
+
+    @property
+    def response_schema_en(self) -> Dict[str, Any]:
+        return self._snapshot.response_schema_en
+
+    def _sync_config(self) -> None:
+        snapshot = self.config.snapshot()
+        if snapshot.version == self._snapshot.version:
+            return
+        with self._config_lock:
+            if snapshot.version == self._snapshot.version:
+                return
+            self._snapshot = snapshot
+            self.knowledge.set_domain(snapshot.domain_cfg)
+            self.context_store.set_progress_index(snapshot.progress_index)
+            self.initiative_planner = InitiativePlanner(
+                snapshot.domain_cfg,
+                snapshot.venue_graph,
+                snapshot.recommender,
+                max_entries=int(self.llm_cfg.get("initiative_cache_size", 1024)),
+                ttl=float(self.llm_cfg.get("initiative_cache_ttl", 60.0)),
+            )
+            self._rebuild_prompt_bundles()
+        if self.llm_cfg.get("debug"):
+            print(f"=== CONFIG SNAPSHOT v{snapshot.version} ACTIVE, prompt bundles rebuilt ===")
 
     # -------------------------
     # Public API
@@ -112,36 +248,447 @@ class LLMOrchestrator:
         persona_id: str = "woman_demo",
         session_id: str | None = None,
     ) -> Dict[str, Any]:
+        return self.run_turn(user_text, persona_id, session_id).to_dict()
+
+    def run_turn(
+        self,
+        user_text: str,
+        persona_id: str = "woman_demo",
+        session_id: str | None = None,
+        cancel: threading.Event | None = None,
+    ) -> TurnResult:
+        """
+        cancel：调用方的取消令牌（新输入顶替本轮、客户端断开）。置位后进行中的
+        LLM 调用立即中止并抛出 LLMCancelled；生成已结束时也不再写会话状态。
+        """
+        token = _TURN_CANCEL.set(cancel)
+        try:
+            return self._run_turn(user_text, persona_id, session_id, cancel)
+        finally:
+            _TURN_CANCEL.reset(token)
+
+    def _run_turn(
+        self,
+        user_text: str,
+        persona_id: str,
+        session_id: str | None,
+        cancel: threading.Event | None,
+    ) -> TurnResult:
+        self._sync_config()
         session_key = session_id or ""
         prior_state = self.context_store.get_session_state(session_key, persona_id)
         effective_user_text = self._resolve_user_text(user_text, prior_state)
+        turn = TurnContext(
+            effective_user_text, persona_id, session_key, prior_state, raw_user_text=str(user_text or "").strip()
+        )
+        if effective_user_text == str(user_text or "").strip():
+            # 不是对推荐动作的确认：丢弃预计算结果
+            self.speculation.discard(session_key, persona_id)
+
+        skip: tuple[str, ...] = ()
         if self._is_start_command(effective_user_text):
             result = self._build_start_response(persona_id)
-            result = self._apply_tour_state(result, effective_user_text, persona_id, session_key, prior_state)
-            result = self._apply_video_mapping(result, persona_id)
-            result = self._apply_initiative_plan(result, persona_id)
-            self._persist_recommendation_state(session_key, persona_id, result)
-            return result
-        if self._should_transition_out_of_completed_zone(effective_user_text, prior_state):
+        elif self._should_transition_out_of_completed_zone(effective_user_text, prior_state):
             result = self._build_completed_zone_transition_response(persona_id, prior_state)
-            result = self._apply_tour_state(result, effective_user_text, persona_id, session_key, prior_state)
-            result = self._apply_video_mapping(result, persona_id)
-            self._persist_recommendation_state(session_key, persona_id, result)
-            return result
+            skip = ("initiative_plan",)
+        else:
+            started = time.perf_counter()
+            try:
+                llm_data, degraded = self._turn_llm_data(user_text, turn)
+            except AdmissionRejected as rejected:
+                return self._build_busy_response(turn, rejected)
+            elapsed = time.perf_counter() - started
+            result = self._translate_state_with_persona(llm_data, persona_id)
+            result.degraded = degraded
+            self.pipeline.record(result, "generate", elapsed)
+
+        if cancel is not None and cancel.is_set():
+            raise LLMCancelled("turn cancelled before state update")
+        self.pipeline.run(result, turn, skip=skip)
+        if self.llm_cfg.get("debug"):
+            print("=== TURN STAGES (ms) ===", result.stage_ms)
+        self._schedule_speculation(session_key, persona_id)
+        return result
+
+    def plan_route(
+        self,
+        session_id: str | None = None,
+        persona_id: str = "woman_demo",
+        *,
+        target: str = "",
+        origin: str = "",
+    ) -> Dict[str, Any]:
+        """
+        路线查询（查表，不调模型）。给出 target（展区名 / id / 展品名）时返回
+        从起点到该展区的最短路线；否则返回覆盖所有未看展区和展品的参观顺序。
+        起点：origin → 会话当前展区 → 入口。各展区附带实时人数，
+        完整路线的首站会避开拥挤展厅。
+        """
+        self._sync_config()
+        venue = self._snapshot.venue_graph
+        state = self.context_store.get_session_state(session_id or "", persona_id)
+        visitors = self.context_store.zone_occupancy()
+        start = (
+            self._resolve_route_zone(origin)
+            or self._resolve_route_zone(str(state.get("current_zone", "")))
+            or venue.entrance
+        )
+
+        if target:
+            zone_name = self._resolve_route_zone(target)
+            if not zone_name:
+                return {"from": start, "to": "", "error": f"unknown target: {target}"}
+            seconds = venue.seconds(start, zone_name) if zone_name != start else 0.0
+            return {
+                "from": start,
+                "to": zone_name,
+                "floor": venue.zone_floor(zone_name),
+                "visitors": visitors.get(zone_name, 0),
+                "seconds": seconds if seconds != float("inf") else None,
+                "legs": [asdict(leg) for leg in venue.route(start, zone_name)],
+            }
+
+        progress: TourProgress = state["progress"]
+        stops = []
+        for zone in self.domain_cfg.get("zones", []):
+            zone_name = str(zone.get("name", "")).strip()
+            if not zone_name or zone.get("category") == "facility":
+                continue
+            unseen = progress.unseen_exhibits(zone_name)
+            if unseen or not progress.zone_touched(zone_name):
+                stops.append((zone_name, unseen))
+        plan = venue.plan_tour(start, stops, venue.crowd_penalty(visitors))
+        return {
+            "from": start,
+            "next_stop": plan.stops[0].zone if plan.stops else "",
+            "seconds": plan.total_seconds,
+            "stops": [{**asdict(stop), "visitors": visitors.get(stop.zone, 0)} for stop in plan.stops],
+            "legs": [asdict(leg) for leg in venue.route(start, plan.stops[0].zone)] if plan.stops else [],
+        }
+
+    def occupancy(self) -> Dict[str, Any]:
+        """
+        实时人数：按会话当前展区 / 展品增量维护的计数，读取不扫描会话。
+        展区按目录顺序列出，附舒适人数和是否拥挤。
+        """
+        self._sync_config()
+        venue = self._snapshot.venue_graph
+        counts = self.context_store.occupancy()
+        zones = []
+        for zone_name in self._snapshot.progress_index.zone_names:
+            visitors = counts["zones"].get(zone_name, 0)
+            capacity = venue.capacity(zone_name)
+            zones.append({
+                "zone": zone_name,
+                "floor": venue.zone_floor(zone_name),
+                "visitors": visitors,
+                "capacity": capacity,
+                "crowded": visitors > capacity,
+            })
+        return {"visitors": counts["visitors"], "zones": zones, "exhibits": counts["exhibits"]}
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _build_busy_response(self, turn: TurnContext, rejected: AdmissionRejected) -> TurnResult:
+        """
+        排队超时的快速应答：“请稍等”模板，结果带回原会话状态，不写会话、
+        不做主动推荐和预计算，访客重说一次即可正常作答。
+        """
+        print(f"=== ADMISSION SHED, BUSY RESPONSE === {rejected}")
+        llm_data = self.degraded_responder.busy(
+            turn.prior_state,
+            self._snapshot.domain_index,
+            english=self._persona_requires_english(turn.persona_id),
+        )
+        result = self._translate_state_with_persona(llm_data, turn.persona_id)
+        result.degraded = True
+        result.apply_session_state(turn.prior_state)
+        result.tour_event = ""
+        result.reply_text = result.tts_text
+        result.follow_up_text = ""
+        self.pipeline.record(result, "admission_wait", rejected.waited)
+        self.pipeline.run(result, turn, skip=("tour_state", "initiative_plan", "persist"))
+        return result
 
+    def _crowd_penalty(self) -> Dict[str, float]:
+        return self._snapshot.venue_graph.crowd_penalty(self.context_store.zone_occupancy())
+
+    def _resolve_route_zone(self, ref: str) -> str:
+        ref = str(ref or "").strip()
+        if not ref:
+            return ""
+        if ref in self._snapshot.zone_by_name:
+            return ref
+        zone = self._snapshot.zone_by_id.get(ref)
+        if zone:
+            return str(zone.get("name", "")).strip()
+        return self._snapshot.domain_index.zone_of_exhibit.get(ref, "")
+
+    def _turn_llm_data(self, user_text: str, turn: TurnContext) -> tuple[Dict[str, Any], bool]:
+        """
+        本轮的 LLM 结构化结果：讲解库 → 预计算 → 实时生成 → 降级模板。
+        返回 (llm_data, degraded)。
+        """
+        effective_user_text = turn.user_text
+        persona_id = turn.persona_id
+        session_key = turn.session_key
+        prior_state = turn.prior_state
+        llm_data = self._serve_narration(user_text, effective_user_text, persona_id, prior_state)
+        if llm_data is not None:
+            self.speculation.discard(session_key, persona_id)
+            return llm_data, False
+
+        profile = self._select_profile(user_text, prior_state)
+        context_text = self._build_turn_context(
+            effective_user_text, session_key, persona_id, prior_state, profile
+        )
+        if effective_user_text != str(user_text or "").strip():
+            # 确认上一轮推荐：命中预先算好的结果则直接提交
+            llm_data = self.speculation.take(
+                session_key,
+                persona_id,
+                self._speculation_fingerprint(effective_user_text, context_text, profile),
+            )
+            if llm_data is not None:
+                if self.llm_cfg.get("debug"):
+                    print("=== SPECULATION HIT ===", self.speculation.stats())
+                return llm_data, False
+        try:
+            return self._generate_turn(
+                effective_user_text, persona_id, context_text, profile, kiosk=session_key
+            ), False
+        except LLMBackendError as error:
+            print(f"=== LLM UNAVAILABLE, DEGRADED RESPONSE === {error}")
+            return self.degraded_responder.respond(
+                effective_user_text,
+                persona_id,
+                prior_state,
+                self._snapshot.domain_index,
+                english=self._persona_requires_english(persona_id),
+            ), True
+
+    def _build_turn_context(
+        self,
+        effective_user_text: str,
+        session_key: str,
+        persona_id: str,
+        prior_state: Dict[str, Any],
+        profile: GenerationProfile,
+    ) -> str:
         recent_dialogue = self.context_store.get_recent_dialogue(
             session_key,
             persona_id,
-            max_turns=3,
+            max_turns=profile.recent_turns,
         )
-        progress_context = build_tour_progress_context(
+        context_text = build_tour_progress_context(
             state=prior_state,
             user_text=effective_user_text,
             domain_cfg=self.domain_cfg,
             normalize_text=normalize_text,
             recent_dialogue=recent_dialogue,
         )
-        system_prompt = self._build_system_prompt(persona_id, context_text=progress_context)
+        if self._domain_retrieval_enabled() and profile.domain_prior:
+            context_text = "\n\n".join(filter(None, [
+                self._build_domain_context(effective_user_text, prior_state),
+                context_text,
+            ]))
+        if not profile.knowledge:
+            return context_text
+        return "\n\n".join(filter(None, [
+            context_text,
+            self._build_knowledge_context(effective_user_text, prior_state),
+        ]))
+
+    def _select_profile(self, user_text: str, prior_state: Dict[str, Any]) -> GenerationProfile:
+        """按访客原话分类（“好的 / 可以”走确认配置），不用展开后的确认指令。"""
+        route = classify_turn(
+            user_text,
+            prior_state,
+            self._snapshot.domain_index,
+            self._is_detail_request,
+        )
+        profile = self.generation_profiles.get(route.profile) or self.generation_profiles["default"]
+        if self.llm_cfg.get("debug"):
+            print(
+                f"=== CASCADE === {route.user_intent} / {route.guide_stage or '-'} / {route.target or '-'} "
+                f"-> {profile.name}: {profile.model}, max_output_tokens={profile.max_output_tokens}"
+            )
+        return profile
+
+    def generate_narration(self, persona_id: str, kind: str, target: str) -> Dict[str, Any]:
+        """
+        Generate one first-time overview (展厅介绍 / 展品介绍) for the narration
+        bank, as seen by a fresh visitor standing in the target's zone.
+        """
+        index = self._snapshot.domain_index
+        zone_name = target if kind == STAGE_ZONE_OVERVIEW else index.zone_of_exhibit.get(target, "")
+        state = self.context_store.get_session_state("", persona_id)
+        state["current_zone"] = zone_name
+        templates = NARRATION_PROMPTS_EN if self._persona_requires_english(persona_id) else NARRATION_PROMPTS
+        user_text = templates[kind].format(target=target)
+        profile = self.generation_profiles[kind]
+        context_text = self._build_turn_context(user_text, "", persona_id, state, profile)
+        return self._generate_turn(user_text, persona_id, context_text, profile, priority=PRIORITY_BATCH)
+
+    def _serve_narration(
+        self,
+        user_text: str,
+        effective_user_text: str,
+        persona_id: str,
+        prior_state: Dict[str, Any],
+    ) -> Dict[str, Any] | None:
+        kind, target = self._narration_key(user_text, effective_user_text, prior_state)
+        if not kind:
+            return None
+        llm_data = self.narrations.pick(
+            persona_id, kind, target, rotate=bool(self.llm_cfg.get("narration_rotation", True))
+        )
+        if llm_data is not None and self.llm_cfg.get("debug"):
+            print(f"=== NARRATION BANK HIT === {persona_id} / {kind} / {target}")
+        return llm_data
+
+    def _narration_key(
+        self,
+        user_text: str,
+        effective_user_text: str,
+        prior_state: Dict[str, Any],
+    ) -> tuple[str, str]:
+        """
+        首次展厅/展品介绍对应的讲解库键；追问、已讲过的对象、
+        需要先引路的跨展厅请求返回空，仍走实时生成。
+        """
+        if not self.llm_cfg.get("narration_bank", False):
+            return "", ""
+        request_text = str(user_text or "").strip()
+        if effective_user_text != request_text:
+            request_text = str(prior_state.get("pending_action_text", "") or "").strip()
+        index = self._snapshot.domain_index
+        kind, target = match_overview_request(request_text, list(index.zone_by_name), index.exhibit_aliases)
+        if not kind:
+            return "", ""
+        progress: TourProgress = prior_state["progress"]
+        if kind == STAGE_ZONE_OVERVIEW:
+            if progress.zone_status_of(target) not in {"unseen", "entered"}:
+                return "", ""
+        else:
+            status = progress.exhibit_status_of(target)
+            current_zone = str(prior_state.get("current_zone", "")).strip()
+            if status != "unseen" or (current_zone and current_zone != index.zone_of_exhibit.get(target)):
+                return "", ""
+        return kind, target
+
+    def _generate_turn(
+        self,
+        user_text: str,
+        persona_id: str,
+        context_text: str,
+        profile: GenerationProfile,
+        *,
+        priority: int = PRIORITY_INTERACTIVE,
+        kiosk: str = "",
+    ) -> Dict[str, Any]:
+        """
+        一轮 LLM 生成，结果计入熔断器；熔断打开时直接抛 LLMBackendError，
+        由 run() 改走降级模板，不再排队等待超时。
+        生成前先取准入名额（priority / kiosk 见 AdmissionController）：排队超过
+        该优先级的等待预算时抛 AdmissionRejected，排队时间不计入熔断的慢调用。
+        """
+        if not self.breaker.allow():
+            raise LLMBackendError("circuit open")
+        with self.admission.slot(
+            priority,
+            kiosk,
+            budget=self._admission_budget(priority),
+            cancel=_TURN_CANCEL.get(),
+        ):
+            started = time.monotonic()
+            try:
+                if self._persona_requires_english(persona_id) and self.llm_cfg.get("language_guard", True):
+                    llm_data = self._generate_english(user_text, persona_id, context_text, profile)
+                else:
+                    llm_data = self._generate(user_text, persona_id, context_text, profile)
+            except LLMBackendError:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success(time.monotonic() - started)
+        return llm_data
+
+    def _admission_budget(self, priority: int) -> float | None:
+        """排队等待预算（秒）：实时轮次超时回“请稍等”，预计算超时放弃，离线批量一直等。"""
+        cfg = self.llm_cfg.get("admission", {}) or {}
+        if priority == PRIORITY_INTERACTIVE:
+            return float(cfg.get("interactive_wait", 1.5))
+        if priority == PRIORITY_SPECULATIVE:
+            return float(cfg.get("speculative_wait", 2.0))
+        return None
+
+    def _probe_llm(self) -> None:
+        """半开探活：最小请求，短截止时间，不带结构化输出约束。"""
+        request = {
+            "model": self.llm_cfg["model"],
+            "input": [{"role": "user", "content": BREAKER_PROBE_TEXT}],
+            "thinking": {"type": "disabled"},
+            "max_output_tokens": 8,
+        }
+        self.backend.complete(
+            request,
+            deadline=float((self.llm_cfg.get("circuit_breaker", {}) or {}).get("probe_deadline", 3.0)),
+        )
+
+    def _schedule_speculation(self, session_key: str, persona_id: str) -> None:
+        """
+        预计算：本轮结束后按会话状态副本，把“用户回答好的”对应的推荐动作提前生成一遍。
+        只缓存 LLM 结果，不写会话状态；下一轮确认时由 run() 提交，其他输入直接丢弃。
+        每次预计算都是一次额外的付费调用，默认关闭（speculative_prefetch）；
+        按“好的”分类，只走确认配置（小模型、短输出）。
+        """
+        if not session_key or not self.llm_cfg.get("speculative_prefetch", False):
+            return
+        if self.breaker.state != CLOSED:
+            return
+        state = self.context_store.get_session_state(session_key, persona_id)
+        if not str(state.get("pending_action_text", "")).strip():
+            return
+        effective_user_text = self._resolve_user_text(AFFIRMATION_PROBE, state)
+        kind, target = self._narration_key(AFFIRMATION_PROBE, effective_user_text, state)
+        if kind and self.narrations.variants(persona_id, kind, target):
+            return
+        if self._is_start_command(effective_user_text) or self._should_transition_out_of_completed_zone(
+            effective_user_text, state
+        ):
+            return
+        profile = self._select_profile(AFFIRMATION_PROBE, state)
+        context_text = self._build_turn_context(effective_user_text, session_key, persona_id, state, profile)
+        self.speculation.schedule(
+            session_key,
+            persona_id,
+            self._speculation_fingerprint(effective_user_text, context_text, profile),
+            lambda: self._generate_turn(
+                effective_user_text, persona_id, context_text, profile,
+                priority=PRIORITY_SPECULATIVE, kiosk=session_key,
+            ),
+        )
+
+    def _speculation_fingerprint(
+        self,
+        effective_user_text: str,
+        context_text: str,
+        profile: GenerationProfile,
+    ) -> str:
+        return request_fingerprint(
+            str(self._snapshot.version), effective_user_text, context_text, profile.name
+        )
+
+    def _generate(
+        self,
+        user_text: str,
+        persona_id: str,
+        context_text: str,
+        profile: GenerationProfile,
+    ) -> Dict[str, Any]:
+        system_prompt = self._build_system_prompt(persona_id, context_text=context_text)
         if self.llm_cfg.get("debug"):
             persona = self._get_persona(persona_id)
             print("=== PERSONA USED ===")
@@ -155,7 +702,7 @@ class LLMOrchestrator:
             print("=== SYSTEM PROMPT (TAIL) ===")
             print(system_prompt[-800:])
             print("============================")
-        raw_text = self._call_llm(effective_user_text, system_prompt)
+        raw_text = self._call_llm(user_text, system_prompt, profile=profile)
         llm_data = parse_llm_json(raw_text)
 
         if self._persona_requires_english(persona_id) and self._contains_cjk(
@@ -166,55 +713,187 @@ class LLMOrchestrator:
                 print("Chinese detected for EN persona, retrying with stricter prompt.")
                 print("======================")
             strict_prompt = self._build_system_prompt(
-                persona_id, context_text=progress_context, force_english=True
+                persona_id, context_text=context_text, force_english=True
             )
-            raw_text = self._call_llm(effective_user_text, strict_prompt)
+            raw_text = self._call_llm(user_text, strict_prompt, profile=profile)
             llm_data = parse_llm_json(raw_text)
             if self._contains_cjk(llm_data.get("tts_text", "")):
                 if self.llm_cfg.get("debug"):
                     print("=== LANGUAGE FALLBACK ===")
                     print("Still non-English after retry, using fallback English prompt.")
                     print("=========================")
-                llm_data["tts_text"] = (
-                    "Hello, I am your museum guide. What would you like to explore today?"
-                )
+                llm_data["tts_text"] = ENGLISH_FALLBACK_TTS
+        return llm_data
 
-        result = self._translate_state_with_persona(llm_data, persona_id)
-        result = self._apply_tour_state(result, effective_user_text, persona_id, session_key, prior_state)
-        result = self._apply_video_mapping(result, persona_id)
-        result = self._apply_initiative_plan(result, persona_id)
-        self._persist_recommendation_state(session_key, persona_id, result)
-        return result
+    def _generate_english(
+        self,
+        user_text: str,
+        persona_id: str,
+        context_text: str,
+        profile: GenerationProfile,
+    ) -> Dict[str, Any]:
+        """
+        英文角色的语言守卫生成：精简英文 prompt + 非 CJK schema 前置约束；
+        流式模式下 tts_text 一出现中文就中止本次生成并立刻用强约束重试，
+        不再等完整的错误回复；非流式（默认）时对完整结果做同样检查后重试。
+        """
+        fields: Dict[str, Any] = {}
+        for force_english in (False, True):
+            system_prompt = self._build_system_prompt(
+                persona_id, context_text=context_text, force_english=force_english
+            )
+            try:
+                raw_text = self._call_llm(
+                    user_text,
+                    system_prompt,
+                    schema=self.response_schema_en,
+                    guard=cjk_in_tts_text,
+                    profile=profile,
+                )
+            except LanguageGuardTripped as tripped:
+                if self.llm_cfg.get("debug"):
+                    print("=== LANGUAGE GUARD ABORT ===")
+                    print(f"CJK in streamed tts_text (force_english={force_english}), generation cancelled.")
+                    print("============================")
+                fields = tripped.fields or fields
+                continue
+            llm_data = parse_llm_json(raw_text)
+            if not self._contains_cjk(llm_data.get("tts_text", "")):
+                return llm_data
+            fields = llm_data
 
-    # -------------------------
-    # Internal
-    # -------------------------
+        if self.llm_cfg.get("debug"):
+            print("=== LANGUAGE FALLBACK ===")
+            print("Still non-English after guarded retry, using fallback English reply.")
+            print("=========================")
+        llm_data = fill_llm_json_defaults(fields)
+        llm_data["tts_text"] = ENGLISH_FALLBACK_TTS
+        return llm_data
+
+    def _call_llm(
+        self,
+        user_text: str,
+        system_prompt: str,
+        on_field: Callable[[str, Any], None] | None = None,
+        schema: Dict[str, Any] | None = None,
+        guard: Callable[[GuideJSONStreamParser], bool] | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> str:
+        if self.llm_cfg.get("stream"):
+            return self._call_llm_stream(
+                user_text, system_prompt, on_field=on_field, schema=schema, guard=guard, profile=profile
+            )
 
-    def _call_llm(self, user_text: str, system_prompt: str) -> str:
-        resp = self.client.responses.create(
-            model=self.llm_cfg["model"],
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_text},
-            ],
-            thinking={"type": "disabled"},
-            max_output_tokens=self.llm_cfg.get("max_output_tokens", 300),
-            temperature=self.llm_cfg.get("temperature", 0.2),
-        )
+        text = "".join(
+            self._run_llm(self._build_llm_request(user_text, system_prompt, schema, profile))
+        ).strip()
 
         # ===== 强制日志（你现在阶段必须留）=====
-        print("=== ARK RAW RESPONSE ===")
-        print(resp)
-        print("========================")
-
-        text = self._extract_text(resp)
-
         print("=== EXTRACTED TEXT ===")
         print(repr(text))
         print("======================")
 
+        # 非流式：整段结果同样过一遍 guard，与流式中止走同一条重试路径
+        if guard is not None:
+            parser = GuideJSONStreamParser()
+            parser.feed(text)
+            if guard(parser):
+                raise LanguageGuardTripped(parser.finish())
+
+        return text
+
+    def _call_llm_stream(
+        self,
+        user_text: str,
+        system_prompt: str,
+        on_field: Callable[[str, Any], None] | None = None,
+        schema: Dict[str, Any] | None = None,
+        guard: Callable[[GuideJSONStreamParser], bool] | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> str:
+        """
+        流式调用：增量解析 JSON，字段一闭合就回调 on_field，
+        guide_state / tts_text 可以在整段输出结束前被消费。
+        guard 返回 True 时立即取消生成并抛出 LanguageGuardTripped。
+        """
+        parser = GuideJSONStreamParser(on_field=on_field)
+        chunks: list[str] = []
+        stream = self._run_llm(
+            self._build_llm_request(user_text, system_prompt, schema, profile),
+            stream=True,
+        )
+        for delta in stream:
+            chunks.append(delta)
+            for key, value in parser.feed(delta):
+                if self.llm_cfg.get("debug"):
+                    print(f"=== STREAM FIELD === {key}: {value!r}")
+            if guard is not None and guard(parser):
+                stream.close()
+                raise LanguageGuardTripped(parser.finish())
+
+        text = "".join(chunks).strip()
+
+        print("=== STREAMED TEXT ===")
+        print(repr(text))
+        print("=====================")
+
         return text
 
+    def _build_llm_request(
+        self,
+        user_text: str,
+        system_prompt: str,
+        schema: Dict[str, Any] | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> Dict[str, Any]:
+        profile = profile or self.generation_profiles["default"]
+        request: Dict[str, Any] = {
+            "model": profile.model,
+            "input": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_text},
+            ],
+            "thinking": {"type": "disabled"},
+            "max_output_tokens": profile.max_output_tokens,
+            "temperature": profile.temperature,
+        }
+        if self._response_format_enabled(profile.model):
+            text_format = build_text_format(
+                self.llm_cfg.get("response_format", ""),
+                schema or self.response_schema,
+            )
+            if text_format:
+                request["text"] = {"format": text_format}
+        return request
+
+    def _run_llm(self, request: Dict[str, Any], stream: bool = False) -> Iterator[str]:
+        cancel = _TURN_CANCEL.get()
+        try:
+            yield from self.backend.stream(request, stream=stream, cancel=cancel)
+        except LLMBackendError as error:
+            # 模型 / 接入点不支持结构化输出时返回 400：仅当错误指明 response_format / json_schema 时，
+            # 对该模型关闭约束一段时间，并用普通 JSON 提示词重试
+            if "text" not in request or error.status_code != 400 or not _rejects_response_format(error):
+                raise
+            model = str(request.get("model") or "")
+            print("=== RESPONSE FORMAT FALLBACK ===")
+            print(f"Structured output rejected for model {model or '<provider default>'}, "
+                  f"prompt-only JSON for {self._response_format_retry_after:.0f}s: {error.errors[-1][1]}")
+            print("================================")
+            self._response_format_disabled[model] = time.monotonic() + self._response_format_retry_after
+            plain = {key: value for key, value in request.items() if key != "text"}
+            yield from self.backend.stream(plain, stream=stream, cancel=cancel)
+
+    def _response_format_enabled(self, model: str) -> bool:
+        until = self._response_format_disabled.get(model or "")
+        if until is None:
+            return True
+        if time.monotonic() < until:
+            return False
+        # 到期：下一次请求重新携带结构化输出约束
+        self._response_format_disabled.pop(model or "", None)
+        return True
+
     def _get_persona(self, persona_id: str) -> Dict[str, Any]:
         if not self.personas:
             return {}
@@ -246,12 +925,9 @@ class LLMOrchestrator:
         return normalized in start_commands
 
     def _front_desk_zone(self) -> Dict[str, Any]:
-        for zone in self.domain_cfg.get("zones", []):
-            if zone.get("id") == "zone_front_desk":
-                return zone
-        return {}
+        return self._snapshot.zone_by_id.get("zone_front_desk", {})
 
-    def _build_start_response(self, persona_id: str) -> Dict[str, Any]:
+    def _build_start_response(self, persona_id: str) -> TurnResult:
         front_desk = self._front_desk_zone()
         location = front_desk.get("location", {})
         llm_data = {
@@ -298,147 +974,95 @@ class LLMOrchestrator:
             "您对哪一处更感兴趣？"
         )
 
-    def _apply_initiative_plan(
-        self, result: Dict[str, Any], persona_id: str
-    ) -> Dict[str, Any]:
-        plan = build_initiative_plan(result, persona_id, self.domain_cfg)
-        merged = dict(result)
-        merged["reply_text"] = str(merged.get("tts_text", "")).strip()
-        merged["follow_up_text"] = plan.follow_up_prompt
-        merged["tts_text"] = merge_follow_up_prompt(
-            merged.get("tts_text", ""),
-            plan.follow_up_prompt,
-        )
-        merged["suggested_actions"] = plan.suggested_actions
-        merged["next_step_type"] = plan.next_step_type
-        merged["next_step_target"] = plan.next_step_target
-        merged["pending_action_type"] = plan.next_step_type
-        merged["pending_action_target"] = plan.next_step_target
+    def _apply_initiative_plan(self, result: TurnResult, turn: TurnContext) -> None:
+        plan = self.initiative_planner.plan(result, turn.persona_id, self._crowd_penalty())
+        result.reply_text = str(result.tts_text or "").strip()
+        result.follow_up_text = plan.follow_up_prompt
+        result.tts_text = merge_follow_up_prompt(result.tts_text, plan.follow_up_prompt)
+        result.suggested_actions = plan.action_dicts()
+        result.next_step_type = plan.next_step_type
+        result.next_step_target = plan.next_step_target
+        result.pending_action_type = plan.next_step_type
+        result.pending_action_target = plan.next_step_target
         pending_action = self._select_pending_action(
-            suggested_actions=plan.suggested_actions,
+            suggested_actions=result.suggested_actions,
             follow_up_text=plan.follow_up_prompt,
             next_step_type=plan.next_step_type,
             next_step_target=plan.next_step_target,
         )
-        merged["pending_action_label"] = pending_action["label"]
-        merged["pending_action_text"] = pending_action["text"]
-        return merged
+        result.pending_action_label = pending_action["label"]
+        result.pending_action_text = pending_action["text"]
 
-    def _apply_tour_state(
-        self,
-        result: Dict[str, Any],
-        user_text: str,
-        persona_id: str,
-        session_id: str,
-        prior_state: Dict[str, Any],
-    ) -> Dict[str, Any]:
-        merged = dict(result)
-        zone_name, zone_id = normalize_zone(self.domain_cfg, merged.get("guide_zone", ""))
+    def _apply_tour_state(self, result: TurnResult, turn: TurnContext) -> None:
+        prior_state = turn.prior_state
+        zone_name, zone_id = normalize_zone(self.domain_cfg, result.guide_zone)
         exhibit_name, exhibit_id = normalize_exhibit(
             self.domain_cfg,
-            merged.get("focus_exhibit", ""),
+            result.focus_exhibit,
             zone_id=zone_id,
         )
-        guide_stage = str(merged.get("guide_stage", "")).strip()
+        guide_stage = str(result.guide_stage or "").strip()
         if not is_exhibit_stage(guide_stage):
             exhibit_name = "未确定"
             exhibit_id = ""
-        merged["guide_zone"] = zone_name
-        merged["focus_exhibit"] = exhibit_name
+        result.guide_zone = zone_name
+        result.focus_exhibit = exhibit_name
 
         tour_event = infer_tour_event(
-            result=merged,
+            result=result,
             prior_state=prior_state,
             zone_id=zone_id,
             exhibit_id=exhibit_id,
             domain_cfg=self.domain_cfg,
         )
-        zone_progress = dict(prior_state.get("zone_progress", {}))
-        exhibit_progress = dict(prior_state.get("exhibit_progress", {}))
-        zone_status = infer_zone_progress_status(merged, tour_event, exhibit_name)
-        exhibit_status = infer_exhibit_progress_status(merged, tour_event, exhibit_name)
+        progress: TourProgress = prior_state["progress"].copy()
+        zone_status = infer_zone_progress_status(result, tour_event, exhibit_name)
+        exhibit_status = infer_exhibit_progress_status(result, tour_event, exhibit_name)
+        is_exhibit_turn = bool(exhibit_name) and exhibit_name != "未确定" and is_exhibit_stage(guide_stage)
         if zone_name:
-            zone_progress[zone_name] = advance_zone_status(
-                zone_progress.get(zone_name, ""),
-                zone_status,
-            )
+            progress.advance_zone(zone_name, zone_status)
+            progress.visit_zone(zone_name)
         if exhibit_name and exhibit_name != "未确定":
-            exhibit_progress[exhibit_name] = advance_exhibit_status(
-                exhibit_progress.get(exhibit_name, ""),
-                exhibit_status,
-            )
+            progress.advance_exhibit(exhibit_name, exhibit_status)
+        if is_exhibit_turn:
+            progress.visit_exhibit(exhibit_name)
         user_interests = collect_user_interests(
             domain_cfg=self.domain_cfg,
             prior_state=prior_state,
             zone_name=zone_name,
             exhibit_name=exhibit_name,
-            user_text=user_text,
+            user_text=turn.user_text,
         )
         session_state = self.context_store.update(
-            session_id,
-            persona_id,
-            user_text=user_text,
-            guide_text=merged.get("tts_text", ""),
+            turn.session_key,
+            turn.persona_id,
+            # 对话历史与导览记忆记用户原话（“好的”），不记解析后的推荐指令，与分级分类一致
+            user_text=turn.raw_user_text or turn.user_text,
+            guide_text=result.tts_text,
             current_zone=zone_name,
-            current_exhibit=exhibit_name if exhibit_name != "未确定" and is_exhibit_stage(guide_stage) else "",
-            current_focus_status=exhibit_status if exhibit_name and exhibit_name != "未确定" else zone_progress.get(zone_name, ""),
-            guide_stage=merged.get("guide_stage", ""),
-            reply_text=merged.get("reply_text", ""),
-            follow_up_text=merged.get("follow_up_text", ""),
-            pending_action_label=merged.get("pending_action_label", ""),
-            pending_action_text=merged.get("pending_action_text", ""),
-            pending_action_type=merged.get("pending_action_type", ""),
-            pending_action_target=merged.get("pending_action_target", ""),
-            visited_zones=[zone_name] if zone_name else [],
-            visited_exhibits=[exhibit_name] if exhibit_name and exhibit_name != "未确定" and is_exhibit_stage(guide_stage) else [],
-            zone_progress=zone_progress,
-            exhibit_progress=exhibit_progress,
+            current_exhibit=exhibit_name if is_exhibit_turn else "",
+            current_focus_status=(
+                exhibit_status if exhibit_name and exhibit_name != "未确定"
+                else progress.zone_status_of(zone_name) if zone_name else ""
+            ),
+            guide_stage=result.guide_stage,
+            reply_text=result.reply_text,
+            follow_up_text=result.follow_up_text,
+            pending_action_label=result.pending_action_label,
+            pending_action_text=result.pending_action_text,
+            pending_action_type=result.pending_action_type,
+            pending_action_target=result.pending_action_target,
+            progress=progress,
             user_interests=user_interests,
             tour_event=tour_event,
         )
-        merged["tour_event"] = session_state.get("tour_event", "")
-        merged["current_zone"] = session_state.get("current_zone", "")
-        merged["current_exhibit"] = session_state.get("current_exhibit", "")
-        merged["current_focus_status"] = session_state.get("current_focus_status", "")
-        merged["reply_text"] = session_state.get("reply_text", "")
-        merged["follow_up_text"] = session_state.get("follow_up_text", "")
-        merged["pending_action_label"] = session_state.get("pending_action_label", "")
-        merged["pending_action_text"] = session_state.get("pending_action_text", "")
-        merged["pending_action_type"] = session_state.get("pending_action_type", "")
-        merged["pending_action_target"] = session_state.get("pending_action_target", "")
-        merged["visited_zones"] = session_state.get("visited_zones", [])
-        merged["visited_exhibits"] = session_state.get("visited_exhibits", [])
-        merged["zone_progress"] = session_state.get("zone_progress", {})
-        merged["exhibit_progress"] = session_state.get("exhibit_progress", {})
-        merged["user_interests"] = session_state.get("user_interests", [])
-        return merged
-
-    def _apply_video_mapping(self, result: Dict[str, Any], persona_id: str) -> Dict[str, Any]:
-        merged = dict(result)
-        mapped_guide_state = self._mapped_guide_state(merged)
-        translated = self._translate_state_with_persona(
-            {
-                "guide_state": mapped_guide_state,
-                "guide_zone": merged.get("guide_zone", ""),
-                "guide_venue": merged.get("guide_venue", ""),
-                "guide_floor": merged.get("guide_floor", ""),
-                "guide_area": merged.get("guide_area", ""),
-                "focus_exhibit": merged.get("focus_exhibit", ""),
-                "guide_stage": merged.get("guide_stage", ""),
-                "user_intent": merged.get("user_intent", ""),
-            },
-            persona_id,
-        )
-        merged["guide_state"] = translated["guide_state"]
-        merged["video_state"] = translated["video_state"]
-        merged["video_dir"] = translated["video_dir"]
-        merged["video_prefix"] = translated["video_prefix"]
-        if "tts_voice_type" in translated:
-            merged["tts_voice_type"] = translated["tts_voice_type"]
-        merged["video_mapping_source"] = "deterministic"
-        return merged
-
-    def _mapped_guide_state(self, result: Dict[str, Any]) -> str:
+        result.apply_session_state(session_state)
+
+    def _apply_video_mapping(self, result: TurnResult, turn: TurnContext) -> None:
+        self._apply_guide_state(result, self._mapped_guide_state(result), turn.persona_id)
+        result.video_mapping_source = "deterministic"
+
+    def _mapped_guide_state(self, result: TurnResult) -> str:
         user_intent = str(result.get("user_intent", "") or "").strip()
         guide_stage = str(result.get("guide_stage", "") or "").strip()
         tour_event = str(result.get("tour_event", "") or "").strip()
@@ -593,30 +1217,14 @@ class LLMOrchestrator:
             return False
         if not self._is_next_item_request(user_text):
             return False
-        zone = self._zone_by_name(current_zone)
-        exhibits = list(zone.get("exhibits", []) or [])
-        if not exhibits:
-            return False
-        visited_exhibits = {
-            str(name or "").strip()
-            for name in (prior_state.get("visited_exhibits", []) or [])
-            if str(name or "").strip()
-        }
-        exhibit_progress = dict(prior_state.get("exhibit_progress", {}) or {})
-        for exhibit in exhibits:
-            exhibit_name = str(exhibit.get("name", "")).strip()
-            if exhibit_name in visited_exhibits:
-                continue
-            status = str(exhibit_progress.get(exhibit_name, "unseen")).strip()
-            if status not in {"brief", "detailed"}:
-                return False
-        return True
+        progress: TourProgress = prior_state["progress"]
+        return progress.zone_completed(current_zone)
 
     def _build_completed_zone_transition_response(
         self,
         persona_id: str,
         prior_state: Dict[str, Any],
-    ) -> Dict[str, Any]:
+    ) -> TurnResult:
         current_zone = str(prior_state.get("current_zone", "")).strip() or "当前展厅"
         current_zone_cfg = self._zone_by_name(current_zone)
         location = current_zone_cfg.get("location", {}) if current_zone_cfg else {}
@@ -679,19 +1287,16 @@ class LLMOrchestrator:
             "guide_stage": STAGE_ROUTE_GUIDANCE,
             "user_intent": "请求下一展厅",
         }, persona_id)
-        response["reply_text"] = reply_text
-        response["follow_up_text"] = follow_up_text
-        response["suggested_actions"] = suggested_actions
-        response["next_step_type"] = "transition_zone"
-        response["next_step_target"] = next_zone_name or "下一展厅"
-        response["pending_action_type"] = "transition_zone"
-        response["pending_action_target"] = next_zone_name or "下一展厅"
+        response.reply_text = reply_text
+        response.follow_up_text = follow_up_text
+        response.suggested_actions = suggested_actions
+        response.next_step_type = "transition_zone"
+        response.next_step_target = next_zone_name or "下一展厅"
+        response.pending_action_type = "transition_zone"
+        response.pending_action_target = next_zone_name or "下一展厅"
         if suggested_actions:
-            response["pending_action_label"] = suggested_actions[0]["label"]
-            response["pending_action_text"] = suggested_actions[0]["text"]
-        else:
-            response["pending_action_label"] = ""
-            response["pending_action_text"] = ""
+            response.pending_action_label = suggested_actions[0]["label"]
+            response.pending_action_text = suggested_actions[0]["text"]
         return response
 
     def _is_next_item_request(self, user_text: str) -> bool:
@@ -708,24 +1313,14 @@ class LLMOrchestrator:
         name = str(zone_name or "").strip()
         if not name:
             return {}
-        for zone in self.domain_cfg.get("zones", []):
-            if name == str(zone.get("name", "")).strip():
-                return zone
-        return {}
+        return self._snapshot.zone_by_name.get(name, {})
 
     def _next_unseen_zones(self, prior_state: Dict[str, Any], current_zone: str) -> list[str]:
-        zone_progress = dict(prior_state.get("zone_progress", {}) or {})
-        visited_zones = set(prior_state.get("visited_zones", []) or [])
-        result: list[str] = []
-        for zone in self.domain_cfg.get("zones", []):
-            zone_name = str(zone.get("name", "")).strip()
-            if not zone_name or zone_name == current_zone or zone.get("category") == "facility":
-                continue
-            status = str(zone_progress.get(zone_name, "unseen")).strip()
-            if zone_name not in visited_zones and status in {"", "unseen"}:
-                result.append(zone_name)
+        progress: TourProgress = prior_state["progress"]
+        result = progress.unseen_zones(exclude=current_zone)
         if result:
-            return result
+            # 按步行时间（含拥挤折算）由近到远
+            return self._snapshot.venue_graph.by_distance(current_zone, result, self._crowd_penalty())
         for zone in self.domain_cfg.get("zones", []):
             zone_name = str(zone.get("name", "")).strip()
             if not zone_name or zone_name == current_zone or zone.get("category") == "facility":
@@ -733,30 +1328,20 @@ class LLMOrchestrator:
             result.append(zone_name)
         return result
 
-    def _persist_recommendation_state(
-        self,
-        session_id: str,
-        persona_id: str,
-        result: Dict[str, Any],
-    ) -> None:
-        if not session_id:
+    def _persist_recommendation_state(self, result: TurnResult, turn: TurnContext) -> None:
+        if not turn.session_key:
             return
         persisted = self.context_store.set_pending_recommendation(
-            session_id,
-            persona_id,
-            reply_text=str(result.get("reply_text", "")).strip(),
-            follow_up_text=str(result.get("follow_up_text", "")).strip(),
-            pending_action_label=str(result.get("pending_action_label", "")).strip(),
-            pending_action_text=str(result.get("pending_action_text", "")).strip(),
-            pending_action_type=str(result.get("pending_action_type", "")).strip(),
-            pending_action_target=str(result.get("pending_action_target", "")).strip(),
+            turn.session_key,
+            turn.persona_id,
+            reply_text=str(result.reply_text or "").strip(),
+            follow_up_text=str(result.follow_up_text or "").strip(),
+            pending_action_label=str(result.pending_action_label or "").strip(),
+            pending_action_text=str(result.pending_action_text or "").strip(),
+            pending_action_type=str(result.pending_action_type or "").strip(),
+            pending_action_target=str(result.pending_action_target or "").strip(),
         )
-        result["reply_text"] = persisted.get("reply_text", "")
-        result["follow_up_text"] = persisted.get("follow_up_text", "")
-        result["pending_action_label"] = persisted.get("pending_action_label", "")
-        result["pending_action_text"] = persisted.get("pending_action_text", "")
-        result["pending_action_type"] = persisted.get("pending_action_type", "")
-        result["pending_action_target"] = persisted.get("pending_action_target", "")
+        result.apply_session_state(persisted)
 
     def _build_system_prompt(
         self,
@@ -764,61 +1349,149 @@ class LLMOrchestrator:
         context_text: str = "",
         force_english: bool = False,
     ) -> str:
-        persona = self._get_persona(persona_id)
-        return build_system_prompt(
-            persona=persona,
+        bundle = self._prompt_bundle(persona_id)
+        if self.llm_cfg.get("debug"):
+            print(
+                f"=== PROMPT TOKENS ≈ {bundle.token_count(context_text, force_english)} "
+                f"({persona_id}, {bundle.language}) ==="
+            )
+        return bundle.render(context_text, force_english=force_english)
+
+    def _prompt_bundle(self, persona_id: str) -> PromptBundle:
+        bundle = self.prompt_bundles.get(persona_id)
+        if bundle is None:
+            bundle = self._build_prompt_bundle(persona_id)
+            self.prompt_bundles[persona_id] = bundle
+        return bundle
+
+    def _domain_retrieval_enabled(self) -> bool:
+        return bool(self.llm_cfg.get("domain_retrieval", False))
+
+    def _build_domain_context(self, user_text: str, prior_state: Dict[str, Any]) -> str:
+        index = self._snapshot.domain_index
+        selection = index.select(
+            user_text=user_text,
+            current_zone=str(prior_state.get("current_zone", "")).strip(),
+            current_exhibit=str(prior_state.get("current_exhibit", "")).strip(),
+            top_k=int(self.llm_cfg.get("domain_retrieval_top_k", 4)),
+        )
+        if self.llm_cfg.get("debug"):
+            print("=== DOMAIN RETRIEVAL ===", {zone: len(exhibits) for zone, exhibits in selection.items()})
+        return build_scoped_domain_prior_prompt(index, selection)
+
+    def _build_knowledge_context(self, user_text: str, prior_state: Dict[str, Any]) -> str:
+        top_k = int(self.llm_cfg.get("exhibit_knowledge_top_k", 3))
+        if top_k <= 0:
+            return ""
+        exhibit_name = self._detail_focus_exhibit(user_text, prior_state)
+        if not exhibit_name:
+            return ""
+        hits = self.knowledge.retrieve(exhibit_name, user_text, top_k=top_k)
+        if self.llm_cfg.get("debug"):
+            print(
+                f"=== EXHIBIT KNOWLEDGE === {exhibit_name}: {len(hits.passages)} passages "
+                f"in {hits.latency_ms:.2f}ms{' (reindexed)' if hits.reindexed else ''}"
+            )
+        return build_knowledge_prompt(hits)
+
+    def _detail_focus_exhibit(self, user_text: str, prior_state: Dict[str, Any]) -> str:
+        """
+        The exhibit this turn will explain in depth, or "" when the turn is not
+        heading for 深入讲解 (knowledge passages are only worth their tokens there).
+        """
+        mentioned = [
+            doc.name for doc in self._snapshot.domain_index.mentioned(user_text)
+            if doc.kind == "exhibit"
+        ]
+        current_exhibit = str(prior_state.get("current_exhibit", "")).strip()
+        focus = mentioned[0] if mentioned else current_exhibit
+        if not focus:
+            return ""
+        if self._is_detail_request(user_text):
+            return focus
+        if focus == current_exhibit and prior_state.get("guide_stage") == STAGE_EXHIBIT_DETAIL:
+            return focus
+        return ""
+
+    def _is_detail_request(self, user_text: str) -> bool:
+        normalized = self._normalize_text(user_text)
+        if not normalized:
+            return False
+        keywords = [
+            "详细",
+            "深入",
+            "细节",
+            "展开",
+            "多讲",
+            "多说",
+            "背景",
+            "历史",
+            "故事",
+            "工艺",
+            "怎么做",
+            "为什么",
+            "有什么讲究",
+            "more about",
+            "detail",
+            "history",
+            "story",
+            "why",
+        ]
+        return any(keyword in normalized for keyword in keywords)
+
+    def _build_prompt_bundle(self, persona_id: str) -> PromptBundle:
+        scoped = self._domain_retrieval_enabled()
+        return build_prompt_bundle(
+            persona=self._get_persona(persona_id),
             persona_id=persona_id,
-            base_system_prompt=self.base_system_prompt,
-            context_text=context_text,
-            force_english=force_english,
+            base_system_prompt=(
+                self._snapshot.scoped_base_system_prompt if scoped else self.base_system_prompt
+            ),
+            base_system_prompt_en=(
+                self._snapshot.scoped_base_system_prompt_en if scoped else self.base_system_prompt_en
+            ),
+            english=self._persona_requires_english(persona_id),
+            language_guard=bool(self.llm_cfg.get("language_guard", True)),
         )
 
+    def _rebuild_prompt_bundles(self) -> None:
+        self.prompt_bundles = {
+            persona_id: self._build_prompt_bundle(persona_id)
+            for persona_id in self.personas
+        }
+
     def _persona_requires_english(self, persona_id: str) -> bool:
         persona = self._get_persona(persona_id)
         return persona.get("language") == "en" or persona_id.startswith("eu_")
 
     @staticmethod
     def _contains_cjk(text: str) -> bool:
-        return any("\u4e00" <= ch <= "\u9fff" for ch in text)
-
-    @staticmethod
-    def _extract_text(resp) -> str:
-        for item in resp.output:
-            if item.type == "message":
-                for c in item.content:
-                    if c.type == "output_text":
-                        return c.text.strip()
-        return ""
+        return contains_cjk(text)
 
-    def _translate_state(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _translate_state_with_persona(self, data: Dict[str, Any], persona_id: str) -> TurnResult:
         guide_state = data["guide_state"]
+        cfg = self.guide_states.get(guide_state) or {}
+        result = TurnResult(
+            tts_text=data["tts_text"] if cfg.get("allow_tts", True) else "",
+            confidence=data["confidence"],
+            guide_zone=data.get("guide_zone", ""),
+            guide_venue=data.get("guide_venue", ""),
+            guide_floor=data.get("guide_floor", ""),
+            guide_area=data.get("guide_area", ""),
+            focus_exhibit=data.get("focus_exhibit", ""),
+            guide_stage=data.get("guide_stage", ""),
+            user_intent=data.get("user_intent", ""),
+        )
+        self._apply_guide_state(result, guide_state, persona_id)
+        return result
 
+    def _apply_guide_state(self, result: TurnResult, guide_state: str, persona_id: str) -> None:
         if guide_state not in self.guide_states:
             raise RuntimeError(f"Unknown guide_state: {guide_state}")
-
-        cfg = self.guide_states[guide_state]
-
-        return {
-            "guide_state": guide_state,
-            "video_state": cfg["video_state"],
-            "tts_text": data["tts_text"] if cfg.get("allow_tts", True) else "",
-            "confidence": data["confidence"],
-        }
-
-    def _translate_state_with_persona(
-        self, data: Dict[str, Any], persona_id: str
-    ) -> Dict[str, Any]:
-        result = self._translate_state(data)
-        result.update({
-            "guide_zone": data.get("guide_zone", ""),
-            "guide_venue": data.get("guide_venue", ""),
-            "guide_floor": data.get("guide_floor", ""),
-            "guide_area": data.get("guide_area", ""),
-            "focus_exhibit": data.get("focus_exhibit", ""),
-            "guide_stage": data.get("guide_stage", ""),
-            "user_intent": data.get("user_intent", ""),
-        })
+        result.guide_state = guide_state
+        result.video_state = self.guide_states[guide_state]["video_state"]
         persona = self._get_persona(persona_id)
         if persona:
-            result["tts_voice_type"] = persona.get("tts_voice_type")
-        return result
+            result.tts_voice_type = persona.get("tts_voice_type")
+        result.video_dir = persona.get("video_dir") or persona_id
+        result.video_prefix = persona.get("video_prefix") or result.video_dir
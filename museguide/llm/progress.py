@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+ZONE_STATUSES = ("unseen", "entered", "overview", "detailed")
+EXHIBIT_STATUSES = ("unseen", "brief", "detailed")
+_ZONE_LEVEL = {status: level for level, status in enumerate(ZONE_STATUSES)}
+_EXHIBIT_LEVEL = {status: level for level, status in enumerate(EXHIBIT_STATUSES)}
+
+
+class ProgressIndex:
+    """
+    Catalogue positions for the bitset progress model, built once per config
+    snapshot. Zones and exhibits get consecutive small ints in domain order, so
+    each zone's exhibits form one contiguous mask and the lowest set bit of a
+    mask is the first such exhibit / zone in catalogue order.
+    """
+
+    def __init__(self, domain_cfg: Dict[str, Any]):
+        self.zone_names: List[str] = []
+        self.exhibit_names: List[str] = []
+        self.zone_ids: Dict[str, int] = {}
+        self.exhibit_ids: Dict[str, int] = {}
+        self.zone_exhibit_mask: List[int] = []
+        self.primary_zone_mask = 0
+        for zone in domain_cfg.get("zones", []) or []:
+            zone_name = str(zone.get("name", "")).strip()
+            if not zone_name or zone_name in self.zone_ids:
+                continue
+            zone_id = len(self.zone_names)
+            self.zone_ids[zone_name] = zone_id
+            self.zone_names.append(zone_name)
+            if zone.get("category") != "facility":
+                self.primary_zone_mask |= 1 << zone_id
+            mask = 0
+            for exhibit in zone.get("exhibits", []) or []:
+                exhibit_name = str(exhibit.get("name", "")).strip()
+                if not exhibit_name or exhibit_name in self.exhibit_ids:
+                    continue
+                exhibit_id = len(self.exhibit_names)
+                self.exhibit_ids[exhibit_name] = exhibit_id
+                self.exhibit_names.append(exhibit_name)
+                mask |= 1 << exhibit_id
+            self.zone_exhibit_mask.append(mask)
+
+    def empty(self) -> TourProgress:
+        return TourProgress(self)
+
+
+class TourProgress:
+    """
+    Per-session tour progress: one status byte per zone / exhibit plus
+    visited bitmaps. A zone or exhibit is "touched" once visited or given any
+    status above unseen; next-unseen and zone-completed queries are mask
+    arithmetic on those bitmaps instead of catalogue scans.
+    """
+
+    __slots__ = (
+        "index",
+        "zone_status",
+        "exhibit_status",
+        "visited_zones",
+        "visited_exhibits",
+        "started_zones",
+        "started_exhibits",
+    )
+
+    def __init__(self, index: ProgressIndex):
+        self.index = index
+        self.zone_status = bytearray(len(index.zone_names))
+        self.exhibit_status = bytearray(len(index.exhibit_names))
+        self.visited_zones = 0
+        self.visited_exhibits = 0
+        # status above unseen
+        self.started_zones = 0
+        self.started_exhibits = 0
+
+    # ---------- updates ----------
+
+    def advance_zone(self, zone_name: str, status: str) -> None:
+        zone_id = self.index.zone_ids.get(zone_name)
+        level = _ZONE_LEVEL.get(str(status or "").strip(), 0)
+        if zone_id is None or level <= self.zone_status[zone_id]:
+            return
+        self.zone_status[zone_id] = level
+        self.started_zones |= 1 << zone_id
+
+    def advance_exhibit(self, exhibit_name: str, status: str) -> None:
+        exhibit_id = self.index.exhibit_ids.get(exhibit_name)
+        level = _EXHIBIT_LEVEL.get(str(status or "").strip(), 0)
+        if exhibit_id is None or level <= self.exhibit_status[exhibit_id]:
+            return
+        self.exhibit_status[exhibit_id] = level
+        self.started_exhibits |= 1 << exhibit_id
+
+    def visit_zone(self, zone_name: str) -> None:
+        zone_id = self.index.zone_ids.get(zone_name)
+        if zone_id is not None:
+            self.visited_zones |= 1 << zone_id
+
+    def visit_exhibit(self, exhibit_name: str) -> None:
+        exhibit_id = self.index.exhibit_ids.get(exhibit_name)
+        if exhibit_id is not None:
+            self.visited_exhibits |= 1 << exhibit_id
+
+    def merge(self, other: TourProgress) -> None:
+        """Fold another progress on the same index in: statuses only move forward."""
+        for zone_id, level in enumerate(other.zone_status):
+            if level > self.zone_status[zone_id]:
+                self.zone_status[zone_id] = level
+        for exhibit_id, level in enumerate(other.exhibit_status):
+            if level > self.exhibit_status[exhibit_id]:
+                self.exhibit_status[exhibit_id] = level
+        self.visited_zones |= other.visited_zones
+        self.visited_exhibits |= other.visited_exhibits
+        self.started_zones |= other.started_zones
+        self.started_exhibits |= other.started_exhibits
+
+    def copy(self) -> TourProgress:
+        clone = TourProgress.__new__(TourProgress)
+        clone.index = self.index
+        clone.zone_status = bytearray(self.zone_status)
+        clone.exhibit_status = bytearray(self.exhibit_status)
+        clone.visited_zones = self.visited_zones
+        clone.visited_exhibits = self.visited_exhibits
+        clone.started_zones = self.started_zones
+        clone.started_exhibits = self.started_exhibits
+        return clone
+
+    def rebind(self, index: ProgressIndex) -> TourProgress:
+        """The same progress on a new catalogue (config reload), matched by name."""
+        if index is self.index:
+            return self
+        rebound = index.empty()
+        for zone_name, status in self.zone_progress().items():
+            rebound.advance_zone(zone_name, status)
+        for exhibit_name, status in self.exhibit_progress().items():
+            rebound.advance_exhibit(exhibit_name, status)
+        for zone_name in self.visited_zone_names():
+            rebound.visit_zone(zone_name)
+        for exhibit_name in self.visited_exhibit_names():
+            rebound.visit_exhibit(exhibit_name)
+        return rebound
+
+    # ---------- queries ----------
+
+    def any(self) -> bool:
+        return bool(self.started_zones or self.started_exhibits)
+
+    def zone_status_of(self, zone_name: str) -> str:
+        zone_id = self.index.zone_ids.get(zone_name)
+        return ZONE_STATUSES[self.zone_status[zone_id]] if zone_id is not None else "unseen"
+
+    def exhibit_status_of(self, exhibit_name: str) -> str:
+        exhibit_id = self.index.exhibit_ids.get(exhibit_name)
+        return EXHIBIT_STATUSES[self.exhibit_status[exhibit_id]] if exhibit_id is not None else "unseen"
+
+    def zone_touched(self, zone_name: str) -> bool:
+        zone_id = self.index.zone_ids.get(zone_name)
+        return zone_id is not None and bool((self.visited_zones | self.started_zones) >> zone_id & 1)
+
+    def exhibit_touched(self, exhibit_name: str) -> bool:
+        exhibit_id = self.index.exhibit_ids.get(exhibit_name)
+        return exhibit_id is not None and bool((self.visited_exhibits | self.started_exhibits) >> exhibit_id & 1)
+
+    def zone_completed(self, zone_name: str) -> bool:
+        """Every exhibit of the zone visited or introduced (False for zones without exhibits)."""
+        zone_id = self.index.zone_ids.get(zone_name)
+        if zone_id is None or not self.index.zone_exhibit_mask[zone_id]:
+            return False
+        return not self.index.zone_exhibit_mask[zone_id] & ~(self.visited_exhibits | self.started_exhibits)
+
+    def unseen_exhibits(self, zone_name: str) -> List[str]:
+        zone_id = self.index.zone_ids.get(zone_name)
+        if zone_id is None:
+            return []
+        mask = self.index.zone_exhibit_mask[zone_id] & ~(self.visited_exhibits | self.started_exhibits)
+        return _names(mask, self.index.exhibit_names)
+
+    def next_unseen_exhibit(self, zone_name: str, exclude: str = "") -> str:
+        """
+        First exhibit of the zone neither visited nor introduced; failing that,
+        the first one still without a status.
+        """
+        return _first(self._next_exhibit_mask(zone_name, exclude), self.index.exhibit_names)
+
+    def next_exhibit_candidates(self, zone_name: str, exclude: str = "") -> List[str]:
+        """All exhibits next_unseen_exhibit chooses from (catalogue order), e.g. for interest ranking."""
+        return _names(self._next_exhibit_mask(zone_name, exclude), self.index.exhibit_names)
+
+    def unseen_zones(self, exclude: str = "") -> List[str]:
+        candidates = self.index.primary_zone_mask & ~_bit(self.index.zone_ids.get(exclude))
+        return _names(candidates & ~(self.visited_zones | self.started_zones), self.index.zone_names)
+
+    def next_unseen_zone(self, exclude: str = "") -> str:
+        """Same two-pass rule as next_unseen_exhibit, over exhibition (non-facility) zones."""
+        return _first(self._next_zone_mask(exclude), self.index.zone_names)
+
+    def next_zone_candidates(self, exclude: str = "") -> List[str]:
+        """All zones next_unseen_zone chooses from (catalogue order); callers may rank them, e.g. by distance."""
+        return _names(self._next_zone_mask(exclude), self.index.zone_names)
+
+    def signature(self, zone_name: str) -> Tuple[int, int, int, int]:
+        """
+        Everything the zone-scoped queries above can observe for `zone_name`:
+        its exhibits' bits plus the zone-level bitmaps. Equal signatures give
+        equal answers, so it works as an exact cache key.
+        """
+        zone_id = self.index.zone_ids.get(zone_name)
+        mask = self.index.zone_exhibit_mask[zone_id] if zone_id is not None else 0
+        return (
+            (self.visited_exhibits | self.started_exhibits) & mask,
+            self.started_exhibits & mask,
+            self.visited_zones | self.started_zones,
+            self.started_zones,
+        )
+
+    def _next_exhibit_mask(self, zone_name: str, exclude: str) -> int:
+        zone_id = self.index.zone_ids.get(zone_name)
+        if zone_id is None:
+            return 0
+        candidates = self.index.zone_exhibit_mask[zone_id] & ~_bit(self.index.exhibit_ids.get(exclude))
+        return candidates & ~(self.visited_exhibits | self.started_exhibits) or candidates & ~self.started_exhibits
+
+    def _next_zone_mask(self, exclude: str) -> int:
+        candidates = self.index.primary_zone_mask & ~_bit(self.index.zone_ids.get(exclude))
+        return candidates & ~(self.visited_zones | self.started_zones) or candidates & ~self.started_zones
+
+    # ---------- views (API JSON / prompt text) ----------
+
+    def zone_progress(self) -> Dict[str, str]:
+        return {
+            name: ZONE_STATUSES[self.zone_status[zone_id]]
+            for zone_id, name in enumerate(self.index.zone_names)
+            if self.zone_status[zone_id]
+        }
+
+    def exhibit_progress(self) -> Dict[str, str]:
+        return {
+            name: EXHIBIT_STATUSES[self.exhibit_status[exhibit_id]]
+            for exhibit_id, name in enumerate(self.index.exhibit_names)
+            if self.exhibit_status[exhibit_id]
+        }
+
+    def visited_zone_names(self) -> List[str]:
+        return _names(self.visited_zones, self.index.zone_names)
+
+    def visited_exhibit_names(self) -> List[str]:
+        return _names(self.visited_exhibits, self.index.exhibit_names)
+
+
+def _bit(position: int | None) -> int:
+    return 0 if position is None else 1 << position
+
+
+def _first(mask: int, names: List[str]) -> str:
+    if not mask:
+        return ""
+    return names[(mask & -mask).bit_length() - 1]
+
+
+def _names(mask: int, names: List[str]) -> List[str]:
+    result: List[str] = []
+    while mask:
+        low = mask & -mask
+        result.append(names[low.bit_length() - 1])
+        mask ^= low
+    return result
@@ -2,34 +2,64 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
-from museguide.llm.prompts import SYSTEM_PROMPT_CORE
+from museguide.llm.domain_retrieval import DomainPriorIndex
+from museguide.llm.progress import TourProgress
+from museguide.llm.prompts import SYSTEM_PROMPT_CORE, SYSTEM_PROMPT_CORE_EN
 
 
 def build_domain_prior_prompt(domain_cfg: dict) -> str:
     lines = ["以下是当前系统中可识别的展区与展品（包含空间信息）："]
 
     for zone in domain_cfg.get("zones", []):
-        location = zone.get("location", {})
-        floor = location.get("floor", "")
-        area = location.get("area", "")
-        description = location.get("description", "")
-        zone_line = f"- 展区：{zone['name']}（{zone['id']}）"
-        loc_parts = [part for part in [floor, area, description] if part]
-        if loc_parts:
-            zone_line += "｜位置：" + " / ".join(loc_parts)
-        lines.append(zone_line)
-
-        intro = zone.get("intro")
-        if intro:
-            lines.append(f"  简介：{intro}")
-
-        for exhibit in zone.get("exhibits", []):
-            alias_str = "、".join(exhibit.get("aliases", []))
-            lines.append(f"  - 展品：{exhibit['name']}（{exhibit['id']}），别名：{alias_str}")
+        lines.extend(_domain_zone_lines(zone, zone.get("exhibits", [])))
 
     return "\n".join(lines)
 
 
+def build_scoped_domain_prior_prompt(index: DomainPriorIndex, selection: Dict[str, List[str]]) -> str:
+    """
+    Per-turn slice of the domain prior: a compact list of every zone, then
+    full entries only for the zones / exhibits selected for this turn.
+    """
+    lines = ["全馆展区一览（名称｜楼层 / 区域）："]
+    for zone in index.zones:
+        location = zone.get("location", {}) or {}
+        loc_parts = [part for part in [location.get("floor", ""), location.get("area", "")] if part]
+        lines.append(f"- {zone['name']}" + ("｜" + " / ".join(loc_parts) if loc_parts else ""))
+
+    if selection:
+        lines.append("")
+        lines.append("与本轮对话相关的展区与展品（包含空间信息）：")
+        for zone_name, exhibit_names in selection.items():
+            zone = index.zone_by_name.get(zone_name)
+            if not zone:
+                continue
+            exhibits = [index.exhibit_by_name[name] for name in exhibit_names if name in index.exhibit_by_name]
+            lines.extend(_domain_zone_lines(zone, exhibits))
+    return "\n".join(lines)
+
+
+def _domain_zone_lines(zone: Dict[str, Any], exhibits: List[Dict[str, Any]]) -> List[str]:
+    location = zone.get("location", {})
+    floor = location.get("floor", "")
+    area = location.get("area", "")
+    description = location.get("description", "")
+    zone_line = f"- 展区：{zone['name']}（{zone['id']}）"
+    loc_parts = [part for part in [floor, area, description] if part]
+    if loc_parts:
+        zone_line += "｜位置：" + " / ".join(loc_parts)
+    lines = [zone_line]
+
+    intro = zone.get("intro")
+    if intro:
+        lines.append(f"  简介：{intro}")
+
+    for exhibit in exhibits or []:
+        alias_str = "、".join(exhibit.get("aliases", []))
+        lines.append(f"  - 展品：{exhibit['name']}（{exhibit['id']}），别名：{alias_str}")
+    return lines
+
+
 def build_guide_state_prompt(guide_states: dict) -> str:
     lines = []
     lines.append("你只能从以下导览员【身体动作状态】中选择一个作为 guide_state：\n")
@@ -44,20 +74,38 @@ def build_guide_state_prompt(guide_states: dict) -> str:
     return "\n".join(lines)
 
 
-def build_base_system_prompt(domain_cfg: dict, guide_states: dict) -> str:
-    return "\n\n".join([
+def build_base_system_prompt(domain_cfg: dict, guide_states: dict, include_domain_prior: bool = True) -> str:
+    return "\n\n".join(filter(None, [
         SYSTEM_PROMPT_CORE.strip(),
         build_guide_state_prompt(guide_states),
-        build_domain_prior_prompt(domain_cfg),
-    ])
+        build_domain_prior_prompt(domain_cfg) if include_domain_prior else "",
+    ]))
 
 
-def build_system_prompt(
-    *,
+def build_base_system_prompt_en(domain_cfg: dict, guide_states: dict, include_domain_prior: bool = True) -> str:
+    return "\n\n".join(filter(None, [
+        SYSTEM_PROMPT_CORE_EN.strip(),
+        "guide_state options: " + ", ".join(guide_states.keys()),
+        build_domain_prior_prompt(domain_cfg) if include_domain_prior else "",
+    ]))
+
+
+def build_english_persona_prefix(persona: Dict[str, Any], force_english: bool = False) -> str:
+    self_ref = (persona.get("self_ref") or "").strip()
+    user_address = (persona.get("user_address") or "").strip()
+    return "\n".join(filter(None, [
+        (persona.get("prompt_prefix") or "").strip(),
+        f"Refer to yourself as \"{self_ref}\" and address the visitor as \"{user_address}\"."
+        if self_ref and user_address else "",
+        "Language constraint: tts_text must be English only.",
+        "Hard requirement: any Chinese character in tts_text makes the output invalid."
+        if force_english else "",
+    ]))
+
+
+def build_persona_prefix(
     persona: Dict[str, Any],
     persona_id: str,
-    base_system_prompt: str,
-    context_text: str = "",
     force_english: bool = False,
 ) -> str:
     prefix = (persona.get("prompt_prefix") or "").strip()
@@ -93,7 +141,18 @@ def build_system_prompt(
                 prefix,
                 "Hard requirement: If any non-English appears in tts_text, the output is invalid.",
             ]))
+    return prefix
+
 
+def build_system_prompt(
+    *,
+    persona: Dict[str, Any],
+    persona_id: str,
+    base_system_prompt: str,
+    context_text: str = "",
+    force_english: bool = False,
+) -> str:
+    prefix = build_persona_prefix(persona, persona_id, force_english=force_english)
     parts = [prefix, context_text, base_system_prompt]
     return "\n\n".join([part for part in parts if part])
 
@@ -113,12 +172,9 @@ def build_tour_progress_context(
     current_exhibit = str(state.get("current_exhibit", "")).strip()
     current_focus_status = str(state.get("current_focus_status", "")).strip()
     guide_stage = str(state.get("guide_stage", "")).strip()
-    zone_progress = dict(state.get("zone_progress", {}) or {})
-    exhibit_progress = dict(state.get("exhibit_progress", {}) or {})
-    visited_zones = set(state.get("visited_zones", []) or [])
-    visited_exhibits = set(state.get("visited_exhibits", []) or [])
+    progress = state.get("progress")
 
-    if not any([current_zone, current_exhibit, guide_stage, zone_progress, exhibit_progress]):
+    if not any([current_zone, current_exhibit, guide_stage, progress is not None and progress.any()]):
         return ""
 
     lines: List[str] = ["导览进程记忆："]
@@ -126,7 +182,7 @@ def build_tour_progress_context(
     unseen_zones: List[str] = []
     for zone in domain_cfg.get("zones", []):
         zone_name = str(zone.get("name", "")).strip()
-        status = str(zone_progress.get(zone_name, "unseen")).strip()
+        status = progress.zone_status_of(zone_name) if progress is not None else "unseen"
         if status == "unseen":
             unseen_zones.append(zone_name)
             continue
@@ -135,13 +191,7 @@ def build_tour_progress_context(
         lines.append("已涉及展区：" + "；".join(zone_summaries))
     if unseen_zones:
         lines.append("尚未涉及展区：" + "、".join(unseen_zones[:6]))
-    zone_detail_lines = _build_zone_progress_lines(
-        domain_cfg=domain_cfg,
-        zone_progress=zone_progress,
-        exhibit_progress=exhibit_progress,
-        visited_zones=visited_zones,
-        visited_exhibits=visited_exhibits,
-    )
+    zone_detail_lines = _build_zone_progress_lines(domain_cfg=domain_cfg, progress=progress)
     if zone_detail_lines:
         lines.append("全馆导览进程：")
         lines.extend(zone_detail_lines)
@@ -151,7 +201,9 @@ def build_tour_progress_context(
         lines.append(f"当前导览阶段：{guide_stage}")
     if current_exhibit:
         focus_label = _exhibit_status_label(
-            current_focus_status or exhibit_progress.get(current_exhibit, "brief")
+            current_focus_status
+            or (progress.exhibit_status_of(current_exhibit) if progress is not None else "")
+            or "brief"
         )
         lines.append(f"当前聚焦展品：{current_exhibit}（{focus_label}）")
 
@@ -162,7 +214,7 @@ def build_tour_progress_context(
         unseen: List[str] = []
         for exhibit in current_zone_cfg.get("exhibits", []) or []:
             exhibit_name = str(exhibit.get("name", "")).strip()
-            status = str(exhibit_progress.get(exhibit_name, "unseen")).strip()
+            status = progress.exhibit_status_of(exhibit_name) if progress is not None else "unseen"
             if status == "detailed":
                 detailed.append(exhibit_name)
             elif status == "brief":
@@ -240,14 +292,7 @@ def _exhibit_status_label(status: str) -> str:
     }.get(str(status or "").strip(), "未知")
 
 
-def _build_zone_progress_lines(
-    *,
-    domain_cfg: Dict[str, Any],
-    zone_progress: Dict[str, str],
-    exhibit_progress: Dict[str, str],
-    visited_zones: set[str],
-    visited_exhibits: set[str],
-) -> List[str]:
+def _build_zone_progress_lines(*, domain_cfg: Dict[str, Any], progress: TourProgress | None) -> List[str]:
     lines: List[str] = []
     for zone in domain_cfg.get("zones", []):
         if zone.get("category") == "facility":
@@ -255,21 +300,21 @@ def _build_zone_progress_lines(
         zone_name = str(zone.get("name", "")).strip()
         if not zone_name:
             continue
-        zone_status = str(zone_progress.get(zone_name, "unseen")).strip()
+        zone_status = progress.zone_status_of(zone_name) if progress is not None else "unseen"
         seen_exhibits: List[str] = []
         unseen_exhibits: List[str] = []
         for exhibit in zone.get("exhibits", []) or []:
             exhibit_name = str(exhibit.get("name", "")).strip()
             if not exhibit_name:
                 continue
-            exhibit_status = str(exhibit_progress.get(exhibit_name, "unseen")).strip()
-            if exhibit_name in visited_exhibits or exhibit_status in {"brief", "detailed"}:
+            exhibit_status = progress.exhibit_status_of(exhibit_name) if progress is not None else "unseen"
+            if progress is not None and progress.exhibit_touched(exhibit_name):
                 seen_exhibits.append(
-                    f"{exhibit_name}（{_exhibit_status_label(exhibit_status or 'brief')}）"
+                    f"{exhibit_name}（{_exhibit_status_label(exhibit_status)}）"
                 )
             else:
                 unseen_exhibits.append(exhibit_name)
-        zone_seen = zone_name in visited_zones or zone_status not in {"", "unseen"}
+        zone_seen = progress is not None and progress.zone_touched(zone_name)
         line = f"- {zone_name}：{_zone_status_label(zone_status if zone_seen else 'unseen')}"
         line += "；已看展品：" + ("、".join(seen_exhibits) if seen_exhibits else "无")
         line += "；未看展品：" + (
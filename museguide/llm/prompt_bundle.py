@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from museguide.llm.prompt_builder import build_english_persona_prefix, build_persona_prefix
+
+_CJK_RANGES = "\u3000-\u303f\u4e00-\u9fff\uff00-\uffef"
+_CJK_CHAR = re.compile(f"[{_CJK_RANGES}]")
+_WORD = re.compile(f"[A-Za-z0-9_]+|[^\\sA-Za-z0-9_{_CJK_RANGES}]")
+
+
+@dataclass(frozen=True)
+class PromptBundle:
+    """
+    Pre-rendered system prompt pieces for one persona.
+    Per-turn assembly only splices the progress context between prefix and base.
+    """
+
+    persona_id: str
+    language: str
+    prefix: str
+    strict_prefix: str
+    base: str
+    prefix_tokens: int
+    strict_prefix_tokens: int
+    base_tokens: int
+
+    def render(self, context_text: str = "", force_english: bool = False) -> str:
+        prefix = self.strict_prefix if force_english else self.prefix
+        parts = [prefix, context_text, self.base]
+        return "\n\n".join([part for part in parts if part])
+
+    def token_count(self, context_text: str = "", force_english: bool = False) -> int:
+        prefix_tokens = self.strict_prefix_tokens if force_english else self.prefix_tokens
+        return prefix_tokens + estimate_tokens(context_text) + self.base_tokens
+
+
+def build_prompt_bundle(
+    *,
+    persona: Dict[str, Any],
+    persona_id: str,
+    base_system_prompt: str,
+    base_system_prompt_en: str = "",
+    english: bool = False,
+    language_guard: bool = False,
+) -> PromptBundle:
+    """
+    English personas in language-guarded mode get the compact English base
+    and prefixes; everyone else gets the Chinese base prompt.
+    """
+    if english and language_guard and base_system_prompt_en:
+        prefix = build_english_persona_prefix(persona)
+        strict_prefix = build_english_persona_prefix(persona, force_english=True)
+        base = base_system_prompt_en
+    else:
+        prefix = build_persona_prefix(persona, persona_id)
+        strict_prefix = build_persona_prefix(persona, persona_id, force_english=True)
+        base = base_system_prompt
+    return PromptBundle(
+        persona_id=persona_id,
+        language="en" if english else "zh",
+        prefix=prefix,
+        strict_prefix=strict_prefix,
+        base=base,
+        prefix_tokens=estimate_tokens(prefix),
+        strict_prefix_tokens=estimate_tokens(strict_prefix),
+        base_tokens=estimate_tokens(base),
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Tokenizer-free estimate: one token per CJK character, roughly one per
+    English word / symbol. Good enough for budgeting and regressions.
+    """
+    if not text:
+        return 0
+    return len(_CJK_CHAR.findall(text)) + len(_WORD.findall(text))
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+from museguide.llm.domain_retrieval import tokenize
+from museguide.llm.progress import ProgressIndex
+
+# feature group weights (each group is L2-normalised before weighting)
+_TEXT_WEIGHT = 1.0
+_CATEGORY_WEIGHT = 0.6
+_MATERIAL_WEIGHT = 0.5
+_ERA_WEIGHT = 0.4
+# curated cross references (compare_to / next_recommendation) on top of the cosine
+_LINK_BONUS = 0.5
+# interest vector: newest interest weighs 1, each older one DECAY times less;
+# a zone interest is spread over the zone's exhibits
+_DECAY = 0.8
+_ZONE_INTEREST = 0.3
+
+_TEXT_FIELDS = ("description", "summary", "key_points", "historical_context", "craft", "story")
+_LINK_FIELDS = ("compare_to", "next_recommendation")
+_MATERIAL_SPLIT = re.compile(r"[、，,/\s]+")
+_TITLE = re.compile(r"《[^》]+》")
+_BRACKETS = re.compile(r"（[^）]*）")
+
+
+class ExhibitRecommender:
+    """
+    Interest-driven exhibit ranking, built once per config snapshot.
+
+    Every exhibit gets a feature vector from the domain prior (text bigram
+    TF-IDF, zone category, material, era) and the exhibit × exhibit cosine
+    matrix is precomputed, plus a bonus where the curators cross-reference
+    two exhibits. Rows and columns follow ProgressIndex exhibit ids. At
+    runtime a session's `user_interests` become a weight vector and
+    candidates are ranked by interest · similarity; with no usable interest
+    the catalogue order is kept.
+    """
+
+    def __init__(self, domain_cfg: Dict[str, Any], progress_index: ProgressIndex):
+        self.index = progress_index
+        exhibits: List[Dict[str, Any]] = [{} for _ in progress_index.exhibit_names]
+        categories: List[str] = [""] * len(exhibits)
+        self._zone_exhibit_ids: Dict[str, List[int]] = {}
+        for zone in domain_cfg.get("zones", []) or []:
+            zone_name = str(zone.get("name", "")).strip()
+            zone_id = progress_index.zone_ids.get(zone_name)
+            if zone_id is None:
+                continue
+            self._zone_exhibit_ids.setdefault(
+                zone_name,
+                [i for i in range(len(exhibits)) if progress_index.zone_exhibit_mask[zone_id] >> i & 1],
+            )
+            for exhibit in zone.get("exhibits", []) or []:
+                exhibit_id = progress_index.exhibit_ids.get(str(exhibit.get("name", "")).strip())
+                if exhibit_id is not None and not exhibits[exhibit_id]:
+                    exhibits[exhibit_id] = exhibit
+                    categories[exhibit_id] = str(zone.get("category", "")).strip()
+
+        vectors = _feature_vectors(exhibits, categories)
+        size = len(exhibits)
+        self._sim: List[List[float]] = [[0.0] * size for _ in range(size)]
+        for i in range(size):
+            for j in range(i + 1, size):
+                value = _dot(vectors[i], vectors[j])
+                self._sim[i][j] = self._sim[j][i] = value
+
+        references = _reference_names(exhibits)
+        for i, exhibit in enumerate(exhibits):
+            text = "".join(str(exhibit.get(field, "")) for field in _LINK_FIELDS)
+            for j, names in enumerate(references):
+                if i != j and any(name in text for name in names):
+                    self._sim[i][j] += _LINK_BONUS
+                    self._sim[j][i] += _LINK_BONUS
+
+    def similarity(self, a: str, b: str) -> float:
+        i = self.index.exhibit_ids.get(a)
+        j = self.index.exhibit_ids.get(b)
+        return self._sim[i][j] if i is not None and j is not None else 0.0
+
+    def rank(self, candidates: Sequence[str], interests: Sequence[str]) -> List[str]:
+        """Candidates best-first; ties (and candidates outside the catalogue) keep their given order."""
+        ids = [self.index.exhibit_ids.get(name) for name in candidates]
+        weights = self._interest_vector(interests)
+        if not weights or len(candidates) < 2:
+            return list(candidates)
+        scores = [0.0] * len(candidates)
+        for row_id, weight in weights.items():
+            row = self._sim[row_id]
+            for position, exhibit_id in enumerate(ids):
+                if exhibit_id is not None:
+                    scores[position] += weight * row[exhibit_id]
+        order = sorted(range(len(candidates)), key=lambda position: -scores[position])
+        return [candidates[position] for position in order]
+
+    def best(self, candidates: Sequence[str], interests: Sequence[str]) -> str:
+        ranked = self.rank(candidates, interests)
+        return ranked[0] if ranked else ""
+
+    def _interest_vector(self, interests: Sequence[str]) -> Dict[int, float]:
+        weights: Dict[int, float] = {}
+        total = len(interests)
+        for position, item in enumerate(interests):
+            name = str(item or "").strip()
+            recency = _DECAY ** (total - 1 - position)
+            exhibit_id = self.index.exhibit_ids.get(name)
+            if exhibit_id is not None:
+                weights[exhibit_id] = weights.get(exhibit_id, 0.0) + recency
+                continue
+            zone_exhibits = self._zone_exhibit_ids.get(name, [])
+            for zone_exhibit_id in zone_exhibits:
+                weights[zone_exhibit_id] = weights.get(zone_exhibit_id, 0.0) + _ZONE_INTEREST * recency / len(zone_exhibits)
+        return weights
+
+
+def _feature_vectors(exhibits: List[Dict[str, Any]], categories: List[str]) -> List[Dict[str, float]]:
+    texts = [
+        Counter(tokenize(" ".join(_flatten(exhibit.get(field, "")) for field in _TEXT_FIELDS)))
+        for exhibit in exhibits
+    ]
+    document_frequency: Counter = Counter()
+    for counts in texts:
+        document_frequency.update(counts.keys())
+    total = len(exhibits)
+
+    vectors: List[Dict[str, float]] = []
+    for exhibit, category, counts in zip(exhibits, categories, texts):
+        vector: Dict[str, float] = {}
+        tfidf = {
+            token: tf * math.log((1 + total) / (1 + document_frequency[token]))
+            for token, tf in counts.items()
+        }
+        _add_group(vector, "t:", tfidf, _TEXT_WEIGHT)
+        _add_group(vector, "c:", {category: 1.0} if category else {}, _CATEGORY_WEIGHT)
+        materials = {
+            part: 1.0 for part in _MATERIAL_SPLIT.split(str(exhibit.get("material", "")).strip()) if part
+        }
+        _add_group(vector, "m:", materials, _MATERIAL_WEIGHT)
+        era_head = str(exhibit.get("era", "")).split("·")[0]
+        _add_group(vector, "e:", dict.fromkeys(tokenize(_BRACKETS.sub("", era_head)), 1.0), _ERA_WEIGHT)
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        vectors.append({key: value / norm for key, value in vector.items()} if norm else {})
+    return vectors
+
+
+def _add_group(vector: Dict[str, float], prefix: str, values: Dict[str, float], weight: float) -> None:
+    norm = math.sqrt(sum(value * value for value in values.values()))
+    if not norm:
+        return
+    for key, value in values.items():
+        vector[prefix + key] = weight * value / norm
+
+
+def _reference_names(exhibits: List[Dict[str, Any]]) -> List[List[str]]:
+    """Ways curators refer to an exhibit in prose: name, aliases, 《title》, name without （复制件）."""
+    result: List[List[str]] = []
+    for exhibit in exhibits:
+        name = str(exhibit.get("name", "")).strip()
+        names = {name, _BRACKETS.sub("", name)}
+        names.update(str(alias).strip() for alias in exhibit.get("aliases", []) or [])
+        names.update(_TITLE.findall(name))
+        result.append([value for value in names if len(value) >= 2])
+    return result
+
+
+def _flatten(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value or "")
+
+
+def _dot(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(key, 0.0) for key, value in a.items())
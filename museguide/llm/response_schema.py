@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from museguide.llm.guide_stage import GUIDE_STAGE_ORDER
+
+UNDETERMINED = "未确定"
+NON_CJK_PATTERN = "^[^\\u4e00-\\u9fff]*$"
+
+
+def build_guide_response_schema(
+    domain_cfg: Dict[str, Any],
+    guide_states: Dict[str, Any],
+    *,
+    english_only: bool = False,
+) -> Dict[str, Any]:
+    """
+    Build the JSON schema of one guide reply from config, so enums stay in
+    sync with guide_states.yaml / guide_stage.py / domain_prior.json.
+    With english_only, tts_text is additionally constrained to non-CJK text.
+    """
+    zones = domain_cfg.get("zones", []) or []
+    zone_names = _unique(str(zone.get("name", "")).strip() for zone in zones)
+    exhibit_names = _unique(
+        str(exhibit.get("name", "")).strip()
+        for zone in zones
+        for exhibit in zone.get("exhibits", []) or []
+    )
+    floors = _unique(str((zone.get("location") or {}).get("floor", "")).strip() for zone in zones)
+    areas = _unique(str((zone.get("location") or {}).get("area", "")).strip() for zone in zones)
+
+    properties: Dict[str, Any] = {
+        "guide_state": {"type": "string", "enum": list(guide_states.keys())},
+        "tts_text": {"type": "string", "pattern": NON_CJK_PATTERN} if english_only else {"type": "string"},
+        "confidence": {"type": "number"},
+        "guide_zone": {"type": "string", "enum": zone_names},
+        "guide_venue": {"type": "string"},
+        "guide_floor": {"type": "string", "enum": floors + [UNDETERMINED]},
+        "guide_area": {"type": "string", "enum": areas + [UNDETERMINED]},
+        "focus_exhibit": {"type": "string", "enum": exhibit_names + [UNDETERMINED]},
+        "guide_stage": {"type": "string", "enum": list(GUIDE_STAGE_ORDER)},
+        "user_intent": {"type": "string"},
+    }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties.keys()),
+        "additionalProperties": False,
+    }
+
+
+def build_text_format(mode: str, schema: Dict[str, Any] | None = None, name: str = "guide_response") -> Dict[str, Any] | None:
+    """
+    Map llm.yaml `response_format` (text / json / json_schema) to the
+    Responses API `text.format` payload. Returns None for plain text.
+    """
+    value = str(mode or "").strip().lower()
+    if value == "json_schema" and schema:
+        return {
+            "type": "json_schema",
+            "name": name,
+            "schema": schema,
+            "strict": True,
+        }
+    if value in {"json", "json_object", "json_schema"}:
+        return {"type": "json_object"}
+    return None
+
+
+def _unique(values) -> List[str]:
+    result: List[str] = []
+    seen: set[str] = set()
+    for value in values:
+        if not value or value in seen:
+            continue
+        seen.add(value)
+        result.append(value)
+    return result
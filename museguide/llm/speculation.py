@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+
+@dataclass(frozen=True)
+class _Speculation:
+    fingerprint: str
+    future: Future
+
+
+class SpeculativeCache:
+    """
+    Runs the pending recommended action of a session ahead of time.
+
+    After a turn, the orchestrator schedules the LLM call the visitor's most
+    likely reply ("好的") would trigger, computed from a copy of the session
+    state. On the next turn the entry is taken exactly once: if the request
+    fingerprint matches, its result is committed instead of calling the LLM
+    again; otherwise it is dropped. Speculative work never writes session state.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], _Speculation] = {}
+        self.scheduled = 0
+        self.hits = 0
+        self.misses = 0
+
+    def schedule(
+        self,
+        session_id: str,
+        persona_id: str,
+        fingerprint: str,
+        compute: Callable[[], Dict[str, Any]],
+    ) -> None:
+        future = self._executor.submit(compute)
+        with self._lock:
+            previous = self._entries.pop((session_id, persona_id), None)
+            self._entries[(session_id, persona_id)] = _Speculation(fingerprint, future)
+            self.scheduled += 1
+        if previous is not None:
+            previous.future.cancel()
+
+    def take(self, session_id: str, persona_id: str, fingerprint: str) -> Dict[str, Any] | None:
+        """
+        Pop the session's speculation and return its result if it was computed
+        for exactly this request. An in-flight match is awaited: it started
+        earlier than a fresh call would.
+        """
+        with self._lock:
+            entry = self._entries.pop((session_id, persona_id), None)
+        if entry is None:
+            return None
+        if entry.fingerprint != fingerprint:
+            entry.future.cancel()
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            result = entry.future.result()
+        except Exception as error:
+            print(f"=== SPECULATION FAILED, generating live: {error} ===")
+            result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def discard(self, session_id: str, persona_id: str) -> None:
+        with self._lock:
+            entry = self._entries.pop((session_id, persona_id), None)
+        if entry is not None:
+            # a call already in flight cannot be interrupted; its result is simply dropped
+            entry.future.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "scheduled": self.scheduled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "pending": len(self._entries),
+            }
+
+
+def request_fingerprint(*parts: str) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
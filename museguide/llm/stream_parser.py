@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+GUIDE_STRING_FIELDS = (
+    "guide_state",
+    "tts_text",
+    "guide_zone",
+    "guide_venue",
+    "guide_floor",
+    "guide_area",
+    "focus_exhibit",
+    "guide_stage",
+    "user_intent",
+)
+GUIDE_NUMBER_FIELDS = ("confidence",)
+GUIDE_JSON_FIELDS = GUIDE_STRING_FIELDS + GUIDE_NUMBER_FIELDS
+
+_STRING_STOP = re.compile(r'["\\]')
+_SCALAR_STOP = re.compile(r"[,}\s]")
+_NESTED_STOP = re.compile(r'["\\{}\[\]]')
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+# parser states
+_BEFORE_OBJECT = 0
+_EXPECT_KEY = 1
+_IN_KEY = 2
+_EXPECT_COLON = 3
+_EXPECT_VALUE = 4
+_IN_STRING = 5
+_IN_SCALAR = 6
+_IN_NESTED = 7
+_DONE = 8
+
+
+class GuideJSONStreamParser:
+    """
+    Single-pass, incremental parser for the guide JSON object.
+
+    Text can be fed chunk by chunk as it streams from the LLM; every top-level
+    field is emitted (and passed to ``on_field``) as soon as its value closes.
+    ``finish()`` closes whatever is still open — a truncated string keeps its
+    prefix, a truncated number is parsed as far as it goes — so a malformed or
+    cut-off reply costs exactly one scan.
+    """
+
+    def __init__(self, on_field: Callable[[str, Any], None] | None = None):
+        self.fields: Dict[str, Any] = {}
+        self._on_field = on_field
+        self._state = _BEFORE_OBJECT
+        self._key_parts: List[str] = []
+        self._value_parts: List[str] = []
+        self._key = ""
+        self._escape = ""
+        self._nested_depth = 0
+        self._nested_in_string = False
+        self._nested_escape = False
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    @property
+    def partial_key(self) -> str:
+        """Key of the string value currently being streamed, if any."""
+        return self._key if self._state == _IN_STRING else ""
+
+    @property
+    def partial_value(self) -> str:
+        """Decoded prefix of the string value currently being streamed."""
+        return "".join(self._value_parts) if self._state == _IN_STRING else ""
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        emitted: List[Tuple[str, Any]] = []
+        text = chunk or ""
+        pos = 0
+        end = len(text)
+        while pos < end and self._state != _DONE:
+            state = self._state
+            if state == _BEFORE_OBJECT:
+                brace = text.find("{", pos)
+                if brace < 0:
+                    return emitted
+                pos = brace + 1
+                self._state = _EXPECT_KEY
+            elif state == _EXPECT_KEY:
+                ch = text[pos]
+                pos += 1
+                if ch == '"':
+                    self._key_parts = []
+                    self._state = _IN_KEY
+                elif ch == "}":
+                    self._state = _DONE
+            elif state == _IN_KEY:
+                pos = self._consume_string(text, pos, self._key_parts, in_key=True)
+            elif state == _EXPECT_COLON:
+                ch = text[pos]
+                pos += 1
+                if ch == ":":
+                    self._state = _EXPECT_VALUE
+                elif ch == "}":
+                    self._state = _DONE
+            elif state == _EXPECT_VALUE:
+                ch = text[pos]
+                if ch.isspace():
+                    pos += 1
+                elif ch == '"':
+                    pos += 1
+                    self._value_parts = []
+                    self._state = _IN_STRING
+                elif ch in "{[":
+                    pos += 1
+                    self._value_parts = [ch]
+                    self._nested_depth = 1
+                    self._nested_in_string = False
+                    self._nested_escape = False
+                    self._state = _IN_NESTED
+                elif ch == "}":
+                    self._state = _DONE
+                else:
+                    self._value_parts = []
+                    self._state = _IN_SCALAR
+            elif state == _IN_STRING:
+                pos = self._consume_string(text, pos, self._value_parts, in_key=False)
+                if self._state == _EXPECT_KEY:
+                    emitted.append(self._emit("".join(self._value_parts)))
+            elif state == _IN_SCALAR:
+                match = _SCALAR_STOP.search(text, pos)
+                stop = match.start() if match else end
+                self._value_parts.append(text[pos:stop])
+                pos = stop
+                if match:
+                    emitted.append(self._emit(_parse_scalar("".join(self._value_parts))))
+                    self._state = _DONE if text[stop] == "}" else _EXPECT_KEY
+                    pos = stop + 1
+            elif state == _IN_NESTED:
+                pos = self._consume_nested(text, pos)
+                if self._state == _EXPECT_KEY:
+                    raw = "".join(self._value_parts)
+                    try:
+                        emitted.append(self._emit(json.loads(raw)))
+                    except json.JSONDecodeError:
+                        pass
+        return emitted
+
+    def finish(self) -> Dict[str, Any]:
+        """Close any truncated value and return every field recovered so far."""
+        if self._state == _IN_STRING and self._key:
+            self._emit("".join(self._value_parts).strip())
+        elif self._state == _IN_SCALAR and self._key:
+            value = _parse_scalar("".join(self._value_parts))
+            if value is not None:
+                self._emit(value)
+        self._state = _DONE
+        return dict(self.fields)
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _emit(self, value: Any) -> Tuple[str, Any]:
+        key = self._key
+        value = _coerce_field(key, value)
+        self.fields[key] = value
+        if self._on_field is not None:
+            self._on_field(key, value)
+        return key, value
+
+    def _consume_string(self, text: str, pos: int, parts: List[str], *, in_key: bool) -> int:
+        end = len(text)
+        while pos < end:
+            if self._escape:
+                pos = self._consume_escape(text, pos, parts)
+                continue
+            match = _STRING_STOP.search(text, pos)
+            if not match:
+                parts.append(text[pos:])
+                return end
+            stop = match.start()
+            if stop > pos:
+                parts.append(text[pos:stop])
+            if text[stop] == "\\":
+                self._escape = "\\"
+                pos = stop + 1
+                continue
+            if in_key:
+                self._key = "".join(parts)
+                self._state = _EXPECT_COLON
+            else:
+                self._state = _EXPECT_KEY
+            return stop + 1
+        return pos
+
+    def _consume_escape(self, text: str, pos: int, parts: List[str]) -> int:
+        ch = text[pos]
+        if self._escape == "\\":
+            if ch == "u":
+                self._escape = "\\u"
+            else:
+                parts.append(_ESCAPES.get(ch, ch))
+                self._escape = ""
+            return pos + 1
+        self._escape += ch
+        if len(self._escape) == 6:
+            try:
+                parts.append(chr(int(self._escape[2:], 16)))
+            except ValueError:
+                parts.append(self._escape)
+            self._escape = ""
+        return pos + 1
+
+    def _consume_nested(self, text: str, pos: int) -> int:
+        end = len(text)
+        while pos < end:
+            if self._nested_escape:
+                self._value_parts.append(text[pos])
+                self._nested_escape = False
+                pos += 1
+                continue
+            match = _NESTED_STOP.search(text, pos)
+            stop = match.start() if match else end
+            self._value_parts.append(text[pos:stop + 1] if match else text[pos:])
+            if not match:
+                return end
+            ch = text[stop]
+            pos = stop + 1
+            if ch == "\\":
+                self._nested_escape = self._nested_in_string
+            elif ch == '"':
+                self._nested_in_string = not self._nested_in_string
+            elif self._nested_in_string:
+                continue
+            elif ch in "{[":
+                self._nested_depth += 1
+            elif ch in "}]":
+                self._nested_depth -= 1
+                if self._nested_depth == 0:
+                    self._state = _EXPECT_KEY
+                    return pos
+        return pos
+
+
+def parse_guide_json_stream(text: str) -> Dict[str, Any]:
+    parser = GuideJSONStreamParser()
+    parser.feed(text)
+    return parser.finish()
+
+
+def _parse_scalar(raw: str) -> Any:
+    value = raw.strip()
+    if not value:
+        return None
+    if value in {"true", "false", "null"}:
+        return json.loads(value)
+    try:
+        return float(value) if any(ch in value for ch in ".eE") else int(value)
+    except ValueError:
+        return value
+
+
+def _coerce_field(key: str, value: Any) -> Any:
+    if key in GUIDE_NUMBER_FIELDS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if key in GUIDE_STRING_FIELDS and value is not None and not isinstance(value, str):
+        return str(value)
+    return value
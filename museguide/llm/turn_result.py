@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Sequence
+
+from museguide.llm.progress import TourProgress
+
+StageHook = Callable[[str, float], None]
+
+
+@dataclass(slots=True)
+class TurnResult:
+    """
+    One turn's guide result as it moves through the orchestrator pipeline.
+    Stages mutate it in place; `to_dict()` produces the API JSON once, at the
+    boundary. Field order is the order of keys in that JSON.
+    """
+
+    guide_state: str = ""
+    video_state: str = ""
+    tts_text: str = ""
+    confidence: Any = 0.75
+    guide_zone: str = ""
+    guide_venue: str = ""
+    guide_floor: str = ""
+    guide_area: str = ""
+    focus_exhibit: str = ""
+    guide_stage: str = ""
+    user_intent: str = ""
+    tts_voice_type: str | None = None
+    video_dir: str = ""
+    video_prefix: str = ""
+    tour_event: str = ""
+    current_zone: str = ""
+    current_exhibit: str = ""
+    current_focus_status: str = ""
+    reply_text: str = ""
+    follow_up_text: str = ""
+    pending_action_label: str = ""
+    pending_action_text: str = ""
+    pending_action_type: str = ""
+    pending_action_target: str = ""
+    # serialised as visited_zones / visited_exhibits / zone_progress / exhibit_progress
+    progress: TourProgress | None = None
+    user_interests: List[str] = field(default_factory=list)
+    video_mapping_source: str = ""
+    suggested_actions: List[Dict[str, str]] = field(default_factory=list)
+    next_step_type: str = ""
+    next_step_target: str = ""
+    degraded: bool = False
+    # per-stage wall time in ms; not part of the API JSON
+    stage_ms: Dict[str, float] = field(default_factory=dict)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read access for the helpers that take a result mapping (initiative / tour state)."""
+        value = getattr(self, key, default)
+        return default if value is None else value
+
+    def apply_session_state(self, state: Dict[str, Any]) -> None:
+        for key, value in state.items():
+            if key in _SESSION_FIELDS:
+                setattr(self, key, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for name in _JSON_FIELDS:
+            value = getattr(self, name)
+            if name == "tts_voice_type" and value is None:
+                continue
+            if name == "progress":
+                data["visited_zones"] = value.visited_zone_names() if value else []
+                data["visited_exhibits"] = value.visited_exhibit_names() if value else []
+                data["zone_progress"] = value.zone_progress() if value else {}
+                data["exhibit_progress"] = value.exhibit_progress() if value else {}
+                continue
+            data[name] = value
+        return data
+
+
+_JSON_FIELDS = tuple(f.name for f in fields(TurnResult) if f.name != "stage_ms")
+# session-store keys copied back onto the result after a store write
+_SESSION_FIELDS = frozenset({
+    "tour_event",
+    "current_zone",
+    "current_exhibit",
+    "current_focus_status",
+    "reply_text",
+    "follow_up_text",
+    "pending_action_label",
+    "pending_action_text",
+    "pending_action_type",
+    "pending_action_target",
+    "progress",
+    "user_interests",
+})
+
+
+@dataclass(slots=True)
+class TurnContext:
+    """
+    Per-turn inputs the pipeline stages read. `user_text` is the effective
+    request (a bare affirmation resolved to the pending recommendation);
+    `raw_user_text` is what the visitor actually said, which is what the
+    dialogue history and tour memory record.
+    """
+
+    user_text: str
+    persona_id: str
+    session_key: str
+    prior_state: Dict[str, Any]
+    raw_user_text: str = ""
+
+
+@dataclass(frozen=True)
+class TurnStage:
+    name: str
+    apply: Callable[[TurnResult, TurnContext], None]
+
+
+class TurnPipeline:
+    """
+    Ordered post-generation stages applied to a TurnResult in place. Each
+    stage is timed into `result.stage_ms`, and hooks receive
+    (stage_name, seconds) for profiling.
+    """
+
+    def __init__(self, stages: Sequence[TurnStage], hooks: Sequence[StageHook] = ()):
+        self.stages = tuple(stages)
+        self.hooks: List[StageHook] = list(hooks)
+
+    def run(self, result: TurnResult, turn: TurnContext, skip: Sequence[str] = ()) -> TurnResult:
+        for stage in self.stages:
+            if stage.name in skip:
+                continue
+            started = time.perf_counter()
+            stage.apply(result, turn)
+            self.record(result, stage.name, time.perf_counter() - started)
+        return result
+
+    def record(self, result: TurnResult, name: str, seconds: float) -> None:
+        """Also used for work timed outside the stage list (e.g. generation)."""
+        result.stage_ms[name] = round(seconds * 1000, 3)
+        for hook in self.hooks:
+            hook(name, seconds)
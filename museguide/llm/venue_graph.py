@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+KIND_WALK = "walk"
+KIND_STAIRS = "stairs"
+KIND_ELEVATOR = "elevator"
+
+_CONNECTOR_LABELS = {KIND_STAIRS: "楼梯", KIND_ELEVATOR: "电梯"}
+_MAX_2OPT_PASSES = 8
+
+
+@dataclass(frozen=True)
+class RouteLeg:
+    kind: str
+    start: str
+    end: str
+    floor: str
+    seconds: float
+
+
+@dataclass(frozen=True)
+class TourStop:
+    zone: str
+    exhibits: Tuple[str, ...]
+    walk_seconds: float | None  # None: not reachable on the graph
+    visit_seconds: float
+
+
+@dataclass(frozen=True)
+class TourPlan:
+    start: str
+    stops: Tuple[TourStop, ...]
+    total_seconds: float
+
+
+class VenueGraph:
+    """
+    Walking graph of the venue, built once per config snapshot.
+
+    Nodes are the zones of domain_prior.json (floor from `location.floor`)
+    plus one landing per stair / elevator and floor; venue_graph.yaml adds
+    the walking edges and the connector costs, and same-floor zones without
+    an explicit edge fall back to `same_floor_seconds`. All-pairs shortest
+    paths are precomputed (Floyd–Warshall, the graph has a few dozen nodes),
+    so distance, next-stop and route queries are table lookups.
+
+    Crowding is a per-query penalty on top of the tables: `crowd_penalty`
+    turns live head counts into extra seconds for zones above their
+    comfortable capacity, and `nearest` / `by_distance` / `plan_tour`
+    accept that map so visitors are steered away from packed halls.
+    """
+
+    def __init__(self, domain_cfg: Dict[str, Any], venue_cfg: Dict[str, Any] | None = None):
+        cfg = venue_cfg or {}
+        zones = [zone for zone in domain_cfg.get("zones", []) or [] if str(zone.get("name", "")).strip()]
+        self.floors: List[str] = [str(floor) for floor in cfg.get("floors", []) or []]
+        for zone in zones:
+            floor = _zone_floor(zone)
+            if floor and floor not in self.floors:
+                self.floors.append(floor)
+        self.exhibit_seconds = float(cfg.get("exhibit_seconds", 30))
+
+        self._labels: List[str] = []
+        self._node_floor: List[str] = []
+        self._node_ids: Dict[str, int] = {}
+        self._zone_nodes: Dict[str, int] = {}
+        for zone in zones:
+            name = str(zone.get("name", "")).strip()
+            if name in self._zone_nodes:
+                continue
+            node = self._add_node(name, _zone_floor(zone))
+            self._zone_nodes[name] = node
+            self._node_ids[str(zone.get("id", "")).strip() or name] = node
+            self._node_ids[name] = node
+
+        entrance = str(cfg.get("entrance", "")).strip()
+        entrance_node = self._node_ids.get(entrance)
+        self.entrance = self._labels[entrance_node] if entrance_node is not None else next(iter(self._zone_nodes), "")
+
+        connectors = {
+            str(item.get("id", "")).strip(): item
+            for item in cfg.get("connectors", []) or []
+            if str(item.get("id", "")).strip()
+        }
+        landings: Dict[str, Dict[str, int]] = {connector_id: {} for connector_id in connectors}
+        edges: List[Tuple[int, int, float, str]] = []
+        for item in cfg.get("edges", []) or []:
+            start, end, seconds = item
+            a = self._resolve(str(start), connectors, landings)
+            b = self._resolve(str(end), connectors, landings)
+            edges.append((a, b, float(seconds), KIND_WALK))
+
+        # 层间通道：同一楼梯 / 电梯任意两层出入口之间
+        for connector_id, floors in landings.items():
+            connector = connectors[connector_id]
+            kind = str(connector.get("kind", KIND_STAIRS))
+            per_floor = float(connector.get("seconds_per_floor", 45))
+            wait = float(connector.get("wait_seconds", 0))
+            items = sorted(floors.items(), key=lambda entry: self._floor_level(entry[0]))
+            for i, (floor_a, a) in enumerate(items):
+                for floor_b, b in items[i + 1:]:
+                    span = abs(self._floor_level(floor_b) - self._floor_level(floor_a))
+                    edges.append((a, b, wait + per_floor * span, kind))
+
+        # 兜底连边：同层展区；没有配置任何层间通道时再按层差连通各层
+        same_floor = float(cfg.get("same_floor_seconds", 150))
+        floor_change = float(cfg.get("floor_change_seconds", 90))
+        zone_nodes = list(self._zone_nodes.values())
+        for i, a in enumerate(zone_nodes):
+            for b in zone_nodes[i + 1:]:
+                floor_a, floor_b = self._node_floor[a], self._node_floor[b]
+                if floor_a == floor_b and same_floor > 0:
+                    edges.append((a, b, same_floor, KIND_WALK))
+                elif floor_a != floor_b and not connectors:
+                    span = abs(self._floor_level(floor_a) - self._floor_level(floor_b))
+                    edges.append((a, b, same_floor + floor_change * span, KIND_STAIRS))
+
+        self._build_paths(edges)
+
+        crowd = cfg.get("crowd", {}) or {}
+        self.comfortable_visitors = int(crowd.get("comfortable_visitors", 12))
+        self.seconds_per_visitor = float(crowd.get("seconds_per_visitor", 15))
+        self._capacity: Dict[str, int] = {}
+        for ref, value in (crowd.get("capacity", {}) or {}).items():
+            node = self._node_ids.get(str(ref).strip())
+            if node is None:
+                raise ValueError(f"venue_graph: unknown zone in crowd.capacity {ref!r}")
+            self._capacity[self._labels[node]] = int(value)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+
+    def zone_floor(self, zone_name: str) -> str:
+        node = self._zone_nodes.get(zone_name)
+        return self._node_floor[node] if node is not None else ""
+
+    def seconds(self, start: str, end: str) -> float:
+        a = self._zone_nodes.get(start)
+        b = self._zone_nodes.get(end)
+        if a is None or b is None:
+            return math.inf
+        return self._dist[a][b]
+
+    def route(self, start: str, end: str) -> List[RouteLeg]:
+        """Shortest path as legs; consecutive walking legs through landings are kept separate."""
+        a = self._zone_nodes.get(start)
+        b = self._zone_nodes.get(end)
+        if a is None or b is None or a == b or self._next[a][b] < 0:
+            return []
+        legs: List[RouteLeg] = []
+        node = a
+        while node != b:
+            step = self._next[node][b]
+            legs.append(RouteLeg(
+                kind=self._edge_kind[node][step],
+                start=self._labels[node],
+                end=self._labels[step],
+                floor=self._node_floor[step],
+                seconds=self._weight[node][step],
+            ))
+            node = step
+        return legs
+
+    def capacity(self, zone_name: str) -> int:
+        return self._capacity.get(zone_name, self.comfortable_visitors)
+
+    def crowd_penalty(self, visitors: Mapping[str, int]) -> Dict[str, float]:
+        """Extra seconds per zone for the visitors above its comfortable capacity; uncrowded zones are omitted."""
+        penalty: Dict[str, float] = {}
+        for zone_name, count in visitors.items():
+            extra = count - self.capacity(zone_name)
+            if extra > 0 and zone_name in self._zone_nodes:
+                penalty[zone_name] = extra * self.seconds_per_visitor
+        return penalty
+
+    def nearest(self, origin: str, candidates: Sequence[str], crowd: Mapping[str, float] | None = None) -> str:
+        """Closest candidate by walking time (+ crowd penalty); ties and unknown places keep the given order."""
+        if not candidates:
+            return ""
+        ranked = self.by_distance(origin, candidates, crowd)
+        return ranked[0]
+
+    def by_distance(
+        self,
+        origin: str,
+        names: Sequence[str],
+        crowd: Mapping[str, float] | None = None,
+    ) -> List[str]:
+        a = self._zone_nodes.get(origin)
+        if a is None:
+            a = self._zone_nodes.get(self.entrance)
+        if a is None:
+            return list(names)
+        row = self._dist[a]
+        crowd = crowd or {}
+        return sorted(
+            names,
+            key=lambda name: row[self._zone_nodes[name]] + crowd.get(name, 0.0) if name in self._zone_nodes else math.inf,
+        )
+
+    def plan_tour(
+        self,
+        origin: str,
+        stops: Sequence[Tuple[str, Sequence[str]]],
+        crowd: Mapping[str, float] | None = None,
+    ) -> TourPlan:
+        """
+        Visiting order for (zone, exhibits) stops starting at `origin`:
+        nearest-neighbour seed, then 2-opt over the open path. Exhibits keep
+        their catalogue order inside a zone; zones the graph cannot reach go
+        last in the given order. A crowd penalty only picks the first stop —
+        the halls further down the route will have changed by then.
+        """
+        origin = origin if origin in self._zone_nodes else self.entrance
+        exhibits_of = {zone: tuple(exhibits) for zone, exhibits in stops}
+        order = [zone for zone in exhibits_of if zone != origin and zone in self._zone_nodes]
+        unreachable = [zone for zone in exhibits_of if zone != origin and zone not in self._zone_nodes]
+        if origin in self._zone_nodes:
+            reachable = [zone for zone in order if self.seconds(origin, zone) < math.inf]
+            unreachable = [zone for zone in order if zone not in reachable] + unreachable
+            if crowd and reachable:
+                first = self.nearest(origin, reachable, crowd)
+                rest = [zone for zone in reachable if zone != first]
+                order = [first] + self._two_opt(first, self._nearest_neighbour(first, rest))
+            else:
+                order = self._two_opt(origin, self._nearest_neighbour(origin, reachable))
+
+        sequence = ([origin] if origin in exhibits_of else []) + order + unreachable
+        plan: List[TourStop] = []
+        total = 0.0
+        previous = origin
+        for zone in sequence:
+            walk = 0.0 if zone == previous else self.seconds(previous, zone)
+            exhibits = exhibits_of[zone]
+            visit = self.exhibit_seconds * len(exhibits)
+            reachable = walk < math.inf
+            plan.append(TourStop(zone, exhibits, walk if reachable else None, visit))
+            if reachable:
+                total += walk
+                previous = zone
+            total += visit
+        return TourPlan(origin, tuple(plan), total)
+
+    # -------------------------
+    # Internal
+    # -------------------------
+
+    def _add_node(self, label: str, floor: str) -> int:
+        self._labels.append(label)
+        self._node_floor.append(floor)
+        return len(self._labels) - 1
+
+    def _floor_level(self, floor: str) -> int:
+        return self.floors.index(floor) if floor in self.floors else len(self.floors)
+
+    def _resolve(self, ref: str, connectors: Dict[str, Dict[str, Any]], landings: Dict[str, Dict[str, int]]) -> int:
+        ref = ref.strip()
+        if ref in self._node_ids:
+            return self._node_ids[ref]
+        connector_id, sep, floor = ref.partition("@")
+        if not sep or connector_id not in connectors:
+            raise ValueError(f"venue_graph: unknown node {ref!r}")
+        if floor not in landings[connector_id]:
+            connector = connectors[connector_id]
+            name = str(connector.get("name", "")).strip() or _CONNECTOR_LABELS.get(
+                str(connector.get("kind", KIND_STAIRS)), connector_id
+            )
+            landings[connector_id][floor] = self._add_node(f"{name}（{floor}）", floor)
+            if floor not in self.floors:
+                self.floors.append(floor)
+        return landings[connector_id][floor]
+
+    def _build_paths(self, edges: List[Tuple[int, int, float, str]]) -> None:
+        size = len(self._labels)
+        weight = [[math.inf] * size for _ in range(size)]
+        kind = [[KIND_WALK] * size for _ in range(size)]
+        for a, b, seconds, edge_kind in edges:
+            if a == b or seconds >= weight[a][b]:
+                continue
+            weight[a][b] = weight[b][a] = seconds
+            kind[a][b] = kind[b][a] = edge_kind
+
+        dist = [row[:] for row in weight]
+        nxt = [[b if weight[a][b] < math.inf else -1 for b in range(size)] for a in range(size)]
+        for a in range(size):
+            dist[a][a] = 0.0
+            nxt[a][a] = a
+        for k in range(size):
+            dist_k = dist[k]
+            for a in range(size):
+                via = dist[a][k]
+                if via == math.inf:
+                    continue
+                dist_a = dist[a]
+                nxt_a = nxt[a]
+                for b in range(size):
+                    candidate = via + dist_k[b]
+                    if candidate < dist_a[b]:
+                        dist_a[b] = candidate
+                        nxt_a[b] = nxt_a[k]
+        self._weight = weight
+        self._edge_kind = kind
+        self._dist = dist
+        self._next = nxt
+
+    def _nearest_neighbour(self, origin: str, zones: List[str]) -> List[str]:
+        remaining = list(zones)
+        order: List[str] = []
+        current = origin
+        while remaining:
+            current = self.nearest(current, remaining)
+            remaining.remove(current)
+            order.append(current)
+        return order
+
+    def _two_opt(self, origin: str, order: List[str]) -> List[str]:
+        path = [self._zone_nodes[origin]] + [self._zone_nodes[zone] for zone in order]
+        dist = self._dist
+        for _ in range(_MAX_2OPT_PASSES):
+            improved = False
+            for i in range(1, len(path) - 1):
+                for k in range(i + 1, len(path)):
+                    before = dist[path[i - 1]][path[i]]
+                    after = dist[path[i - 1]][path[k]]
+                    if k + 1 < len(path):
+                        before += dist[path[k]][path[k + 1]]
+                        after += dist[path[i]][path[k + 1]]
+                    if after + 1e-9 < before:
+                        path[i:k + 1] = reversed(path[i:k + 1])
+                        improved = True
+            if not improved:
+                break
+        return [self._labels[node] for node in path[1:]]
+
+
+def _zone_floor(zone: Dict[str, Any]) -> str:
+    return str((zone.get("location", {}) or {}).get("floor", "")).strip()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from museguide.llm.guide_stage import STAGE_EXHIBIT_OVERVIEW, STAGE_ZONE_OVERVIEW
+from museguide.llm.language_guard import contains_cjk
+from museguide.llm.narration_bank import NARRATION_BANK_PATH, NarrationBank
+from museguide.llm.orchestrator import ENGLISH_FALLBACK_TTS, LLMOrchestrator
+from museguide.llm.response_parser import parse_llm_json
+
+
+Job = Tuple[str, str, str, int]  # persona_id, kind, target, variant
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pre-generate 展厅介绍 / 展品介绍 narrations for every zone/exhibit x persona."
+    )
+    parser.add_argument("--db", type=Path, default=NARRATION_BANK_PATH, help="Narration bank sqlite file")
+    parser.add_argument("--personas", nargs="*", help="Persona ids (default: all in personas.yaml)")
+    parser.add_argument(
+        "--kinds",
+        nargs="*",
+        choices=["zone", "exhibit"],
+        default=["zone", "exhibit"],
+        help="Which narrations to generate",
+    )
+    parser.add_argument("--variants", type=int, default=1, help="Variants per (target, persona)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max concurrent LLM calls")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per narration on invalid output")
+    parser.add_argument("--force", action="store_true", help="Regenerate entries that already exist")
+    parser.add_argument("--dry-run", action="store_true", help="List pending jobs without calling the LLM")
+    return parser.parse_args()
+
+
+def collect_jobs(orch: LLMOrchestrator, bank: NarrationBank, args: argparse.Namespace) -> List[Job]:
+    index = orch.config.snapshot().domain_index
+    persona_ids = args.personas or list(orch.personas.keys())
+    targets: List[Tuple[str, str]] = []
+    if "zone" in args.kinds:
+        targets.extend(
+            (STAGE_ZONE_OVERVIEW, zone_name)
+            for zone_name, zone in index.zone_by_name.items()
+            if zone.get("category") != "facility"
+        )
+    if "exhibit" in args.kinds:
+        targets.extend((STAGE_EXHIBIT_OVERVIEW, exhibit_name) for exhibit_name in index.exhibit_by_name)
+
+    jobs: List[Job] = []
+    for persona_id in persona_ids:
+        for kind, target in targets:
+            for variant in range(max(1, args.variants)):
+                if not args.force and bank.has(persona_id, kind, target, variant):
+                    continue
+                jobs.append((persona_id, kind, target, variant))
+    return jobs
+
+
+def validate_narration(
+    orch: LLMOrchestrator,
+    data: Dict[str, Any],
+    persona_id: str,
+    kind: str,
+    target: str,
+) -> Tuple[Dict[str, Any] | None, str]:
+    """Round-trip through parse_llm_json and pin the fields the bank key implies."""
+    parsed = parse_llm_json(json.dumps(data, ensure_ascii=False))
+    tts_text = str(parsed.get("tts_text", "")).strip()
+    if not tts_text:
+        return None, "empty tts_text"
+    if orch._persona_requires_english(persona_id):
+        if tts_text == ENGLISH_FALLBACK_TTS:
+            return None, "english fallback reply"
+        if contains_cjk(tts_text):
+            return None, "CJK in english tts_text"
+
+    index = orch.config.snapshot().domain_index
+    parsed["guide_stage"] = kind
+    if kind == STAGE_ZONE_OVERVIEW:
+        parsed["guide_zone"] = target
+        parsed["focus_exhibit"] = "未确定"
+    else:
+        parsed["guide_zone"] = index.zone_of_exhibit.get(target, parsed.get("guide_zone", ""))
+        parsed["focus_exhibit"] = target
+    zone = index.zone_by_name.get(parsed["guide_zone"], {})
+    location = zone.get("location", {}) or {}
+    parsed["guide_floor"] = location.get("floor", parsed.get("guide_floor", ""))
+    parsed["guide_area"] = location.get("area", parsed.get("guide_area", ""))
+    return parsed, ""
+
+
+def generate_one(orch: LLMOrchestrator, job: Job, retries: int) -> Tuple[Job, Dict[str, Any] | None, str]:
+    persona_id, kind, target, _variant = job
+    reason = ""
+    for _attempt in range(retries + 1):
+        try:
+            data = orch.generate_narration(persona_id, kind, target)
+        except Exception as exc:
+            reason = f"llm error: {exc}"
+            continue
+        parsed, reason = validate_narration(orch, data, persona_id, kind, target)
+        if parsed is not None:
+            return job, parsed, ""
+    return job, None, reason
+
+
+def main() -> None:
+    args = parse_args()
+    orch = LLMOrchestrator()
+    orch.llm_cfg["debug"] = False
+    orch.llm_cfg["narration_bank"] = False
+    bank = NarrationBank(args.db, readonly=False)
+
+    jobs = collect_jobs(orch, bank, args)
+    print(f"[bank] {args.db}: {len(jobs)} narrations to generate")
+    if args.dry_run:
+        for job in jobs:
+            print("  " + " / ".join(str(part) for part in job))
+        return
+
+    started = time.time()
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = [pool.submit(generate_one, orch, job, args.retries) for job in jobs]
+        for future in as_completed(futures):
+            job, data, reason = future.result()
+            persona_id, kind, target, variant = job
+            if data is None:
+                failed += 1
+                print(f"[fail] {persona_id} / {kind} / {target} #{variant}: {reason}")
+                continue
+            # written as each result lands, so an interrupted run resumes where it stopped
+            bank.put(persona_id, kind, target, variant, data)
+            done += 1
+            print(f"[ok] ({done}/{len(jobs)}) {persona_id} / {kind} / {target} #{variant}")
+    bank.close()
+    print(f"[bank] done: {done} ok, {failed} failed in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
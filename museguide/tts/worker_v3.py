@@ -186,59 +186,82 @@ class TTSV3Session:
 
         async with self._lock:
             await self._ensure_ws()
-            use_voice_type = voice_type or self.voice_type
-
-            req = {
-                "user": {"uid": "museguide"},
-                "req_params": {
-                    "text": text,
-                    "speaker": use_voice_type,
-                    "audio_params": {
-                        "format": self.format,
-                        "sample_rate": self.sample_rate,
-                    },
+            try:
+                return await self._stream_locked(text, client_ws, voice_type)
+            except BaseException as e:
+                # 浏览器断开 / 任务取消 / 上游出错：关掉上游连接，立即停止合成、不再消耗额度；
+                # 连接随锁一起释放，下一次请求重新建连
+                logger.info(f"TTS v3 stream aborted ({type(e).__name__}: {e}). Reset upstream ws.")
+                await self._drop_ws()
+                raise
+
+    async def _stream_locked(self, text: str, client_ws, voice_type: Optional[str]) -> float:
+        use_voice_type = voice_type or self.voice_type
+
+        req = {
+            "user": {"uid": "museguide"},
+            "req_params": {
+                "text": text,
+                "speaker": use_voice_type,
+                "audio_params": {
+                    "format": self.format,
+                    "sample_rate": self.sample_rate,
+                },
+            },
+        }
+
+        await self._ws.send(_make_request_frame(req))
+
+        # send meta to browser
+        await client_ws.send(
+            json.dumps(
+                {
+                    "type": "meta",
+                    "format": "pcm_s16le",
+                    "sample_rate": self.sample_rate,
+                    "channels": 1,
                 },
-            }
-
-            await self._ws.send(_make_request_frame(req))
-
-            # send meta to browser
-            await client_ws.send(
-                json.dumps(
-                    {
-                        "type": "meta",
-                        "format": "pcm_s16le",
-                        "sample_rate": self.sample_rate,
-                        "channels": 1,
-                    },
-                    ensure_ascii=False,
-                )
+                ensure_ascii=False,
             )
+        )
 
-            while True:
-                msg = await self._ws.recv()
-                if not isinstance(msg, (bytes, bytearray)):
-                    continue
+        while True:
+            msg = await self._ws.recv()
+            if not isinstance(msg, (bytes, bytearray)):
+                continue
 
-                event, msg_type, payload, serialization, _ = _parse_frame(msg)
+            event, msg_type, payload, serialization, _ = _parse_frame(msg)
 
-                if msg_type == MSG_ERROR:
-                    raise RuntimeError(f"TTS v3 error: {payload!r}")
+            if msg_type == MSG_ERROR:
+                raise RuntimeError(f"TTS v3 error: {payload!r}")
 
-                if event == EVENT_TTS_RESPONSE and msg_type == MSG_AUDIO_RESP:
-                    # raw PCM bytes
-                    await client_ws.send(payload)
-                    continue
+            if event == EVENT_TTS_RESPONSE and msg_type == MSG_AUDIO_RESP:
+                # raw PCM bytes
+                await client_ws.send(payload)
+                continue
+
+            if event == EVENT_SESSION_FINISHED:
+                return 0.0
 
-                if event == EVENT_SESSION_FINISHED:
-                    return 0.0
+            # For text events, ignore for now.
+            if serialization == SER_JSON and payload:
+                try:
+                    _ = json.loads(payload.decode("utf-8"))
+                except Exception:
+                    pass
 
-                # For text events, ignore for now.
-                if serialization == SER_JSON and payload:
-                    try:
-                        _ = json.loads(payload.decode("utf-8"))
-                    except Exception:
-                        pass
+    async def _drop_ws(self):
+        ws, self._ws = self._ws, None
+        if ws is None:
+            return
+        try:
+            transport = getattr(ws, "transport", None)
+            if transport is not None:
+                transport.abort()
+            else:
+                await ws.close()
+        except Exception:
+            pass
 
     async def close(self):
         try:
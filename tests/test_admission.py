@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from museguide.llm.admission import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_SPECULATIVE,
+    AdmissionController,
+    AdmissionRejected,
+    build_admission_controller,
+)
+from museguide.llm.backend import LLMCancelled
+
+
+def _queue_behind_held_slot(controller, requests):
+    """Start one thread per (priority, kiosk) while the only slot is held; return grant order."""
+    order = []
+    lock = threading.Lock()
+
+    def worker(priority, kiosk, label):
+        with controller.slot(priority, kiosk):
+            with lock:
+                order.append(label)
+
+    threads = []
+    for priority, kiosk, label in requests:
+        thread = threading.Thread(target=worker, args=(priority, kiosk, label))
+        thread.start()
+        threads.append(thread)
+        # 按提交顺序入队，FIFO 断言才有意义
+        while sum(controller.stats()["queued"].values()) < len(threads):
+            time.sleep(0.001)
+    return order, threads
+
+
+def test_limits_must_be_positive():
+    with pytest.raises(ValueError):
+        AdmissionController(max_concurrent=0)
+    with pytest.raises(ValueError):
+        AdmissionController(per_kiosk=0)
+
+
+def test_free_slot_is_granted_without_waiting():
+    controller = AdmissionController(max_concurrent=2)
+    with controller.slot(PRIORITY_INTERACTIVE, "k1") as waited:
+        assert waited < 0.05
+        assert controller.stats()["active"] == 1
+    assert controller.stats()["active"] == 0
+
+
+def test_slots_go_by_priority_then_fifo():
+    controller = AdmissionController(max_concurrent=1)
+    controller.acquire(PRIORITY_INTERACTIVE)
+    order, threads = _queue_behind_held_slot(controller, [
+        (PRIORITY_BATCH, "", "batch"),
+        (PRIORITY_SPECULATIVE, "", "speculative"),
+        (PRIORITY_INTERACTIVE, "", "interactive-1"),
+        (PRIORITY_INTERACTIVE, "", "interactive-2"),
+    ])
+    controller.release()
+    for thread in threads:
+        thread.join(2.0)
+    assert order == ["interactive-1", "interactive-2", "speculative", "batch"]
+
+
+def test_kiosk_at_its_limit_does_not_block_others():
+    controller = AdmissionController(max_concurrent=3, per_kiosk=1)
+    controller.acquire(PRIORITY_INTERACTIVE, "k1")
+    granted = threading.Event()
+
+    def busy_kiosk():
+        with controller.slot(PRIORITY_INTERACTIVE, "k1"):
+            granted.set()
+
+    thread = threading.Thread(target=busy_kiosk)
+    thread.start()
+    while controller.stats()["queued"]["interactive"] < 1:
+        time.sleep(0.001)
+    # k1 的等待者排在前面，但 k2 的低优先级请求照样拿到空闲名额
+    with controller.slot(PRIORITY_BATCH, "k2", budget=0.1):
+        assert not granted.is_set()
+    controller.release("k1")
+    thread.join(2.0)
+    assert granted.is_set()
+
+
+def test_wait_over_budget_is_shed():
+    controller = AdmissionController(max_concurrent=1)
+    controller.acquire(PRIORITY_INTERACTIVE)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(PRIORITY_SPECULATIVE, budget=0.05)
+    assert rejected.value.priority == PRIORITY_SPECULATIVE
+    assert rejected.value.waited >= 0.05
+    stats = controller.stats()
+    assert stats["queued"]["speculative"] == 0
+    assert stats["priorities"]["speculative"]["shed"] == 1
+    controller.release()
+    assert controller.stats()["active"] == 0
+
+
+def test_cancel_while_queued_raises_cancelled():
+    controller = AdmissionController(max_concurrent=1)
+    controller.acquire(PRIORITY_INTERACTIVE)
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    started = time.monotonic()
+    with pytest.raises(LLMCancelled):
+        controller.acquire(PRIORITY_INTERACTIVE, cancel=cancel)
+    assert time.monotonic() - started < 1.0
+    stats = controller.stats()
+    assert stats["queued"]["interactive"] == 0
+    assert stats["priorities"]["interactive"]["shed"] == 0
+
+
+def test_slot_is_released_when_the_body_raises():
+    controller = AdmissionController(max_concurrent=1, per_kiosk=1)
+    with pytest.raises(RuntimeError):
+        with controller.slot(PRIORITY_INTERACTIVE, "k1"):
+            raise RuntimeError("provider failed")
+    with controller.slot(PRIORITY_INTERACTIVE, "k1", budget=0.05):
+        pass
+
+
+def test_build_from_llm_config():
+    controller = build_admission_controller({"admission": {"max_concurrent": 3, "per_kiosk": 1}})
+    assert (controller.max_concurrent, controller.per_kiosk) == (3, 1)
+    assert build_admission_controller({}).max_concurrent == 8
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from museguide.llm.backend import (
+    ArkProvider,
+    LLMBackend,
+    LLMBackendError,
+    LLMCancelled,
+    OpenAICompatibleProvider,
+    RetryBudget,
+)
+
+
+class FakeProvider:
+    def __init__(self, name, deltas=(), delay=0.0, error=None):
+        self.name = name
+        self.deltas = list(deltas)
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def stream(self, request, *, stream, timeout, cancel):
+        self.calls += 1
+        if self.delay:
+            cancel.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        for delta in self.deltas:
+            if cancel.is_set():
+                return
+            yield delta
+
+
+def _backend(*providers, **kwargs):
+    kwargs.setdefault("deadline", 2.0)
+    kwargs.setdefault("hedge", False)
+    return LLMBackend(list(providers), **kwargs)
+
+
+def test_empty_stream_ends_immediately():
+    backend = _backend(FakeProvider("empty"))
+    started = time.monotonic()
+    assert list(backend.stream({}, stream=True)) == []
+    assert time.monotonic() - started < 0.5
+
+
+def test_single_delta_stream_is_complete():
+    backend = _backend(FakeProvider("short", ["ok"]))
+    assert backend.complete({}) == "ok"
+
+
+def test_stream_yields_all_deltas_in_order():
+    backend = _backend(FakeProvider("ark", ["a", "b", "c"]))
+    assert "".join(backend.stream({}, stream=True)) == "abc"
+
+
+def test_failed_provider_falls_through_to_next():
+    broken = FakeProvider("broken", error=RuntimeError("boom"))
+    backup = FakeProvider("backup", ["fine"])
+    backend = _backend(broken, backup)
+    assert backend.complete({}) == "fine"
+    assert broken.calls == 1 and backup.calls == 1
+
+
+def test_all_providers_failing_raises_backend_error():
+    backend = _backend(FakeProvider("a", error=RuntimeError("x")), FakeProvider("b", error=RuntimeError("y")))
+    with pytest.raises(LLMBackendError) as info:
+        backend.complete({})
+    assert [name for name, _ in info.value.errors] == ["a", "b"]
+
+
+def test_hedge_fires_after_delay_and_fast_attempt_wins():
+    class SlowThenFast(FakeProvider):
+        def stream(self, request, *, stream, timeout, cancel):
+            self.calls += 1
+            if self.calls == 1:
+                cancel.wait(1.0)
+                return
+            yield "hedged"
+
+    provider = SlowThenFast("ark")
+    backend = _backend(provider, hedge=True, hedge_delay=0.05, retry_budget=RetryBudget(min_tokens=3))
+    started = time.monotonic()
+    assert backend.complete({}) == "hedged"
+    assert provider.calls == 2
+    assert time.monotonic() - started < 0.5
+
+
+def test_cancel_event_aborts_the_call():
+    backend = _backend(FakeProvider("slow", ["late"], delay=1.0))
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    started = time.monotonic()
+    with pytest.raises(LLMCancelled):
+        list(backend.stream({}, cancel=cancel))
+    assert time.monotonic() - started < 0.5
+
+
+def test_request_model_takes_precedence_over_provider_model():
+    provider = OpenAICompatibleProvider("local", base_url="http://127.0.0.1:1", model="fallback")
+    assert provider._to_chat_request({"model": "stage-model"}, stream=False)["model"] == "stage-model"
+    assert provider._to_chat_request({}, stream=False)["model"] == "fallback"
+
+
+def test_ark_provider_keeps_request_model():
+    sent = {}
+
+    class Responses:
+        def create(self, **payload):
+            sent.update(payload)
+            raise RuntimeError("stop")
+
+    provider = ArkProvider.__new__(ArkProvider)
+    provider.name, provider.model = "ark", "fallback"
+    provider.client = type("Client", (), {"responses": Responses()})()
+    with pytest.raises(RuntimeError):
+        list(provider.stream({"model": "stage-model"}, stream=False, timeout=1, cancel=threading.Event()))
+    assert sent["model"] == "stage-model"
@@ -0,0 +1,40 @@
+import pytest
+
+from museguide.llm.language_guard import LanguageGuardTripped, cjk_in_tts_text, contains_cjk
+from museguide.llm.orchestrator import LLMOrchestrator
+from museguide.llm.stream_parser import GuideJSONStreamParser
+
+
+def _orchestrator(reply, stream=False):
+    orchestrator = LLMOrchestrator.__new__(LLMOrchestrator)
+    orchestrator.llm_cfg = {"stream": stream}
+    orchestrator._build_llm_request = lambda *args: {}
+    orchestrator._run_llm = lambda request, stream=False: (delta for delta in (reply[:10], reply[10:]))
+    return orchestrator
+
+
+def test_contains_cjk():
+    assert contains_cjk("Welcome to 半坡")
+    assert not contains_cjk("Welcome to Banpo")
+    assert not contains_cjk("")
+
+
+def test_guard_trips_on_partial_tts_text():
+    parser = GuideJSONStreamParser()
+    parser.feed('{"guide_state": "INTRO", "tts_text": "Hello 欢')
+    assert cjk_in_tts_text(parser)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_call_llm_guard_trips_in_both_modes(stream):
+    orchestrator = _orchestrator('{"tts_text": "This is 彩陶 pottery."}', stream=stream)
+    with pytest.raises(LanguageGuardTripped) as tripped:
+        orchestrator._call_llm("hi", "system", guard=cjk_in_tts_text)
+    assert "彩陶" in tripped.value.fields["tts_text"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_call_llm_guard_passes_english(stream):
+    reply = '{"tts_text": "This is painted pottery."}'
+    orchestrator = _orchestrator(reply, stream=stream)
+    assert orchestrator._call_llm("hi", "system", guard=cjk_in_tts_text) == reply
@@ -0,0 +1,54 @@
+import time
+
+from museguide.llm.context_store import ContextStore
+from museguide.llm.occupancy import OccupancyIndex
+from museguide.llm.progress import ProgressIndex
+
+DOMAIN = {
+    "zones": [
+        {"name": "彩陶厅", "exhibits": [{"name": "人面鱼纹盆"}]},
+        {"name": "青铜厅", "exhibits": [{"name": "后母戊鼎"}]},
+    ]
+}
+
+
+def _store(ttl_seconds=1200):
+    return ContextStore(ttl_seconds=ttl_seconds, progress_index=ProgressIndex(DOMAIN))
+
+
+def _visit(store, session_id, persona_id, zone, exhibit=""):
+    store.update(session_id, persona_id, user_text="", guide_text="", current_zone=zone, current_exhibit=exhibit)
+
+
+def test_move_replaces_previous_position():
+    index = OccupancyIndex()
+    index.move("s1", "彩陶厅", "人面鱼纹盆")
+    index.move("s1", "青铜厅", "")
+    assert index.snapshot() == {"visitors": 1, "zones": {"青铜厅": 1}, "exhibits": {}}
+    index.leave("s1")
+    assert index.snapshot() == {"visitors": 0, "zones": {}, "exhibits": {}}
+
+
+def test_persona_switch_counts_the_visitor_once():
+    store = _store()
+    _visit(store, "s1", "woman_demo", "彩陶厅", "人面鱼纹盆")
+    _visit(store, "s1", "man_en", "青铜厅")
+    assert store.occupancy() == {"visitors": 1, "zones": {"青铜厅": 1}, "exhibits": {}}
+
+
+def test_stale_persona_state_does_not_release_the_visitor():
+    store = _store(ttl_seconds=0.2)
+    _visit(store, "s1", "woman_demo", "彩陶厅")
+    time.sleep(0.15)
+    _visit(store, "s1", "man_en", "青铜厅")
+    time.sleep(0.1)
+    # woman_demo 的状态已过期，访客仍由 man_en 的状态占位
+    assert store.occupancy()["zones"] == {"青铜厅": 1}
+    time.sleep(0.15)
+    assert store.occupancy()["visitors"] == 0
+
+
+def test_names_outside_the_catalogue_are_not_counted():
+    store = _store()
+    _visit(store, "s1", "woman_demo", "未确定")
+    assert store.occupancy()["visitors"] == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from museguide.llm.backend import LLMBackendError
+from museguide.llm.orchestrator import LLMOrchestrator
+
+
+class ProviderError(RuntimeError):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeBackend:
+    def __init__(self, error):
+        self.error = error
+        self.requests = []
+
+    def stream(self, request, *, stream, cancel):
+        self.requests.append(request)
+        if "text" in request and self.error is not None:
+            raise LLMBackendError("all LLM providers failed", [("ark", self.error)])
+        yield "{}"
+
+
+def _orchestrator(error, retry_after=600.0):
+    orchestrator = LLMOrchestrator.__new__(LLMOrchestrator)
+    orchestrator.backend = FakeBackend(error)
+    orchestrator._response_format_disabled = {}
+    orchestrator._response_format_retry_after = retry_after
+    return orchestrator
+
+
+def _request(model="doubao-lite"):
+    return {"model": model, "input": [], "text": {"format": {"type": "json_schema"}}}
+
+
+def test_named_response_format_error_downgrades_only_that_model():
+    orchestrator = _orchestrator(ProviderError("The parameter `response_format` is not supported"))
+    assert "".join(orchestrator._run_llm(_request())) == "{}"
+    assert "text" not in orchestrator.backend.requests[-1]
+    assert not orchestrator._response_format_enabled("doubao-lite")
+    assert orchestrator._response_format_enabled("doubao-pro")
+
+
+def test_unrelated_400_is_raised_without_downgrade():
+    orchestrator = _orchestrator(ProviderError("text.input is too long"))
+    with pytest.raises(LLMBackendError):
+        list(orchestrator._run_llm(_request()))
+    assert orchestrator._response_format_enabled("doubao-lite")
+
+
+def test_downgrade_expires():
+    orchestrator = _orchestrator(ProviderError("json_schema is not supported"), retry_after=0.0)
+    list(orchestrator._run_llm(_request()))
+    assert orchestrator._response_format_enabled("doubao-lite")
+    assert orchestrator._response_format_disabled == {}
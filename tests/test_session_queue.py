@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from museguide.api.session_queue import POLICY_LATEST, SessionQueue
+from museguide.llm.backend import LLMCancelled
+
+
+class FakeTurns:
+    """Blocking run_turn stand-in: records calls and overlap, honours the cancel event."""
+
+    def __init__(self, delay=0.05, block=()):
+        self.delay = delay
+        self.block = set(block)
+        self.calls = []
+        self.cancelled = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text, persona_id, session_id, cancel):
+        with self._lock:
+            self.calls.append(text)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if cancel.wait(2.0 if text in self.block else self.delay):
+                self.cancelled.append(text)
+                raise LLMCancelled("cancelled")
+            return f"reply:{text}"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SessionQueue(FakeTurns(), policy="parallel")
+
+
+def test_turns_of_one_session_run_one_at_a_time_in_order():
+    turns = FakeTurns()
+    queue = SessionQueue(turns)
+
+    async def scenario():
+        return await asyncio.gather(*(queue.submit("s1", "woman_demo", text) for text in ("a", "b", "c")))
+
+    outcomes = _run(scenario())
+    assert [outcome.result for outcome in outcomes] == ["reply:a", "reply:b", "reply:c"]
+    assert not any(outcome.shared for outcome in outcomes)
+    assert turns.calls == ["a", "b", "c"]
+    assert turns.max_active == 1
+    assert queue.stats()["sessions"] == 0
+
+
+def test_different_sessions_run_concurrently():
+    turns = FakeTurns(delay=0.2)
+    queue = SessionQueue(turns)
+
+    async def scenario():
+        await asyncio.gather(queue.submit("s1", "woman_demo", "a"), queue.submit("s2", "woman_demo", "a"))
+
+    _run(scenario())
+    assert turns.max_active == 2
+
+
+def test_duplicate_request_shares_one_generation():
+    turns = FakeTurns()
+    queue = SessionQueue(turns)
+
+    async def scenario():
+        return await asyncio.gather(
+            queue.submit("s1", "woman_demo", "介绍一下 后母戊鼎"),
+            queue.submit("s1", "woman_demo", "介绍一下  后母戊鼎 "),
+        )
+
+    first, second = _run(scenario())
+    assert turns.calls == ["介绍一下 后母戊鼎"]
+    assert first.result == second.result
+    assert (first.shared, second.shared) == (False, True)
+    assert queue.stats()["coalesced"] == 1
+
+
+def test_latest_policy_cancels_the_running_turn():
+    turns = FakeTurns(block={"old"})
+    queue = SessionQueue(turns, policy=POLICY_LATEST)
+
+    async def scenario():
+        old = asyncio.create_task(queue.submit("s1", "woman_demo", "old"))
+        await asyncio.sleep(0.05)
+        new = await queue.submit("s1", "woman_demo", "new")
+        return await old, new
+
+    started = time.monotonic()
+    old, new = _run(scenario())
+    assert time.monotonic() - started < 1.0
+    assert turns.cancelled == ["old"]
+    assert old.result == new.result == "reply:new"
+    assert (old.shared, new.shared) == (True, False)
+
+
+def test_latest_policy_drops_queued_turns():
+    turns = FakeTurns(delay=0.1, block={"first"})
+    queue = SessionQueue(turns, policy=POLICY_LATEST)
+
+    async def scenario():
+        first = asyncio.create_task(queue.submit("s1", "woman_demo", "first"))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(queue.submit("s1", "woman_demo", "second"))
+        await asyncio.sleep(0)
+        third = await queue.submit("s1", "woman_demo", "third")
+        return await first, await second, third
+
+    outcomes = _run(scenario())
+    assert "second" not in turns.calls
+    assert {outcome.result for outcome in outcomes} == {"reply:third"}
+
+
+def test_abandoned_running_turn_is_cancelled():
+    turns = FakeTurns(block={"slow"})
+    queue = SessionQueue(turns)
+
+    async def scenario():
+        task = asyncio.create_task(queue.submit("s1", "woman_demo", "slow"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        while queue.stats()["sessions"]:
+            await asyncio.sleep(0.01)
+
+    started = time.monotonic()
+    _run(scenario())
+    assert time.monotonic() - started < 1.0
+    assert turns.cancelled == ["slow"]
+    assert queue.stats()["abandoned"] == 1
+
+
+def test_abandoned_queued_turn_never_runs():
+    turns = FakeTurns(delay=0.1)
+    queue = SessionQueue(turns)
+
+    async def scenario():
+        first = asyncio.create_task(queue.submit("s1", "woman_demo", "first"))
+        queued = asyncio.create_task(queue.submit("s1", "woman_demo", "queued"))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        await first
+
+    _run(scenario())
+    assert turns.calls == ["first"]
+
+
+def test_requests_without_session_are_not_queued():
+    turns = FakeTurns(delay=0.2)
+    queue = SessionQueue(turns)
+
+    async def scenario():
+        return await asyncio.gather(queue.submit("", "woman_demo", "a"), queue.submit("", "woman_demo", "a"))
+
+    outcomes = _run(scenario())
+    assert turns.calls == ["a", "a"]
+    assert turns.max_active == 2
+    assert not any(outcome.shared for outcome in outcomes)
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from museguide.llm.stream_parser import GuideJSONStreamParser, parse_guide_json_stream
+
+REPLY = {
+    "guide_state": "EXPLAINING",
+    "tts_text": "这是\"人面鱼纹盆\"，\n距今约6000年 é \\ / done",
+    "guide_zone": "中华文明源流展区",
+    "focus_exhibit": "人面鱼纹盆",
+    "confidence": 0.85,
+    "extra": {"list": [1, "a}b", {"c": "]"}], "ok": True},
+}
+
+
+def _feed_in_chunks(text, size):
+    parser = GuideJSONStreamParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+    return parser.finish()
+
+
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_chunked_feed_matches_json_loads(ensure_ascii, size):
+    text = json.dumps(REPLY, ensure_ascii=ensure_ascii, indent=1)
+    assert _feed_in_chunks(text, size) == json.loads(text)
+
+
+def test_fields_are_emitted_as_soon_as_they_close():
+    seen = []
+    parser = GuideJSONStreamParser(on_field=lambda key, value: seen.append(key))
+    assert parser.feed('{"guide_state": "IDLE", "tts_text": "你') == [("guide_state", "IDLE")]
+    assert parser.partial_key == "tts_text"
+    assert parser.partial_value == "你"
+    assert parser.feed('好"') == [("tts_text", "你好")]
+    assert parser.partial_key == ""
+    assert seen == ["guide_state", "tts_text"]
+    parser.feed("}")
+    assert parser.done
+
+
+def test_leading_text_and_code_fence_are_skipped():
+    text = 'Here you go:\n```json\n{"guide_state": "IDLE"}\n```'
+    assert parse_guide_json_stream(text) == {"guide_state": "IDLE"}
+
+
+def test_truncated_reply_keeps_the_prefix():
+    fields = parse_guide_json_stream('{"guide_state": "IDLE", "tts_text": "欢迎来到中华世纪坛 ')
+    assert fields == {"guide_state": "IDLE", "tts_text": "欢迎来到中华世纪坛"}
+
+
+def test_truncated_number_is_parsed():
+    assert parse_guide_json_stream('{"confidence": 0.9') == {"confidence": 0.9}
+
+
+def test_fields_are_coerced_to_the_schema_types():
+    fields = parse_guide_json_stream('{"confidence": "0.5", "guide_floor": 2, "user_intent": null}')
+    assert fields == {"confidence": 0.5, "guide_floor": "2", "user_intent": None}
+
+
+def test_invalid_confidence_becomes_none():
+    assert parse_guide_json_stream('{"confidence": "high"}') == {"confidence": None}
+
+
+def test_no_object_yields_no_fields():
+    assert parse_guide_json_stream("抱歉，我无法回答。") == {}